@@ -1,17 +1,374 @@
 # Import typeworld module
 import typeworld.api
-import typeworld.client
 
 # Import third party modules
 import base64
+import collections
+import concurrent.futures
+import functools
+import hashlib
 import json
+import os
+import time
 
 # Import Flask web server
 from flask import Flask, Response, request, abort
+from werkzeug.utils import send_file
+
+# Import own modules
+from cache import TTLCache, SingleFlight
+from catalog import CatalogLoader, CompactCatalog, SharedCatalog
+import compression
+from centralserver import CentralServerClient, CentralServerUnavailable
+from fontstore import FontAssetStore, FontFileStore
+from journal import InstallationJournal, JournalFull
+import metrics
+from ratelimit import RateLimiter
+import serializer
+from sqlitedatasource import SQLiteDatabase
+from streaming import StreamedAssets
+from tokens import AccessTokens, DownloadLinks
 
 global app
 app = Flask(__name__)
 
+# Reference Data Source
+# sqlitedatasource.py implements the placeholders for your own data source that are used throughout this sample code,
+# such as __userBySubscriptionID__() and the user’s __subscriptionDataSource__(), on an SQLite database.
+# Set SQLITE_DATABASE to the path of a database file to use it, for instance to try out this server
+# before connecting it to your own database.
+SQLITE_DATABASE = None
+database = SQLiteDatabase(SQLITE_DATABASE) if SQLITE_DATABASE else None
+
+# User Credentials Cache
+# Results of the user verification with the central type.world server (see verifyUserCredentials()) are kept
+# for a while, so that the app’s periodic refreshes don’t need to wait for the central server every time.
+# Successful verifications are kept longer than failed ones, so that a user who has just been granted access
+# to a subscription (for instance by linking their Type.World user account) doesn’t have to wait long.
+# If you need to revoke a user’s access immediately, call invalidateUserCredentials().
+CREDENTIALS_CACHE_SIZE = 10000
+CREDENTIALS_CACHE_POSITIVE_TTL = 300  # seconds
+CREDENTIALS_CACHE_NEGATIVE_TTL = 30  # seconds
+credentialsCache = TTLCache(maxSize=CREDENTIALS_CACHE_SIZE, ttl=CREDENTIALS_CACHE_POSITIVE_TTL)
+
+# Signed Access Tokens
+# The `accessToken` of a subscription URL (see: https://type.world/developer#security-levels) is normally a single-use token
+# stored with each user, which is checked against your data source and replaced with a new one on each use.
+# With ACCESS_TOKEN_KEYS set, access tokens are signed with a secret key instead and valid for ACCESS_TOKEN_LIFETIME seconds,
+# so that they can be verified without reading from or writing to your data source. Issue them for the subscription URLs
+# on your website with `accessTokens.issue(subscriptionID)` (or `python tokens.py issue SUBSCRIPTIONID`).
+# Keys are given as `keyID: secret`, and new tokens are signed with the first one. To rotate keys, add a new key first
+# and remove the old one after ACCESS_TOKEN_LIFETIME seconds. Tokens that need to become invalid early are revoked with
+# `python tokens.py revoke TOKEN` (or all of a subscription with `revoke-subscription`) in ACCESS_TOKEN_REVOCATION_FILE,
+# which is read by all processes. Keep the keys secret, for instance by reading them from the environment.
+ACCESS_TOKEN_KEYS = {}
+ACCESS_TOKEN_LIFETIME = 3600  # seconds
+ACCESS_TOKEN_REVOCATION_FILE = None
+accessTokens = (
+    AccessTokens(ACCESS_TOKEN_KEYS, ACCESS_TOKEN_LIFETIME, ACCESS_TOKEN_REVOCATION_FILE) if ACCESS_TOKEN_KEYS else None
+)
+
+# Central Server Connection
+# All calls to the central type.world server go through one shared HTTP client per process,
+# which keeps connections open (so that not every user verification needs a new TCP and TLS handshake)
+# and gives up early with a circuit breaker when the central server is slow or down:
+# After CENTRAL_SERVER_FAILURE_THRESHOLD failed requests in a row, no further requests are made for
+# CENTRAL_SERVER_RESET_TIMEOUT seconds, and verifyUserCredentials() immediately follows CENTRAL_SERVER_UNAVAILABLE_POLICY:
+# "deny" treats users as not verified (returns `insufficientPermission` for protected fonts),
+# "allow" treats users as verified, to keep serving your customers during an outage at the cost of security.
+VERIFY_CREDENTIALS_URL = "https://api.type.world/v1/verifyCredentials"
+CENTRAL_SERVER_POOL_SIZE = 20
+CENTRAL_SERVER_CONNECT_TIMEOUT = 3  # seconds
+CENTRAL_SERVER_READ_TIMEOUT = 10  # seconds
+CENTRAL_SERVER_TRIES = 3
+CENTRAL_SERVER_FAILURE_THRESHOLD = 5
+CENTRAL_SERVER_RESET_TIMEOUT = 30  # seconds
+CENTRAL_SERVER_UNAVAILABLE_POLICY = "deny"
+centralServer = CentralServerClient(
+    poolSize=CENTRAL_SERVER_POOL_SIZE,
+    connectTimeout=CENTRAL_SERVER_CONNECT_TIMEOUT,
+    readTimeout=CENTRAL_SERVER_READ_TIMEOUT,
+    tries=CENTRAL_SERVER_TRIES,
+    failureThreshold=CENTRAL_SERVER_FAILURE_THRESHOLD,
+    resetTimeout=CENTRAL_SERVER_RESET_TIMEOUT,
+)
+
+# Coalescing of User Verifications
+# When the app refreshes all of a user’s subscriptions at once, many identical user verifications arrive at the same time.
+# Only the first one is sent to the central server, and all others wait for its result.
+# This works across the threads of a process. To also make it work across the worker processes on one machine,
+# set VERIFICATION_LOCK_DIRECTORY to a local directory where lock files are created (Unix only).
+VERIFICATION_LOCK_DIRECTORY = None
+verificationFlights = SingleFlight(lockDirectory=VERIFICATION_LOCK_DIRECTORY)
+
+# Installable Fonts Cache
+# Most of the traffic to the API Endpoint are the app’s periodic refreshes of a subscription (`commands=installableFonts`),
+# while a subscription’s catalog rarely changes in between. So we keep the `installableFonts` responses as serialized JSON,
+# identified by subscription and catalog version, together with an ETag, and reuse them for all requests of that subscription.
+# If the app sends the ETag of its last refresh in the `If-None-Match` HTTP header, we can answer with `304 Not Modified`,
+# without building or sending anything.
+INSTALLABLEFONTS_CACHE_SIZE = 1000
+INSTALLABLEFONTS_CACHE_TTL = 3600  # seconds
+installableFontsCache = TTLCache(maxSize=INSTALLABLEFONTS_CACHE_SIZE, ttl=INSTALLABLEFONTS_CACHE_TTL)
+
+# Fast Serializer
+# The responses are put out as JSON with serializer.dumpJSON(), which returns the identical output
+# as `root.dumpJSON()` but takes a fraction of its time for large catalogs. Set FAST_SERIALIZER to False to use `root.dumpJSON()`.
+# With FAST_SERIALIZER_VERIFY, each response is additionally compared to the output of `root.dumpJSON()`,
+# and the latter is used (and the difference logged) should they ever differ. Use this when updating the `typeworld` module.
+# Both apply to the parts of responses that are serialized ahead of time and cached, too, except for the compact catalog
+# (see COMPACT_CATALOG), which is always put together with serializer.py.
+FAST_SERIALIZER = True
+FAST_SERIALIZER_VERIFY = False
+
+# Streaming of `installFonts`
+# When switched on, the font data of `installFonts` assets is read from the data source and base64-encoded
+# in small chunks while the response is being sent out, instead of holding all of it in memory several times over.
+# This keeps the memory use per request low, however many fonts are requested at once.
+# See streaming.py and __openBinaryFontData__()
+INSTALLFONTS_STREAMING = False
+
+# Concurrent Preparation of Font Assets
+# Loading and encoding the font data of an `installFonts` request takes a while for each font, so when a user installs
+# a whole superfamily at once, the fonts are prepared on a pool of ASSET_PREPARATION_THREADS threads per process,
+# with at most ASSET_PREPARATION_CONCURRENCY fonts of the same request at a time, so that one large request
+# doesn’t hold up all others. The assets keep the order of the request. Set ASSET_PREPARATION_THREADS to 0 to switch it off.
+ASSET_PREPARATION_THREADS = 16
+ASSET_PREPARATION_CONCURRENCY = 4
+assetPreparationPool = (
+    concurrent.futures.ThreadPoolExecutor(max_workers=ASSET_PREPARATION_THREADS, thread_name_prefix="assets")
+    if ASSET_PREPARATION_THREADS
+    else None
+)
+
+# Font Asset Store
+# Font binaries don’t change for a given version, so instead of base64-encoding them again for each `installFonts` request,
+# they can be encoded once and kept in a directory on disk, from where they are read through memory-mapped files.
+# Set the directory to switch it on. Fonts are encoded when first requested, or ahead of time for the
+# whole catalog with `python fontstore.py warm`. The least recently used fonts are removed when the store
+# grows larger than FONT_ASSET_STORE_MAX_SIZE bytes.
+FONT_ASSET_STORE_DIRECTORY = None
+FONT_ASSET_STORE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+fontAssetStore = FontAssetStore(FONT_ASSET_STORE_DIRECTORY, FONT_ASSET_STORE_MAX_SIZE) if FONT_ASSET_STORE_DIRECTORY else None
+
+# Download by Reference
+# Instead of putting the font data into the `installFonts` response (base64-encoded, a third larger than the font itself),
+# each font asset can carry a link (`dataURL`) from where the app downloads the raw font file.
+# Set FONT_DOWNLOAD_URL to the public URL of this server’s `/download` route to switch it on.
+# Links are signed with FONT_DOWNLOAD_KEY (keep it secret) and expire after FONT_DOWNLOAD_LIFETIME seconds.
+# The font files are kept in FONT_DOWNLOAD_DIRECTORY (up to FONT_DOWNLOAD_MAX_SIZE bytes, see fontstore.py),
+# from where they are sent as they are, with support for partial (`Range`) and conditional requests.
+# Installations are still recorded in `installFonts` when the links are handed out.
+FONT_DOWNLOAD_URL = None  # for instance "https://awesomefonts.com/download"
+FONT_DOWNLOAD_KEY = None
+FONT_DOWNLOAD_LIFETIME = 300  # seconds
+FONT_DOWNLOAD_DIRECTORY = None
+FONT_DOWNLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024
+fontDownloadLinks = DownloadLinks(FONT_DOWNLOAD_KEY, FONT_DOWNLOAD_URL, FONT_DOWNLOAD_LIFETIME) if FONT_DOWNLOAD_URL else None
+fontFileStore = FontFileStore(FONT_DOWNLOAD_DIRECTORY, FONT_DOWNLOAD_MAX_SIZE) if FONT_DOWNLOAD_URL else None
+
+# Write-behind Journal of Installation Records
+# Normally, `installFonts` and `uninstallFonts` wait for the changed installation records to be saved to your data source
+# (see __commitFontInstallationChanges__()) before the response is sent. With a journal directory set, the changes are only
+# appended to a local journal file instead, and a background thread saves them to your data source in batches
+# every INSTALLATION_JOURNAL_FLUSH_INTERVAL seconds (or sooner when INSTALLATION_JOURNAL_BATCH_SIZE requests have piled up).
+# Journals left behind by a crashed or restarted process are saved when app.py is loaded again (Unix only).
+# Changes that haven’t been saved yet are counted when checking seat allowances, but only within the same worker process,
+# so with several workers, a user may briefly be able to exceed a seat allowance by installing from several apps at once.
+# When more than INSTALLATION_JOURNAL_MAX_BACKLOG requests are waiting to be saved, for instance because your data source is down,
+# new ones wait for up to INSTALLATION_JOURNAL_BACKPRESSURE_TIMEOUT seconds and then fail with `503 Service Unavailable`.
+INSTALLATION_JOURNAL_DIRECTORY = None
+INSTALLATION_JOURNAL_MAX_BACKLOG = 10000
+INSTALLATION_JOURNAL_BATCH_SIZE = 500
+INSTALLATION_JOURNAL_FLUSH_INTERVAL = 1  # seconds
+INSTALLATION_JOURNAL_BACKPRESSURE_TIMEOUT = 5  # seconds
+installationJournal = (
+    InstallationJournal(
+        INSTALLATION_JOURNAL_DIRECTORY,
+        lambda *arguments: flushFontInstallationChanges(*arguments),
+        maxBacklog=INSTALLATION_JOURNAL_MAX_BACKLOG,
+        batchSize=INSTALLATION_JOURNAL_BATCH_SIZE,
+        flushInterval=INSTALLATION_JOURNAL_FLUSH_INTERVAL,
+        backpressureTimeout=INSTALLATION_JOURNAL_BACKPRESSURE_TIMEOUT,
+    )
+    if INSTALLATION_JOURNAL_DIRECTORY
+    else None
+)
+
+# Shared Catalog
+# Instead of each worker process loading the catalog (designers, foundries, licenses, families, versions, and fonts)
+# for `installableFonts` from your data source into its own memory, the whole catalog can be published
+# into one compact read-only file with `python catalog.py publish`. All worker processes read it through
+# memory-mapped files straight from the operating system’s page cache, so it is held in memory only once.
+# Publishing a new version replaces the file atomically, and the workers switch over to it within
+# CATALOG_CHECK_INTERVAL seconds, while requests that are under way finish with the version they started out with.
+# Your own data source then only needs to tell which families a subscription has access to (see installableFonts()).
+# Until a catalog has been published, the catalog is read from your data source as usual.
+CATALOG_FILE = None
+CATALOG_CHECK_INTERVAL = 1  # seconds
+sharedCatalog = SharedCatalog(CATALOG_FILE, CATALOG_CHECK_INTERVAL) if CATALOG_FILE else None
+
+# Compact Catalog
+# Instead of building the `typeworld.api` object tree of a subscription’s catalog and serializing it on each request,
+# the whole catalog can be held in memory already serialized into JSON, one piece per designer and family,
+# and the `installableFonts` response of a subscription is then put together by picking its families (see catalog.CompactCatalog).
+# The catalog is read from your data source (or from the shared catalog, see CATALOG_FILE) on startup,
+# and again whenever it has changed (see CATALOG_RELOAD_INTERVAL).
+# Your own data source then only needs to tell which families a subscription has access to (see installableFonts()),
+# and the response must not hold anything that is particular to a subscription other than its choice of families.
+COMPACT_CATALOG = False
+
+# Entitlement Index
+# With COMPACT_CATALOG, the families that each subscription has access to can be loaded for all subscriptions at once
+# along with the compact catalog, and kept as an index of family numbers per subscription (see catalog.Entitlements),
+# so that `installableFonts` doesn’t need to ask your data source for them on each request.
+# A subscription’s families are looked up in your data source again only when its catalog version has changed.
+ENTITLEMENT_INDEX = False
+
+# Catalog Reload
+# Every CATALOG_RELOAD_INTERVAL seconds, a background thread in each worker process checks whether the catalog
+# in your data source (or the shared catalog, see CATALOG_FILE) has changed, and if so, loads the new version
+# of the compact catalog off the request path and swaps it in at once (see catalog.CatalogLoader).
+# Requests that are under way finish with the version they started out with, and the cached `installableFonts`
+# responses of the old version are not used anymore, as each loaded version has a new number (see installableFontsCache).
+CATALOG_RELOAD_INTERVAL = 10  # seconds
+catalogLoader = (
+    CatalogLoader(
+        lambda version: loadCompactCatalog(version),
+        lambda: catalogSourceVersion(),
+        CATALOG_RELOAD_INTERVAL,
+    )
+    if COMPACT_CATALOG
+    else None
+)
+
+# Compression
+# Responses are compressed with gzip, or with brotli if the `brotli` module is installed, when the app accepts it
+# in its `Accept-Encoding` HTTP header. Responses are compressed with fast settings (COMPRESSION_LEVELS) while being sent,
+# except for the cached `installableFonts` responses (see installableFontsCache), which are compressed only once
+# with the best settings (PRECOMPRESSION_LEVELS) in the background on a pool of PRECOMPRESSION_THREADS threads
+# per process, and then sent as they are.
+# Responses smaller than COMPRESSION_MIN_SIZE bytes are sent uncompressed.
+# `installFonts` responses holding font data (unless sent as download links, see FONT_DOWNLOAD_URL) are compressed
+# with FONT_DATA_COMPRESSION_LEVELS instead, and sent uncompressed for encodings missing from it. Base64-encoded font data
+# shrinks by only about a quarter, which isn’t worth compressing several megabytes on each request for.
+COMPRESSION = True
+COMPRESSION_LEVELS = {"gzip": 6, "br": 5}
+PRECOMPRESSION_LEVELS = {"gzip": 9, "br": 11}
+FONT_DATA_COMPRESSION_LEVELS = {}
+COMPRESSION_MIN_SIZE = 1024
+PRECOMPRESSION_THREADS = 2
+precompressionPool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=PRECOMPRESSION_THREADS, thread_name_prefix="precompression"
+)
+
+# Rate Limiting
+# Each client may only send so many requests, identified first by its IP address and then by its `anonymousAppID`,
+# with RATE_LIMIT_ADDRESS and RATE_LIMIT_APP as `(requests per second, burst)`. Requests beyond that are rejected with
+# `429 Too Many Requests` before anything else is done. IP addresses that cause BLOCK_THRESHOLD malformed requests with
+# one of BLOCK_CODES (see handleAbort()) within BLOCK_WINDOW seconds are rejected entirely for BLOCK_DURATION seconds.
+# The app refreshes all of a user’s subscriptions at once, and a whole office may share one IP address, so allow for bursts.
+# The limits are shared by all worker processes forked after app.py has been loaded, and otherwise kept per process.
+# Behind a reverse proxy, make sure that `request.remote_addr` holds the client’s address (see werkzeug’s ProxyFix).
+RATE_LIMIT = True
+RATE_LIMIT_ADDRESS = (20, 200)
+RATE_LIMIT_APP = (5, 100)
+RATE_LIMIT_SLOTS = 65536
+BLOCK_CODES = (401, 404)
+BLOCK_THRESHOLD = 20
+BLOCK_WINDOW = 60  # seconds
+BLOCK_DURATION = 600  # seconds
+rateLimiter = RateLimiter(RATE_LIMIT_SLOTS, BLOCK_THRESHOLD, BLOCK_WINDOW, BLOCK_DURATION)
+
+# Metrics
+# Timings and counters of the API Endpoint, available in the Prometheus text format under `/metrics`.
+# Each process keeps its own metrics, so with several worker processes, each of them reports for itself.
+# Make sure that `/metrics` can only be reached by your monitoring system and not from the outside.
+# Commands are labelled by their name if they are one of METRICS_COMMANDS, and as "unknown" otherwise,
+# so that clients can’t add new label series (and with them memory) to the metrics by sending made-up commands.
+METRICS_COMMANDS = frozenset(("endpoint", "installableFonts", "installFonts", "uninstallFonts"))
+metricsRegistry = metrics.Registry()
+requestDuration = metricsRegistry.histogram("typeworld_api_request_seconds", "Wall time of requests to /api")
+commandDuration = metricsRegistry.histogram(
+    "typeworld_api_command_seconds", "Wall time of each command", ["command"]
+)
+phaseDuration = metricsRegistry.histogram(
+    "typeworld_api_phase_seconds",
+    "Wall time of phases within commands: userLookup, credentialVerification, dataSource, treeBuild, dumpJSON",
+    ["command", "phase"],
+)
+httpResponses = metricsRegistry.counter("typeworld_api_http_responses_total", "HTTP responses by status", ["status"])
+commandResponses = metricsRegistry.counter(
+    "typeworld_api_responses_total", "Values of each command’s `response` attribute", ["command", "response"]
+)
+assetResponses = metricsRegistry.counter(
+    "typeworld_api_asset_responses_total", "Values of each font asset’s `response` attribute", ["command", "response"]
+)
+aborts = metricsRegistry.counter("typeworld_api_aborts_total", "Malformed requests by HTTP code", ["code"])
+metricsRegistry.callback(
+    "typeworld_cache_hits_total",
+    "Cache hits",
+    "counter",
+    ["cache"],
+    lambda: {("credentials",): credentialsCache.hits, ("installableFonts",): installableFontsCache.hits},
+)
+metricsRegistry.callback(
+    "typeworld_cache_misses_total",
+    "Cache misses",
+    "counter",
+    ["cache"],
+    lambda: {("credentials",): credentialsCache.misses, ("installableFonts",): installableFontsCache.misses},
+)
+metricsRegistry.callback(
+    "typeworld_verifications_coalesced_total",
+    "User verifications that waited for an identical verification already under way",
+    "counter",
+    [],
+    lambda: {(): verificationFlights.coalesced},
+)
+metricsRegistry.callback(
+    "typeworld_installation_journal_backlog",
+    "Requests whose changes to installation records are waiting to be saved, see INSTALLATION_JOURNAL_DIRECTORY",
+    "gauge",
+    [],
+    lambda: {(): installationJournal.backlog()} if installationJournal else {},
+)
+metricsRegistry.callback(
+    "typeworld_installation_journal_flushed_total",
+    "Requests whose changes to installation records have been saved from the journal",
+    "counter",
+    [],
+    lambda: {(): installationJournal.flushed} if installationJournal else {},
+)
+metricsRegistry.callback(
+    "typeworld_installation_journal_failures_total",
+    "Failed attempts to save changes to installation records from the journal",
+    "counter",
+    [],
+    lambda: {(): installationJournal.failures} if installationJournal else {},
+)
+metricsRegistry.callback(
+    "typeworld_catalog_version",
+    "Version of the shared catalog in use, see CATALOG_FILE",
+    "gauge",
+    [],
+    lambda: {(): sharedCatalog.version} if sharedCatalog and sharedCatalog.version is not None else {},
+)
+metricsRegistry.callback(
+    "typeworld_compact_catalog_version",
+    "Version number of the compact catalog in use, increased with every reload, see CATALOG_RELOAD_INTERVAL",
+    "gauge",
+    [],
+    lambda: {(): catalogLoader.version} if catalogLoader else {},
+)
+metricsRegistry.callback(
+    "typeworld_compact_catalog_reload_failures_total",
+    "Failed attempts to reload the compact catalog",
+    "counter",
+    [],
+    lambda: {(): catalogLoader.failures} if catalogLoader else {},
+)
+
 # Main API Endpoint URL
 # For security reasons (so that URLs don’t show up in server logs anywhere),
 # we’re only allowing POST requests, where data is transmitted hidden in the requests’ HTTP headers
@@ -21,6 +378,17 @@ def api():
     # SECURITY WARNING:
     # Please note that it’s your responsibility to quarantine all incoming data against SQL injections attacks etc.
 
+    # Admission Control
+    # Clients that send too many requests or have been blocked are turned away before anything else is done (see RATE_LIMIT),
+    # first by their IP address, and only then by their `anonymousAppID`, which needs the incoming data to be parsed
+    clients = [("address", request.remote_addr)]
+    if not admitClient(clients[0]):
+        return handleAbort(429, clients)
+    if request.values.get("anonymousAppID"):
+        clients.append(("app", request.values.get("anonymousAppID")))
+        if not admitClient(clients[1]):
+            return handleAbort(429, clients)
+
     # Only the `commands` parameter is required at this point. All other parameters are optional until we
     # deal with the respective commands, where they will be checked for being present.
 
@@ -34,92 +402,76 @@ def api():
     # All valid requests must carry `commands`. If they don’t, they are probably not coming from the Type.World App.
     # You can use this as a cheap first step to to sort valid from invalid traffic
     if not commands:
-        return handleAbort(404)
+        return handleAbort(404, clients)
 
     # Otherwise, parse commands into list:
     commandsList = commands.split(",")
 
-    # Subscription ID
-    # String identifying a subscription on your server.
-    # For example, the user account of your commercial font customer
-    # could be identified by an anonymous ID.
-    # You have made the `subscriptionID` known to the Type.World app as part of the subscription URL.
-    # See: https://type.world/developer#the-subscription-url
-    subscriptionID = request.values.get("subscriptionID")
-
-    # Secret Key
-    # String as a secret key to a subscription on your server.
-    # You have made the `secretKey` known to the Type.World app as part of the subscription URL.
-    # See: https://type.world/developer#the-subscription-url
-    # And: https://type.world/developer#security-levels
-    secretKey = request.values.get("secretKey")
-
-    # Access Token
-    # Single-use access token to identify that users are accessing this link from inside your website’s user account.
-    # You have made the `accessToken` known to the Type.World app as part of the subscription URL.
-    # See: https://type.world/developer#the-subscription-url
-    # And: https://type.world/developer#security-levels
-    accessToken = request.values.get("accessToken")
-
-    # Fonts
-    # Comma-separated list of `fontID`s to install or uninstall
-    fonts = request.values.get("fonts")
-
-    # Anonymous App ID
-    # String anonymously identifying one app installation on one computer
-    anonymousAppID = request.values.get("anonymousAppID")
-
-    # Anonymous Type.World User ID
-    # Anonymous string identifying one Type.World user account, which could be used across several app instances
-    anonymousTypeWorldUserID = request.values.get("anonymousTypeWorldUserID")
-
-    # User Name and Email
-    # In case you require it and the user has accepted to reveal their identity when installing fonts,
-    # this parameter will hold the user’s name as per their Type.World user account.
-    # For privacy reasons, the validity of this name can’t be verified, so you need to take it as is.
-    # If the user changes the name in their user account, you can’t get to know about that until a new
-    # font installattion request comes in with the new name.
-    userName = request.values.get("userName")
-    userEmail = request.values.get("userEmail")
-
-    # App Version
-    # Holds the version number of the typeworld module used in the app that this request originates from.
-    # This is for future use in case we need to react to protocol changes on our side in the future.
-    # Unused for now
-    appVersion = request.values.get("appVersion")
-
-    # Verified Type.World User
-    # For protected fonts for the three commands `installableFonts`, `installFonts`, and `uninstallFonts`
-    # we need to verify whether the `anonymousTypeWorldUserID` is valid and whether it holds this subscription.
-    # We’re defining the variable `verifiedTypeWorldUserCredentials` here to None (= undefined), and will hand it over to
-    # the three methods installableFonts(), installFonts(), and uninstallFonts(), respectively.
-    # When necessary, those three methods will then verify the user credentials with the central type.world server
-    # and save the result into `verifiedTypeWorldUserCredentials`, so that the remaining methods don’t need
-    # to repeat the verification process, to save time and resources.
-    verifiedTypeWorldUserCredentials = None
+    # Request Context
+    # Holds all other incoming parameters, and will find the user, verify the user with the central type.world server
+    # and load the user’s data source only when a command needs it, and then only once per request.
+    # The same context is handed over to all commands, so that for chained commands such as `installableFonts,installFonts`
+    # the remaining commands don’t need to repeat these steps, to save time and resources.
+    context = RequestContext(request.values, clients)
+
+    # Process commands and return the response
+    with requestDuration.time():
+        response = processCommands(
+            commandsList, context, request.if_none_match, request.headers.get("Accept-Encoding")
+        )
+    httpResponses.inc(response.status_code)
+    return response
+
+
+# Metrics
+# Timings and counters in the Prometheus text format, see `metricsRegistry`
+@app.route("/metrics", methods=["GET"])
+def metricsEndpoint():
+    return Response(metricsRegistry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# Font Downloads
+# Raw font files behind the signed links handed out in `installFonts`, see FONT_DOWNLOAD_URL
+@app.route("/download/<token>", methods=["GET"])
+def download(token):
+    return fontDownload(token, request.environ)
+
+
+def processCommands(commandsList, context, ifNoneMatch, acceptEncoding=None):
+    """
+    Process all commands of a request and return the response.
+
+    This is independent of the web framework, so that it can be used by the Flask view api()
+    as well as by the ASGI application in asgi.py. `ifNoneMatch` holds the ETags of the request’s
+    `If-None-Match` HTTP header, as a `werkzeug.datastructures.ETags` object, and `acceptEncoding`
+    the value of its `Accept-Encoding` HTTP header.
+    Malformed requests end in handleAbort(), which raises an `HTTPException`.
+    """
 
     # We’ve processed all possible incoming data, so let’s create the root object
     # See: https://github.com/typeworld/typeworld/tree/master/Lib/typeworld/api#user-content-class-rootresponse
     root = typeworld.api.RootResponse()
 
-    # SubscriptionURL
-    # For various processing purposes, we need to assemble a complete subscriptionURL here
-    # The below example assumes a protected subscription with ID and secret key as per subscription URL Format C
-    # (see: https://type.world/developer#the-subscription-url)
-    subscriptionURL = f"typeworld://json+https//{subscriptionID}:{secretKey}@awesomefonts.com/api"
-
-    # API Key
-    # Each API Endpoint needs to possess a secret API Key to use when accessing certain commands of the central
-    # Type.World server API, first and foremost the user verification.
-    # You can obtain such an API Key by registering your API Endpoint in the user account section on https://type.world
-    APIKey = "__APIKey__"
-
-    # Incoming API Key
-    # For certain procedures the central type.world server will access your API endpoint. For instance,
-    # when you want to announce a subscription update with the central server’s "updateSubscription" command,
-    # the central server will query the subscription from your API endpoint for verification. To authenticate itself,
-    # the incoming request will carry the same API key that you use to authenticate yourself in the other direction.
-    incomingAPIKey = request.values.get("APIKey")
+    # Refresh of a subscription
+    # See if we have answered the identical `installableFonts` command before
+    cacheKey = installableFontsCacheKey(commandsList, context)
+    if cacheKey:
+        cached = installableFontsCache.get(cacheKey)
+        if cached:
+            etag, fragment, body = cached
+            commandResponses.inc("installableFonts", "success")
+            encoding = responseEncoding(acceptEncoding, len(body.data))
+
+            # The app already holds this exact response, so tell it that nothing has changed
+            if compression.matchesETag(ifNoneMatch, etag):
+                response = Response(status=304)
+
+            # Otherwise return the cached response
+            else:
+                response = jsonResponse(body, encoding)
+
+            compression.setVariantETag(response, etag, encoding)
+            return varyResponse(response)
 
     # Process the commands in the order they were given.
     # It is mandatory that they are executed in the given order to retain certain logic.
@@ -136,8 +488,19 @@ def api():
     # ask the central type.world server for user verification twice, too, which introduces a lot of
     # unnecessary overhead. So we’re streamlining things a lot here by combining them.
 
+    # Commands may return their response already serialized into JSON,
+    # for instance when it is the same for every request, or has been cached.
+    # These are collected here as `command: fragment` and spliced into the root object’s JSON data as they are.
+    fragments = {}
+
     for command in commandsList:
 
+        success, message = True, None
+
+        # Timing for metrics
+        context.command = command if command in METRICS_COMMANDS else "unknown"
+        start = time.perf_counter()
+
         # Call endpoint() method, hand over root object to fill with data
         if command == "endpoint":
 
@@ -146,74 +509,45 @@ def api():
 
             # Process: Return value is of type integer, which means we handle a request abort with HTTP code
             if not success and type(message) == int:
-                return handleAbort(message)
+                return handleAbort(message, context.clients)
 
         # Call installableFonts() method, hand over root object to fill with data
         elif command == "installableFonts":
 
             # Call installableFonts()
-            success, message = installableFonts(
-                root,
-                subscriptionURL,
-                APIKey,
-                incomingAPIKey,
-                subscriptionID,
-                secretKey,
-                accessToken,
-                anonymousAppID,
-                anonymousTypeWorldUserID,
-                verifiedTypeWorldUserCredentials,
-            )
+            success, message = installableFonts(root, context)
 
             # Process: Return value is of type integer, which means we handle a request abort with HTTP code
             if not success and type(message) == int:
-                return handleAbort(message)
+                return handleAbort(message, context.clients)
 
         # Call installFonts() method, hand over root object to fill with data
         elif command == "installFonts":
 
             # Call installFonts()
-            success, message = installFonts(
-                root,
-                fonts,
-                subscriptionURL,
-                APIKey,
-                incomingAPIKey,
-                subscriptionID,
-                secretKey,
-                accessToken,
-                anonymousAppID,
-                anonymousTypeWorldUserID,
-                verifiedTypeWorldUserCredentials,
-                userName,
-                userEmail,
-            )
+            success, message = installFonts(root, context)
 
             # Process: Return value is of type integer, which means we handle a request abort with HTTP code
             if not success and type(message) == int:
-                return handleAbort(message)
+                return handleAbort(message, context.clients)
 
         # Call uninstallFonts() method, hand over root object to fill with data
         elif command == "uninstallFonts":
 
             # Call uninstallFonts()
-            success, message = uninstallFonts(
-                root,
-                fonts,
-                subscriptionURL,
-                APIKey,
-                incomingAPIKey,
-                subscriptionID,
-                secretKey,
-                accessToken,
-                anonymousAppID,
-                anonymousTypeWorldUserID,
-                verifiedTypeWorldUserCredentials,
-            )
+            success, message = uninstallFonts(root, context)
 
             # Process: Return value is of type integer, which means we handle a request abort with HTTP code
             if not success and type(message) == int:
-                return handleAbort(message)
+                return handleAbort(message, context.clients)
+
+        # Process: Return value is of type string, which means it is the command’s response serialized into JSON
+        if success and type(message) == str:
+            fragments[command] = message
+
+        # Metrics
+        commandDuration.observe(time.perf_counter() - start, context.command)
+        countResponses(root, command)
 
     # Export root object into nicely formatted JSON data.
     # This is the moment of truth if you have indeed used the Python object tree as provided by `typeworld.api`.
@@ -223,10 +557,408 @@ def api():
     # If you are not using `typeworld.api` or are implementing your server in another programming language,
     # please validate your server using the online validator at https://type.world/developer/validate
     # In the future, the validator will also be made available offline in `typeworld.tools`
-    jsonData = root.dumpJSON()
+    # Note: In this sample code, we’re using the identical but faster serializer.dumpJSON() instead of `root.dumpJSON()`
+    with phaseDuration.time("root", "dumpJSON"):
+        jsonData = dumpJSON(root, fragments)
+
+    # Responses holding font data are compressed differently, see FONT_DATA_COMPRESSION_LEVELS
+    if "installFonts" in commandsList and not fontDownloadLinks:
+        levels = FONT_DATA_COMPRESSION_LEVELS
+    else:
+        levels = COMPRESSION_LEVELS
+
+    # Font data of `installFonts` is being streamed, so send out the JSON data in chunks,
+    # filling in the font data as we go
+    # (Streamed responses hold font data, so they are always large enough for compression)
+    if context.streamedAssets:
+        chunks = context.streamedAssets.stream(jsonData)
+        encoding = responseEncoding(acceptEncoding, COMPRESSION_MIN_SIZE, levels)
+        if encoding:
+            chunks = compression.compressStream(chunks, encoding, levels[encoding])
+        response = Response(chunks, mimetype="application/json")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        return varyResponse(response)
+
+    # Refresh of a subscription, which is identical to the response saved in `installableFontsCache`,
+    # so use that one together with its compressed variants
+    if cacheKey and context.installableFontsBody:
+        body = context.installableFontsBody
+        size = len(body.data)
+    else:
+        body = jsonData.encode()
+        size = len(body)
 
     # Return the response with the correct MIME type `application/json` (or otherwise the app will complain)
-    return Response(jsonData, mimetype="application/json")
+    encoding = responseEncoding(acceptEncoding, size, levels)
+    response = jsonResponse(body, encoding, levels)
+
+    # Refresh of a subscription, so send along the ETag of the response for the next refresh
+    if cacheKey and context.installableFontsETag:
+        compression.setVariantETag(response, context.installableFontsETag, encoding)
+
+    return varyResponse(response)
+
+
+def responseEncoding(acceptEncoding, size, levels=None):
+    """
+    Return content coding for a response of `size` bytes, or None to send it uncompressed, see COMPRESSION.
+    Only encodings with a compression level in `levels` (or COMPRESSION_LEVELS) are used.
+    """
+
+    if levels is None:
+        levels = COMPRESSION_LEVELS
+
+    if not COMPRESSION or size < COMPRESSION_MIN_SIZE:
+        return None
+
+    encoding = compression.negotiate(acceptEncoding)
+    return encoding if encoding in levels else None
+
+
+def jsonResponse(body, encoding, levels=None):
+    """
+    Return response with JSON data `body` (as bytes, or as a compression.PrecompressedBody) compressed with `encoding`
+    at its level in `levels` (or COMPRESSION_LEVELS)
+    """
+
+    if levels is None:
+        levels = COMPRESSION_LEVELS
+
+    if isinstance(body, compression.PrecompressedBody):
+        compressed = body.get(encoding) if encoding else None
+        body = body.data
+    else:
+        compressed = None
+
+    # Compress now, unless a precompressed variant is ready
+    if encoding and compressed is None:
+        compressed = compression.compress(body, encoding, levels[encoding])
+
+    if not encoding:
+        return Response(body, mimetype="application/json")
+
+    response = Response(compressed, mimetype="application/json")
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def varyResponse(response):
+    """
+    Tell caches that the response depends on the request’s `Accept-Encoding` HTTP header, see COMPRESSION
+    """
+
+    if COMPRESSION:
+        response.vary.add("Accept-Encoding")
+
+    return response
+
+
+def countResponses(root, command):
+    """
+    Count `response` values of command and its assets for metrics
+    """
+
+    if command in ("installableFonts", "installFonts", "uninstallFonts"):
+        commandObject = getattr(root, command)
+        commandResponses.inc(command, commandObject.response)
+
+        if command in ("installFonts", "uninstallFonts"):
+            for asset in commandObject.assets:
+                assetResponses.inc(command, asset.response)
+
+
+def dumpJSON(root, fragments=None):
+    """
+    Export root object into JSON data, see FAST_SERIALIZER.
+    `fragments` holds already serialized responses of commands, see processCommands().
+    """
+
+    if not FAST_SERIALIZER:
+        return serializer.dumpJSON(root, fragments, original=True)
+
+    if FAST_SERIALIZER_VERIFY:
+        identical, message = serializer.verify(root, fragments)
+        if not identical:
+            app.logger.error("serializer.dumpJSON() differs from root.dumpJSON(): %s", message)
+            return serializer.dumpJSON(root, fragments, original=True)
+
+    return serializer.dumpJSON(root, fragments)
+
+
+def dumpFragment(o):
+    """
+    Export a direct attribute of the root object into JSON data to be spliced into the root object’s output
+    by dumpJSON(), see FAST_SERIALIZER
+    """
+
+    if not FAST_SERIALIZER:
+        return serializer.fragment(o, original=True)
+
+    if FAST_SERIALIZER_VERIFY:
+        identical, message = serializer.verifyFragment(o)
+        if not identical:
+            app.logger.error("serializer.fragment() differs from dumpDict(): %s", message)
+            return serializer.fragment(o, original=True)
+
+    return serializer.fragment(o)
+
+
+def installableFontsCacheKey(commandsList, context):
+    """
+    Return the key under which the response to this request may be found in `installableFontsCache`,
+    or None if the cache can’t be used before processing the commands.
+
+    Only plain refreshes (`commands=installableFonts`) of existing subscriptions are answered straight from the cache,
+    and only after the requesting user has passed the same security check as in installableFonts(),
+    so a cached response is never handed out to anyone who wouldn’t otherwise receive it.
+    """
+
+    # Only cache requests that consist of `installableFonts` alone
+    if commandsList != ["installableFonts"] or not context.subscriptionID:
+        return None
+
+    # Requests carrying a single-use access token need to go through installableFonts() to invalidate the token.
+    # Signed access tokens stay valid, see ACCESS_TOKEN_KEYS.
+    if context.accessToken and not accessTokens:
+        return None
+
+    # Find user
+    context.command = "installableFonts"
+    __user__ = context.user()
+
+    # User doesn't exist or secret key doesn't match with user
+    if __user__ == None or context.secretKey != __user__.__secretKey__:
+        return None
+
+    # User has no valid signed access token and isn't verified with central type.world server
+    if not context.validAccessToken() and context.verifiedTypeWorldUserCredentials() != True:
+        return None
+
+    return context.subscriptionID, context.catalogVersion()
+
+
+# Marker for values of RequestContext that haven’t been looked up yet
+_unresolved = object()
+
+
+class RequestContext(object):
+    """
+    Incoming parameters of one request, shared by all commands of that request.
+
+    The user, the user’s verification with the central type.world server, and the user’s
+    data source are only resolved when a command first asks for them, and then only once.
+    """
+
+    def __init__(self, values, clients=()):
+
+        # Subscription ID
+        # String identifying a subscription on your server.
+        # For example, the user account of your commercial font customer
+        # could be identified by an anonymous ID.
+        # You have made the `subscriptionID` known to the Type.World app as part of the subscription URL.
+        # See: https://type.world/developer#the-subscription-url
+        self.subscriptionID = values.get("subscriptionID")
+
+        # Secret Key
+        # String as a secret key to a subscription on your server.
+        # You have made the `secretKey` known to the Type.World app as part of the subscription URL.
+        # See: https://type.world/developer#the-subscription-url
+        # And: https://type.world/developer#security-levels
+        self.secretKey = values.get("secretKey")
+
+        # Access Token
+        # Single-use access token to identify that users are accessing this link from inside your website’s user account.
+        # You have made the `accessToken` known to the Type.World app as part of the subscription URL.
+        # See: https://type.world/developer#the-subscription-url
+        # And: https://type.world/developer#security-levels
+        self.accessToken = values.get("accessToken")
+
+        # Fonts
+        # Comma-separated list of `fontID`s to install or uninstall
+        self.fonts = values.get("fonts")
+
+        # Anonymous App ID
+        # String anonymously identifying one app installation on one computer
+        self.anonymousAppID = values.get("anonymousAppID")
+
+        # Anonymous Type.World User ID
+        # Anonymous string identifying one Type.World user account, which could be used across several app instances
+        self.anonymousTypeWorldUserID = values.get("anonymousTypeWorldUserID")
+
+        # User Name and Email
+        # In case you require it and the user has accepted to reveal their identity when installing fonts,
+        # this parameter will hold the user’s name as per their Type.World user account.
+        # For privacy reasons, the validity of this name can’t be verified, so you need to take it as is.
+        # If the user changes the name in their user account, you can’t get to know about that until a new
+        # font installattion request comes in with the new name.
+        self.userName = values.get("userName")
+        self.userEmail = values.get("userEmail")
+
+        # App Version
+        # Holds the version number of the typeworld module used in the app that this request originates from.
+        # This is for future use in case we need to react to protocol changes on our side in the future.
+        # Unused for now
+        self.appVersion = values.get("appVersion")
+
+        # SubscriptionURL
+        # For various processing purposes, we need to assemble a complete subscriptionURL here
+        # The below example assumes a protected subscription with ID and secret key as per subscription URL Format C
+        # (see: https://type.world/developer#the-subscription-url)
+        self.subscriptionURL = f"typeworld://json+https//{self.subscriptionID}:{self.secretKey}@awesomefonts.com/api"
+
+        # API Key
+        # Each API Endpoint needs to possess a secret API Key to use when accessing certain commands of the central
+        # Type.World server API, first and foremost the user verification.
+        # You can obtain such an API Key by registering your API Endpoint in the user account section on https://type.world
+        self.APIKey = "__APIKey__"
+
+        # Incoming API Key
+        # For certain procedures the central type.world server will access your API endpoint. For instance,
+        # when you want to announce a subscription update with the central server’s "updateSubscription" command,
+        # the central server will query the subscription from your API endpoint for verification. To authenticate itself,
+        # the incoming request will carry the same API key that you use to authenticate yourself in the other direction.
+        self.incomingAPIKey = values.get("APIKey")
+
+        # Font data of `installFonts` assets to be streamed, see INSTALLFONTS_STREAMING
+        self.streamedAssets = StreamedAssets(fontAssetStore) if INSTALLFONTS_STREAMING else None
+
+        # Keys identifying the client that sent the request, see admitClient()
+        self.clients = clients
+
+        # Command currently being processed, for metrics
+        self.command = None
+
+        # Set by installFonts() and uninstallFonts(), so that a following installableFonts() knows
+        # that the subscription’s catalog version may have changed during this request
+        self.installationsChanged = False
+
+        # ETag and complete body (as a compression.PrecompressedBody) of the `installableFonts` response,
+        # see installableFontsCache
+        self.installableFontsETag = None
+        self.installableFontsBody = None
+
+        # Lazily resolved values, see the methods below.
+        # `_unresolved` stands for "not looked up yet", as None is a valid result for all of them.
+        self._user = _unresolved
+        self._dataSource = _unresolved
+        self._catalog = _unresolved
+        self._compactCatalog = _unresolved
+        self._validAccessToken = _unresolved
+
+        # Verified Type.World User
+        # For protected fonts for the three commands `installableFonts`, `installFonts`, and `uninstallFonts`
+        # we need to verify whether the `anonymousTypeWorldUserID` is valid and whether it holds this subscription.
+        # It starts out as None (= undefined), and verifiedTypeWorldUserCredentials() will verify the user credentials
+        # with the central type.world server only when it is first called, and save the result here,
+        # so that the remaining commands don’t need to repeat the verification process, to save time and resources.
+        self._verifiedTypeWorldUserCredentials = None
+
+    def user(self):
+        """
+        Return user (or None) for `subscriptionID`, looked up only once per request
+        """
+
+        if self._user is _unresolved:
+            with phaseDuration.time(self.command, "userLookup"):
+                # Note: __userBySubscriptionID__() doesn’t exist in this sample code
+                self._user = __userBySubscriptionID__(self.subscriptionID)
+
+        return self._user
+
+    def validAccessToken(self):
+        """
+        Return True if the request carries a valid access token for this subscription, checked only once per request
+        """
+
+        if self._validAccessToken is _unresolved:
+            if not self.accessToken:
+                self._validAccessToken = False
+
+            # Signed access token, verified without the data source, see ACCESS_TOKEN_KEYS
+            elif accessTokens:
+                self._validAccessToken = accessTokens.verify(self.accessToken, self.subscriptionID)
+
+            # Single-use access token stored with the user
+            else:
+                __user__ = self.user()
+                self._validAccessToken = __user__ != None and self.accessToken == __user__.__accessToken__
+
+        return self._validAccessToken
+
+    def verifiedTypeWorldUserCredentials(self):
+        """
+        Return True if the Type.World user holds this subscription, verified only once per request
+        """
+
+        if self._verifiedTypeWorldUserCredentials == None:
+            # Verify user with central type.world server now
+            with phaseDuration.time(self.command, "credentialVerification"):
+                self._verifiedTypeWorldUserCredentials = verifyUserCredentials(
+                    self.APIKey,
+                    self.incomingAPIKey,
+                    self.anonymousAppID,
+                    self.anonymousTypeWorldUserID,
+                    self.subscriptionURL,
+                )
+
+        return self._verifiedTypeWorldUserCredentials
+
+    def dataSource(self):
+        """
+        Return the user’s own data source, pulled only once per request
+        """
+
+        if self._dataSource is _unresolved:
+            with phaseDuration.time(self.command, "dataSource"):
+                # Note: __subscriptionDataSource__() doesn’t exist in this sample code
+                self._dataSource = self.user().__subscriptionDataSource__()
+
+        return self._dataSource
+
+    def catalog(self):
+        """
+        Return the shared catalog (or None), see CATALOG_FILE.
+        Looked up only once per request, so that all commands of a request see the same version.
+        """
+
+        if self._catalog is _unresolved:
+            self._catalog = sharedCatalog.current() if sharedCatalog else None
+
+        return self._catalog
+
+    def compactCatalog(self):
+        """
+        Return the compact catalog (or None), see COMPACT_CATALOG.
+        Looked up only once per request, just like catalog().
+        """
+
+        if self._compactCatalog is _unresolved:
+            self._compactCatalog = catalogLoader.current() if catalogLoader else None
+
+        return self._compactCatalog
+
+    def catalogVersion(self):
+        """
+        Return version of the subscription’s catalog, see installableFontsCache
+        """
+
+        # The catalog version needs to change whenever anything in the response for this subscription changes,
+        # for instance a counter or timestamp in your database that is increased with every change to the catalog.
+        # Note: __catalogVersion__ doesn’t exist in this sample code
+        version = self.user().__catalogVersion__
+
+        # The response also changes with each newly published shared catalog
+        catalog = self.catalog()
+        if catalog:
+            version = version, catalog.version
+
+        # And with each reload of the compact catalog
+        compact = self.compactCatalog()
+        if compact:
+            version = version, compact.version
+
+        return version
 
 
 def endpoint(root):
@@ -234,9 +966,19 @@ def endpoint(root):
     Process `endpoint` command
     """
 
-    # Create `endpoint` object, attach to `root`
+    # The `endpoint` response is the same for every request,
+    # so it’s built only once, and returned here already serialized into JSON
+    return True, endpointFragment()
+
+
+@functools.lru_cache(maxsize=None)
+def endpointFragment():
+    """
+    Build `endpoint` response, return it serialized into JSON
+    """
+
+    # Create `endpoint` object
     endpoint = typeworld.api.EndpointResponse()
-    root.endpoint = endpoint
 
     # Apply data
     endpoint.name.en = "Awesome Fonts"
@@ -252,22 +994,10 @@ def endpoint(root):
     ]
     # etc ...
 
-    # Return successfully, no message
-    return True, None
+    return dumpFragment(endpoint)
 
 
-def installableFonts(
-    root,
-    subscriptionURL,
-    APIKey,
-    incomingAPIKey,
-    subscriptionID,
-    secretKey,
-    accessToken,
-    anonymousAppID,
-    anonymousTypeWorldUserID,
-    verifiedTypeWorldUserCredentials,
-):
+def installableFonts(root, context):
     """
     Process `installableFonts` command
     """
@@ -276,11 +1006,14 @@ def installableFonts(
     installableFonts = typeworld.api.InstallableFontsResponse()
     root.installableFonts = installableFonts
 
+    # Key for `installableFontsCache`
+    cacheKey = None
+
     # `subscriptionID` is set, so we need to find a particular subscription/user account and serve it
-    if subscriptionID:
+    if context.subscriptionID:
 
         # Find user
-        __user__ = __userBySubscriptionID__(subscriptionID)
+        __user__ = context.user()
 
         # User doesn't exist, return `validTypeWorldUserAccountRequired` immediately
         if __user__ == None:
@@ -288,7 +1021,7 @@ def installableFonts(
             return True, None
 
         # Secret Key doesn't match with user, return `insufficientPermission` immediately
-        if secretKey != __user__.__secretKey__:
+        if context.secretKey != __user__.__secretKey__:
             installableFonts.response = "insufficientPermission"
             return True, None
 
@@ -300,46 +1033,31 @@ def installableFonts(
 
         # Note: `accessToken` is only ever defined for an `installableFonts` command, as it is only ever used once
         # when accessing a subscription for the first time. In the two other methods that have a security check,
-        # installFonts() and uninstallFonts(), we’ll solely rely on `verifiedTypeWorldUserCredentials`, as by that time
+        # installFonts() and uninstallFonts(), we’ll solely rely on the user verification, as by that time
         # a subscription has already been accessed at least once, and `accessToken` already processed.
 
         # Set intial state to False
         securityCheckPassed = False
 
-        # Request has a valid single-use access token for this user, so we allow the request
-        if accessToken and accessToken == __user__.__accessToken__:
+        # Request has a valid access token for this user, so we allow the request
+        if context.validAccessToken():
             securityCheckPassed = True
 
             # Since the access token is single-use, we need to invalidate it here and assign a new one immediately.
             # Also, in case anything goes wrong in the whole setup process of a subscription in the Type.World app,
             # you need to make sure that in your website’s download section, where the user clicked on the button to get here,
             # that button needs to be reloaded with the new accessToken as part of the subscription URL.
-            __user__.__assignNewAccessToken__()
+            # Signed access tokens expire on their own instead, see ACCESS_TOKEN_KEYS.
+            if not accessTokens:
+                __user__.__assignNewAccessToken__()
 
-        # Security check is still not passed
+        # Security check is still not passed, so verify the user with the central type.world server
+        # (unless that has already happened earlier in this request)
         if securityCheckPassed == False:
 
-            # See if the user has already been verified
-            if verifiedTypeWorldUserCredentials != None:
-
-                # User has been successfully verified before
-                if verifiedTypeWorldUserCredentials == True:
-                    securityCheckPassed = True
-
-            # Has not been verified yet, so we need to verify them now
-            else:
-                # Verify user with central type.world server now, save into global variable `verifiedTypeWorldUserCredentials`
-                verifiedTypeWorldUserCredentials = verifyUserCredentials(
-                    APIKey,
-                    incomingAPIKey,
-                    anonymousAppID,
-                    anonymousTypeWorldUserID,
-                    subscriptionURL,
-                )
-
-                # User was successfully validated:
-                if verifiedTypeWorldUserCredentials == True:
-                    securityCheckPassed = True
+            # User was successfully validated:
+            if context.verifiedTypeWorldUserCredentials() == True:
+                securityCheckPassed = True
 
         # Still didn’t pass security check, return `insufficientPermission` immediately
         if securityCheckPassed == False:
@@ -351,12 +1069,40 @@ def installableFonts(
 
         # Now we’re passed the security check and may continue ...
 
+        # See if we have built the identical response before, and return it already serialized into JSON.
+        # Not if fonts have been installed or uninstalled earlier in this request, because the user’s catalog version
+        # was loaded before that, but needs to reflect the changed installations.
+        if not context.installationsChanged:
+            cacheKey = (context.subscriptionID, context.catalogVersion())
+            cached = installableFontsCache.get(cacheKey)
+            if cached:
+                context.installableFontsETag, fragment, context.installableFontsBody = cached
+                installableFonts.response = "success"
+                return True, fragment
+
+        # Put the response together from the compact catalog (see COMPACT_CATALOG),
+        # holding the families that the subscription has access to, already serialized into JSON
+        compact = context.compactCatalog()
+        if compact:
+            families = subscriptionFamilies(compact, context)
+            with phaseDuration.time("installableFonts", "dumpJSON"):
+                fragment = compact.fragment(families)
+            installableFonts.response = "success"
+            return True, cacheInstallableFonts(root, context, cacheKey, fragment)
+
         # Pull data out of your own data source
-        # Note: __subscriptionDataSource__() doesn’t exist in this sample code
-        __ownDataSource__ = __user__.__subscriptionDataSource__()
+        __ownDataSource__ = context.dataSource()
+
+        # Or read the catalog from the shared catalog instead (see CATALOG_FILE),
+        # holding the families that your own data source says the subscription has access to
+        # Note: __familyIDs__() doesn’t exist in this sample code
+        catalog = context.catalog()
+        if catalog:
+            __ownDataSource__ = catalog.subscription(__ownDataSource__.__familyIDs__())
 
         # Create object tree for `installableFonts` out of font data in `__ownDataSource__`
-        success, message = createInstallableFontsObjectTree(installableFonts, __ownDataSource__)
+        with phaseDuration.time("installableFonts", "treeBuild"):
+            success, message = createInstallableFontsObjectTree(installableFonts, __ownDataSource__)
 
         # Process: Return value is of type integer, which means we handle a request abort with HTTP code
         if not success and type(message) == int:
@@ -390,25 +1136,106 @@ def installableFonts(
     # Successful code execution until here, so we set the response value to 'success'
     installableFonts.response = "success"
 
+    # Save response for the next refresh, and return it serialized into JSON
+    if cacheKey:
+        with phaseDuration.time("installableFonts", "dumpJSON"):
+            fragment = dumpFragment(installableFonts)
+        return True, cacheInstallableFonts(root, context, cacheKey, fragment)
+
     # Return successfully, no message
     return True, None
 
 
-def installFonts(
-    root,
-    fonts,
-    subscriptionURL,
-    APIKey,
-    incomingAPIKey,
-    subscriptionID,
-    secretKey,
-    accessToken,
-    anonymousAppID,
-    anonymousTypeWorldUserID,
-    verifiedTypeWorldUserCredentials,
-    userName,
-    userEmail,
-):
+def cacheInstallableFonts(root, context, cacheKey, fragment):
+    """
+    Save `installableFonts` response, serialized into JSON as `fragment`, under `cacheKey` (if any)
+    for the next refresh, see installableFontsCache. Returns `fragment`.
+    """
+
+    if cacheKey:
+        etag = hashlib.blake2b((root.version + fragment).encode(), digest_size=16).hexdigest()
+
+        # Complete body of a refresh of this subscription, see processCommands()
+        jsonData = dumpJSON(typeworld.api.RootResponse(), {"installableFonts": fragment})
+        body = compression.PrecompressedBody(jsonData.encode(), PRECOMPRESSION_LEVELS, precompressionPool)
+
+        installableFontsCache.set(cacheKey, (etag, fragment, body))
+        context.installableFontsETag = etag
+        context.installableFontsBody = body
+
+    return fragment
+
+
+def subscriptionFamilies(compact, context):
+    """
+    Return family indices in the compact catalog `compact` (see CompactCatalog.families())
+    of the families that the request’s subscription has access to
+    """
+
+    __user__ = context.user()
+
+    # Look up families in the entitlement index first (see ENTITLEMENT_INDEX),
+    # which knows them unless the user’s catalog version has changed since it was loaded
+    entitlements = compact.entitlements
+    if entitlements:
+        families = entitlements.families(context.subscriptionID, __user__.__catalogVersion__)
+        if families is not None:
+            return families
+
+    # Ask your own data source otherwise, which is only loaded now
+    # Note: __familyIDs__() doesn’t exist in this sample code
+    families = compact.families(context.dataSource().__familyIDs__())
+
+    # And keep them for the next time
+    if entitlements:
+        entitlements.update(context.subscriptionID, __user__.__catalogVersion__, families)
+
+    return families
+
+
+def loadCompactCatalog(version):
+    """
+    Return CompactCatalog of the whole catalog with the version number `version`,
+    read from the shared catalog (see CATALOG_FILE), or from your data source
+    """
+
+    catalog = sharedCatalog.current() if sharedCatalog else None
+    if catalog:
+        __catalogSource__ = catalog.subscription(None)
+    else:
+        # Note: __catalogDataSource__() doesn’t exist in this sample code
+        __catalogSource__ = __catalogDataSource__()
+
+    installableFonts = typeworld.api.InstallableFontsResponse()
+    createInstallableFontsObjectTree(installableFonts, __catalogSource__)
+    installableFonts.response = "success"
+    compact = CompactCatalog(installableFonts, version)
+
+    # Families of all subscriptions, as `subscriptionID: (catalogVersion, familyIDs)`, see ENTITLEMENT_INDEX
+    # Note: __entitlements__() doesn’t exist in this sample code
+    if ENTITLEMENT_INDEX:
+        compact.loadEntitlements(__catalogDataSource__().__entitlements__())
+
+    return compact
+
+
+def catalogSourceVersion():
+    """
+    Return version of the catalog that loadCompactCatalog() reads, which changes whenever anything in it changes
+    """
+
+    # Version of the shared catalog, once one has been published
+    catalog = sharedCatalog.current() if sharedCatalog else None
+    if catalog:
+        return "shared", catalog.version
+
+    # Or of the catalog in your data source, for instance a counter or timestamp in your database
+    # that is increased with every change to the catalog.
+    # Note: __version__() doesn’t exist in this sample code
+    return "dataSource", __catalogDataSource__().__version__()
+
+
+def installFonts(root, context):
     """
     Process `installFonts` command
     """
@@ -418,7 +1245,7 @@ def installFonts(
     root.installFonts = installFonts
 
     # Find user
-    __user__ = __userBySubscriptionID__(subscriptionID)
+    __user__ = context.user()
 
     # User doesn't exist, return `validTypeWorldUserAccountRequired` immediately
     if __user__ == None:
@@ -426,7 +1253,7 @@ def installFonts(
         return True, None
 
     # Secret Key doesn't match with user, return `insufficientPermission` immediately
-    if secretKey != __user__.__secretKey__:
+    if context.secretKey != __user__.__secretKey__:
         installFonts.response = "insufficientPermission"
         return True, None
 
@@ -438,33 +1265,9 @@ def installFonts(
 
     # At this point, in installFonts(), the subscription’s single-use access token has already been verified earlier, so we need not process it here anymore.
 
-    # Set intial state to False
-    securityCheckPassed = False
-
-    # See if the user has already been verified
-    if verifiedTypeWorldUserCredentials != None:
-
-        # User has been successfully verified before
-        if verifiedTypeWorldUserCredentials == True:
-            securityCheckPassed = True
-
-    # Has not been verified yet, so we need to verify them now
-    else:
-        # Verify user with central type.world server now, save into global variable `verifiedTypeWorldUserCredentials`
-        verifiedTypeWorldUserCredentials = verifyUserCredentials(
-            APIKey,
-            incomingAPIKey,
-            anonymousAppID,
-            anonymousTypeWorldUserID,
-            subscriptionURL,
-        )
-
-        # User was successfully validated:
-        if verifiedTypeWorldUserCredentials == True:
-            securityCheckPassed = True
-
-    # Still didn’t pass security check, return `insufficientPermission` immediately
-    if securityCheckPassed == False:
+    # Verify user with central type.world server (unless that has already happened earlier in this request).
+    # Didn’t pass security check, return `insufficientPermission` immediately
+    if context.verifiedTypeWorldUserCredentials() != True:
         installFonts.response = "insufficientPermission"
         return True, None
 
@@ -473,20 +1276,24 @@ def installFonts(
 
     # Now we’re passed the security check and may continue ...
 
+    # Installation records are going to change
+    context.installationsChanged = True
+
     # Pull data out of your own data source
-    # Note: __subscriptionDataSource__() doesn’t exist in this sample code
-    __ownDataSource__ = __user__.__subscriptionDataSource__()
+    __ownDataSource__ = context.dataSource()
 
     # Create object tree for `installFonts` out of font data in `__ownDataSource__`
-    success, message = createInstallFontsObjectTree(
-        installFonts,
-        fonts,
-        subscriptionID,
-        anonymousAppID,
-        userName,
-        userEmail,
-        __ownDataSource__,
-    )
+    with phaseDuration.time("installFonts", "treeBuild"):
+        success, message = createInstallFontsObjectTree(
+            installFonts,
+            context.fonts,
+            context.subscriptionID,
+            context.anonymousAppID,
+            context.userName,
+            context.userEmail,
+            __ownDataSource__,
+            context.streamedAssets,
+        )
 
     # Process: Return value is of type integer, which means we handle a request abort with HTTP code
     if not success and type(message) == int:
@@ -499,19 +1306,7 @@ def installFonts(
     return True, None
 
 
-def uninstallFonts(
-    root,
-    fonts,
-    subscriptionURL,
-    APIKey,
-    incomingAPIKey,
-    subscriptionID,
-    secretKey,
-    accessToken,
-    anonymousAppID,
-    anonymousTypeWorldUserID,
-    verifiedTypeWorldUserCredentials,
-):
+def uninstallFonts(root, context):
     """
     Process `uninstallFonts` command
     """
@@ -521,7 +1316,7 @@ def uninstallFonts(
     root.uninstallFonts = uninstallFonts
 
     # Find user
-    __user__ = __userBySubscriptionID__(subscriptionID)
+    __user__ = context.user()
 
     # User doesn't exist, return `validTypeWorldUserAccountRequired` immediately
     if __user__ == None:
@@ -529,43 +1324,19 @@ def uninstallFonts(
         return True, None
 
     # Secret Key doesn't match with user, return `insufficientPermission` immediately
-    if secretKey != __user__.__secretKey__:
+    if context.secretKey != __user__.__secretKey__:
         uninstallFonts.response = "insufficientPermission"
         return True, None
 
     ##################################################################
     # Beginning of SECURITY CHECK
 
-    # At this point, in installFonts(), the subscription’s single-use access token has already been verified earlier, so we need not process it here anymore.
-
-    # Set intial state to False
-    securityCheckPassed = False
-
-    # See if the user has already been verified
-    if verifiedTypeWorldUserCredentials != None:
-
-        # User has been successfully verified before
-        if verifiedTypeWorldUserCredentials == True:
-            securityCheckPassed = True
-
-    # Has not been verified yet, so we need to verify them now
-    else:
-        # Verify user with central type.world server now, save into global variable `verifiedTypeWorldUserCredentials`
-        verifiedTypeWorldUserCredentials = verifyUserCredentials(
-            APIKey,
-            incomingAPIKey,
-            anonymousAppID,
-            anonymousTypeWorldUserID,
-            subscriptionURL,
-        )
-
-        # User was successfully validated:
-        if verifiedTypeWorldUserCredentials == True:
-            securityCheckPassed = True
+    # At this point, in uninstallFonts(), the subscription’s single-use access token has already been verified earlier, so we need not process it here anymore.
 
-    # Still didn’t pass security check, return `insufficientPermission` immediately
-    if securityCheckPassed == False:
-        installableFonts.response = "insufficientPermission"
+    # Verify user with central type.world server (unless that has already happened earlier in this request).
+    # Didn’t pass security check, return `insufficientPermission` immediately
+    if context.verifiedTypeWorldUserCredentials() != True:
+        uninstallFonts.response = "insufficientPermission"
         return True, None
 
     # End of SECURITY CHECK
@@ -573,14 +1344,23 @@ def uninstallFonts(
 
     # Now we’re passed the security check and may continue ...
 
+    # Installation records are going to change
+    context.installationsChanged = True
+
     # Pull data out of your own data source
-    # Note: __subscriptionDataSource__() doesn’t exist in this sample code
-    __ownDataSource__ = __user__.__subscriptionDataSource__()
+    __ownDataSource__ = context.dataSource()
 
     # Create object tree for `uninstallFonts` out of font data in `__ownDataSource__`
-    success, message = createUninstallFontsObjectTree(
-        installFonts, fonts, subscriptionID, anonymousAppID, __ownDataSource__
-    )
+    with phaseDuration.time("uninstallFonts", "treeBuild"):
+        success, message = createUninstallFontsObjectTree(
+            uninstallFonts,
+            context.fonts,
+            context.subscriptionID,
+            context.anonymousAppID,
+            context.userName,
+            context.userEmail,
+            __ownDataSource__,
+        )
 
     # Process: Return value is of type integer, which means we handle a request abort with HTTP code
     if not success and type(message) == int:
@@ -628,8 +1408,8 @@ def createInstallableFontsObjectTree(installableFonts, __ownDataSource__):
         installableFonts.foundries.append(foundry)
 
         # Apply data
-        designer.keyword = __foundryDataSource__.__keyword__
-        designer.name.en = __foundryDataSource__.__name__
+        foundry.uniqueID = __foundryDataSource__.__uniqueID__
+        foundry.name.en = __foundryDataSource__.__name__
         # etc ...
 
         # License Definitions
@@ -644,7 +1424,7 @@ def createInstallableFontsObjectTree(installableFonts, __ownDataSource__):
             # etc ...
 
         # Families
-        for __familyDataSource__ in __foundryDataSource__.licenses():
+        for __familyDataSource__ in __foundryDataSource__.families():
 
             # Create Family object, attach to `foundry`
             family = typeworld.api.Family()
@@ -690,9 +1470,13 @@ def createInstallFontsObjectTree(
     userName,
     userEmail,
     __ownDataSource__,
+    streamedAssets=None,
 ):
     """
-    Apply incoming data of `__ownDataSource__` to `installFonts`
+    Apply incoming data of `__ownDataSource__` to `installFonts`.
+
+    If `streamedAssets` is given, the font data is not encoded here, but registered with it
+    to be streamed out later.
     """
 
     # Parse fonts into list
@@ -700,30 +1484,48 @@ def createInstallFontsObjectTree(
     # "font1ID/font1Version,font2ID/font2Version" becomes [['font1ID', 'font1Version'], ['font2ID', 'font2Version']]
     fontsList = [x.split("/") for x in fonts.split(",")]
 
+    # Load own data sources of all requested fonts at once, as a dictionary of `fontID: __fontDataSource__`.
+    # Unknown fonts are missing from the dictionary.
+    # Note: __fontDataSources__() doesn’t exist in this sample code
+    __fontDataSources__ = __ownDataSource__.__fontDataSources__([fontID for fontID, fontVersion in fontsList])
+
+    # In case your server observes license compliance, it needs to track
+    # font installations. These are identified by the tripled
+    # `subscriptionID, anonymousAppID, fontID`.
+
+    # Load the recorded installations of all fonts of this subscription on this app instance at once,
+    # as a dictionary of `fontID: seats`. Fonts without any installation record are missing from the dictionary.
+    recordedSeats = recordedFontInstallationsForApp(__ownDataSource__, subscriptionID, anonymousAppID)
+
+    # Changes to the installation records are collected here and saved all at once at the end
+    changes = FontInstallationChanges(subscriptionID, anonymousAppID)
+
+    # Successful assets as `(asset, __fontDataSource__)`, whose font data is applied after the loop, see prepareFontAssets()
+    preparations = []
+
     # Loop over incoming fonts list
     for fontID, fontVersion in fontsList:
 
-        # Load own data source
-        __fontDataSource__ = __ownDataSource__.__fontDataSource__(fontID)
+        # Find own data source
+        __fontDataSource__ = __fontDataSources__.get(fontID)
 
         # Create InstallFontAsset object, attach to `installFonts.assets`
         asset = typeworld.api.InstallFontAsset()
         installFonts.assets.append(asset)
+        asset.uniqueID = fontID
 
         # Couldn't find data source by ID, return `unknownFont`
         if __fontDataSource__ == None:
             asset.response = "unknownFont"
-
-        # In case your server observes license compliance, it needs to track
-        # font installations. These are identified by the tripled
-        # `subscriptionID, anonymousAppID, fontID`.
+            continue
 
         # See whether user’s seat allowance has been reached for this font
-        seats = __ownDataSource__.__recordedFontInstallations__(subscriptionID, anonymousAppID, fontID)
+        seats = recordedSeats.get(fontID)
 
         # Installed seats have reached seat allowance, return `seatAllowanceReached`
-        if seats >= __fontDataSource__.__licenseDataSource__.__allowedSeats__:
+        if seats != None and seats >= __fontDataSource__.__licenseDataSource__.__allowedSeats__:
             asset.response = "seatAllowanceReached"
+            continue
 
         # All go, let’s serve the font
 
@@ -732,15 +1534,15 @@ def createInstallFontsObjectTree(
         asset.uniqueID = __fontDataSource__.__uniqueID__
         asset.encoding = "base64"
         asset.mimeType = "font/otf"
-        asset.data = base64.b64encode(__fontDataSource__.__binaryFontData__).decode()
         asset.version = __fontDataSource__.__version__
+        preparations.append((asset, __fontDataSource__))
 
         # Font is not a free font
         if __fontDataSource__.__protected__:
 
             # Finally, let’s record this installation in the database, to count seats for each font per license
-            # This call is related to `__fontDataSource__.__recordedFontInstallations__(fontID, subscriptionID, anonymousAppID)` from above where
-            # number of previously installed seats is checked, which is a result of this following recording.
+            # This is related to `recordedSeats` from above where number of previously installed seats is checked,
+            # which is a result of this following recording.
             # The parameters `fontVersion`, `userName`, and `userEmail` are not strictly necessary for this recording, but you may
             # want to save them into your database for analysis.
 
@@ -749,39 +1551,78 @@ def createInstallFontsObjectTree(
 
                 # Font has not been previously installed, so no record exists:
                 if seats == None:
-                    __ownDataSource__.__recordFontInstallation__(
-                        subscriptionID,
-                        anonymousAppID,
-                        fontID,
-                        fontVersion,  # Not to be used for installation identification
-                        userName,  # Not to be used for installation identification
-                        userEmail,  # Not to be used for installation identification
-                    )
+                    changes.record(fontID, fontVersion, userName, userEmail)
 
                 # Font has been previously installed (so a record exists), but is marked as 'uninstalled', so we update that
                 else:
-                    __ownDataSource__.__updateFontInstallation__(
-                        subscriptionID,
-                        anonymousAppID,
-                        fontID,
-                        trialInstalledStatus=True,
-                    )
+                    changes.update(fontID, trialInstalledStatus=True)
 
             # Font is not a trial font, so just record installation normally
             else:
-                __ownDataSource__.__recordFontInstallation__(
-                    subscriptionID,
-                    anonymousAppID,
-                    fontID,
-                    fontVersion,  # Not to be used for installation identification
-                    userName,  # Not to be used for installation identification
-                    userEmail,  # Not to be used for installation identification
-                )
+                changes.record(fontID, fontVersion, userName, userEmail)
+
+    # Apply font data to all successful assets
+    prepareFontAssets(preparations, subscriptionID, streamedAssets)
+
+    # Save all changes to the installation records in one transaction
+    if changes and not commitFontInstallationChanges(__ownDataSource__, changes):
+        return False, 503
 
     # Return successfully, no message
     return True, None
 
 
+def prepareFontAssets(preparations, subscriptionID, streamedAssets=None):
+    """
+    Apply font data to the assets of `preparations`, given as `(asset, __fontDataSource__)`.
+
+    With several fonts, they are prepared on `assetPreparationPool`, at most ASSET_PREPARATION_CONCURRENCY at a time.
+    Streamed font data is only read while the response is being sent, so there is nothing to do at once here.
+    """
+
+    if streamedAssets is not None or not assetPreparationPool or len(preparations) < 2:
+        for asset, __fontDataSource__ in preparations:
+            prepareFontAsset(asset, __fontDataSource__, subscriptionID, streamedAssets)
+        return
+
+    # Start the next font whenever one of the earlier ones is done
+    futures = collections.deque()
+    try:
+        for asset, __fontDataSource__ in preparations:
+            if len(futures) >= ASSET_PREPARATION_CONCURRENCY:
+                futures.popleft().result()
+            futures.append(assetPreparationPool.submit(prepareFontAsset, asset, __fontDataSource__, subscriptionID))
+        while futures:
+            futures.popleft().result()
+
+    # Don’t start any more fonts when one of them has failed
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def prepareFontAsset(asset, __fontDataSource__, subscriptionID, streamedAssets=None):
+    """
+    Apply font data of `__fontDataSource__` to `asset`
+    """
+
+    # Font is downloaded from a link instead, so make sure that its file is ready
+    if fontDownloadLinks:
+        fontFileStore.ensure(__fontDataSource__)
+        asset.dataURL = fontDownloadLinks.url(subscriptionID, __fontDataSource__.__uniqueID__, __fontDataSource__.__version__)
+
+    # Font data is being streamed, so put a placeholder in place of the data for now
+    elif streamedAssets is not None:
+        asset.data = streamedAssets.add(__fontDataSource__)
+
+    # Font data has been encoded before, so read it from the font asset store
+    elif fontAssetStore:
+        asset.data = fontAssetStore.get(__fontDataSource__)
+
+    else:
+        asset.data = base64.b64encode(__fontDataSource__.__binaryFontData__).decode()
+
+
 def createUninstallFontsObjectTree(
     uninstallFonts,
     fonts,
@@ -800,22 +1641,33 @@ def createUninstallFontsObjectTree(
     # "font1ID,font2ID" becomes ['font1ID', 'font2ID']
     fontsList = fonts.split(",")
 
+    # Load own data sources of all requested fonts at once, see createInstallFontsObjectTree()
+    __fontDataSources__ = __ownDataSource__.__fontDataSources__(fontsList)
+
+    # Load the recorded installations of all fonts of this subscription on this app instance at once
+    recordedSeats = recordedFontInstallationsForApp(__ownDataSource__, subscriptionID, anonymousAppID)
+
+    # Changes to the installation records are collected here and saved all at once at the end
+    changes = FontInstallationChanges(subscriptionID, anonymousAppID)
+
     # Loop over incoming fonts list
     for fontID in fontsList:
 
-        # Load own data source
-        __fontDataSource__ = __ownDataSource__.__fontDataSource__(fontID)
+        # Find own data source
+        __fontDataSource__ = __fontDataSources__.get(fontID)
 
         # Create UninstallFontAsset object, attach to `uninstallFonts.assets`
         asset = typeworld.api.UninstallFontAsset()
         uninstallFonts.assets.append(asset)
+        asset.uniqueID = fontID
 
-        # Couldn't find data source by ID, set response, return immediately
+        # Couldn't find data source by ID, set response, continue with next font
         if __fontDataSource__ == None:
             asset.response = "unknownFont"
+            continue
 
         # See how many seats the user has installed
-        seats = __ownDataSource__.__recordedFontInstallations__(fontID, subscriptionID, anonymousAppID)
+        seats = recordedSeats.get(fontID)
 
         # No seats have been recorded for this `anonymousAppID`, so we return the `unknownInstallation` command
         # Note: This is critical for the remote de-authorization for entire app instances to work properly,
@@ -823,6 +1675,7 @@ def createUninstallFontsObjectTree(
         # See: https://type.world/developer#remote-de-authorization-of-app-instances-by-the-user
         if seats == None:
             asset.response = "unknownInstallation"
+            continue
 
         # All go, let’s delete the font
         asset.response = "success"
@@ -835,18 +1688,189 @@ def createUninstallFontsObjectTree(
             # Font is a trial font, so instead of deleting this font installation from our records, we’ll just update it, marked as not installed,
             # because if you delete it instead, you effectively reset the the user’s trial period of that font.
             if __fontDataSource__.__isTrialFont__:
-                __ownDataSource__.__updateFontInstallation__(
-                    fontID, subscriptionID, anonymousAppID, trialInstalledStatus=False
-                )
+                changes.update(fontID, trialInstalledStatus=False)
 
             # Font is not a trial font, so just delete the installation record normally
             else:
-                __ownDataSource__.__deleteFontInstallationRecord__(fontID, subscriptionID, anonymousAppID)
+                changes.delete(fontID)
+
+    # Save all changes to the installation records in one transaction
+    if changes and not commitFontInstallationChanges(__ownDataSource__, changes):
+        return False, 503
 
     # Return successfully, no message
     return True, None
 
 
+class FontInstallationChanges(object):
+    """
+    Changes to the font installation records of one subscription on one app instance,
+    collected while building the `installFonts` and `uninstallFonts` commands
+    and handed over to the data source all at once.
+
+    Your data source’s __commitFontInstallationChanges__() needs to apply all of them in one transaction.
+    Each change in `changes` is a tuple of `(action, fontID, details)`, with `action` being one of:
+    - "record": Record a new installation. `details` holds `fontVersion`, `userName`, and `userEmail`,
+      which are not to be used for installation identification, but you may want to save them for analysis.
+    - "update": Update an existing installation record. `details` holds `trialInstalledStatus`.
+    - "delete": Delete an existing installation record. `details` is empty.
+    """
+
+    def __init__(self, subscriptionID, anonymousAppID):
+        self.subscriptionID = subscriptionID
+        self.anonymousAppID = anonymousAppID
+        self.changes = []
+
+    def record(self, fontID, fontVersion, userName, userEmail):
+        self.changes.append(
+            ("record", fontID, {"fontVersion": fontVersion, "userName": userName, "userEmail": userEmail})
+        )
+
+    def update(self, fontID, trialInstalledStatus):
+        self.changes.append(("update", fontID, {"trialInstalledStatus": trialInstalledStatus}))
+
+    def delete(self, fontID):
+        self.changes.append(("delete", fontID, {}))
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def __len__(self):
+        return len(self.changes)
+
+
+def fontDownload(token, environ):
+    """
+    Return response with the font file of a download link handed out in `installFonts`, see FONT_DOWNLOAD_URL.
+    `token` is the last part of the link, and `environ` the WSGI environment of the request.
+    """
+
+    # Key of the client for handleAbort(), see admitClient()
+    clients = [("address", environ.get("REMOTE_ADDR"))]
+
+    link = fontDownloadLinks.verify(token) if fontDownloadLinks else None
+
+    # Link is unknown, forged, or has expired
+    if not link:
+        return handleAbort(404, clients)
+
+    subscriptionID, fontID, version, expires = link
+
+    # The file may have been removed from the store since the link was handed out, so store it again
+    path = fontFileStore.find(fontID, version) or storeFontFile(subscriptionID, fontID, version)
+    if path is None:
+        return handleAbort(404, clients)
+
+    # Served through the WSGI server’s file wrapper, which sends the file with sendfile() where available,
+    # and with `Range`, `If-None-Match` and `If-Modified-Since` taken care of
+    try:
+        response = sendFontFile(path, fontID, environ)
+
+    # The file has been removed from the store just now, by another request or worker process, so store it again
+    except FileNotFoundError:
+        path = storeFontFile(subscriptionID, fontID, version, again=True)
+        if path is None:
+            return handleAbort(404, clients)
+        try:
+            response = sendFontFile(path, fontID, environ)
+        except FileNotFoundError:
+            return handleAbort(404, clients)
+
+    # The file behind a link never changes, so it may be kept for as long as the link is valid
+    response.cache_control.no_cache = None
+    response.cache_control.private = True
+    response.cache_control.max_age = max(0, int(expires - time.time()))
+
+    return response
+
+
+def storeFontFile(subscriptionID, fontID, version, again=False):
+    """
+    Store font file of a download link in `fontFileStore` (unless already stored, or in any case with `again`)
+    and return its path, or None if the subscription has no access to this version of the font (anymore)
+    """
+
+    __user__ = __userBySubscriptionID__(subscriptionID)
+    __fontDataSource__ = __user__.__subscriptionDataSource__().__fontDataSource__(fontID) if __user__ != None else None
+    if __fontDataSource__ == None or __fontDataSource__.__version__ != version:
+        return None
+
+    return fontFileStore.path(__fontDataSource__, again)
+
+
+def sendFontFile(path, fontID, environ):
+    """
+    Return response sending the font file at `path`. Raises FileNotFoundError if it has been removed.
+    """
+
+    return send_file(
+        path,
+        environ,
+        mimetype="font/otf",
+        download_name=f"{fontID}.otf",
+        conditional=True,
+        etag=os.path.splitext(os.path.basename(path))[0],
+    )
+
+
+def recordedFontInstallationsForApp(__ownDataSource__, subscriptionID, anonymousAppID):
+    """
+    Return recorded installations of all fonts of a subscription on an app instance as a dictionary of `fontID: seats`,
+    including changes that are still waiting in `installationJournal`
+    """
+
+    # Look at the journal first, so that changes being saved in the meantime are counted twice rather than not at all
+    pending = installationJournal.pending(subscriptionID, anonymousAppID) if installationJournal else []
+
+    # Note: __recordedFontInstallationsForApp__() doesn’t exist in this sample code
+    recordedSeats = __ownDataSource__.__recordedFontInstallationsForApp__(subscriptionID, anonymousAppID)
+
+    if pending:
+        recordedSeats = dict(recordedSeats)
+        for action, fontID, details in pending:
+            if action == "record":
+                recordedSeats[fontID] = recordedSeats.get(fontID, 0) + 1
+            elif action == "delete":
+                recordedSeats.pop(fontID, None)
+
+    return recordedSeats
+
+
+def commitFontInstallationChanges(__ownDataSource__, changes):
+    """
+    Save `changes` to your own data source, or to `installationJournal` to be saved later.
+    Returns False if the journal is too full to take them.
+    """
+
+    if installationJournal:
+        try:
+            installationJournal.append(changes.subscriptionID, changes.anonymousAppID, changes.changes)
+        except JournalFull:
+            app.logger.error("Installation journal is full, changes to installation records are refused")
+            return False
+        return True
+
+    # Note: __commitFontInstallationChanges__() doesn’t exist in this sample code
+    __ownDataSource__.__commitFontInstallationChanges__(changes)
+    return True
+
+
+def flushFontInstallationChanges(subscriptionID, anonymousAppID, changesList):
+    """
+    Save changes from `installationJournal` to your own data source, called from its background thread
+    """
+
+    __user__ = __userBySubscriptionID__(subscriptionID)
+
+    # Subscription has been deleted in the meantime
+    if __user__ == None:
+        return
+
+    changes = FontInstallationChanges(subscriptionID, anonymousAppID)
+    changes.changes = [tuple(change) for change in changesList]
+    __user__.__subscriptionDataSource__().__commitFontInstallationChanges__(changes)
+
+
 def verifyUserCredentials(
     APIKey,
     incomingAPIKey,
@@ -864,7 +1888,35 @@ def verifyUserCredentials(
     if APIKey == incomingAPIKey:
         return True
 
-    # Otherwise, send the normal verification request to the central server
+    # See if we’ve verified this user for this subscription recently
+    cacheKey = (anonymousAppID, anonymousTypeWorldUserID, subscriptionURL)
+    verified = credentialsCache.get(cacheKey)
+    if verified is not None:
+        return verified
+
+    # Otherwise, send the normal verification request to the central server.
+    # If the same verification is already under way for another request, we wait for its result instead.
+    # A result that another process got from the central server is saved into our own cache, too.
+    try:
+        verified, ttl = verificationFlights.do(
+            cacheKey,
+            lambda: requestUserVerification(APIKey, anonymousAppID, anonymousTypeWorldUserID, subscriptionURL),
+            adopt=lambda result: cacheUserVerification(cacheKey, *result),
+        )
+        return verified
+
+    # Central server is slow or down, so follow the configured policy.
+    # The result is not cached, so that we ask the central server again once it’s back.
+    except CentralServerUnavailable:
+        return CENTRAL_SERVER_UNAVAILABLE_POLICY == "allow"
+
+
+def requestUserVerification(APIKey, anonymousAppID, anonymousTypeWorldUserID, subscriptionURL=None):
+    """
+    Send user verification request to the central server, save result into `credentialsCache`.
+    Returns `verified, ttl`, with `ttl` being the number of seconds the result is cached for, or None if it isn’t.
+    Raises CentralServerUnavailable if the central server can’t be reached.
+    """
 
     # Default parameters
     parameters = {
@@ -877,13 +1929,13 @@ def verifyUserCredentials(
     if subscriptionURL:
         parameters["subscriptionURL"] = subscriptionURL
 
-    # We’re using typeworld’s built-in request() method here which loops through a request up to 10 times
-    # in case an instance of the central server disappears during the request.
+    cacheKey = (anonymousAppID, anonymousTypeWorldUserID, subscriptionURL)
+
+    # We’re using the shared `centralServer` client here which loops through a request several times
+    # in case an instance of the central server disappears during the request, much like typeworld’s built-in request() method.
     # See the WARNING at https://type.world/developer#typeworld-api
     # If you’re implementing this in a language other than Python, make sure to read and follow that warning.
-    success, response, responseObject = typeworld.client.request(
-        "https://api.type.world/v1/verifyCredentials", parameters
-    )
+    success, response, responseObject = centralServer.request(VERIFY_CREDENTIALS_URL, parameters)
 
     # Request was successfully returned
     # Note: This means that the HTTP request was successful, not that the user has been verified. This will be confirmed a few lines down.
@@ -895,27 +1947,133 @@ def verifyUserCredentials(
         # Verfification process was successful
         if responseData["response"] == "success":
 
-            # Return True immediately
-            return True
+            # Save into cache and return True immediately
+            return cacheUserVerification(cacheKey, True, CREDENTIALS_CACHE_POSITIVE_TTL)
+
+        # The central server has answered, but didn’t verify the user.
+        # Save the negative result, too, so that repeated requests of an unauthorized user
+        # don’t all end up at the central server.
+        # Failed HTTP requests, on the other hand, are not cached, so that we try again next time.
+        return cacheUserVerification(cacheKey, False, CREDENTIALS_CACHE_NEGATIVE_TTL)
 
     # No previous success, so let’s return False
-    return False
+    return False, None
+
+
+def cacheUserVerification(cacheKey, verified, ttl):
+    """
+    Save result of a user verification into `credentialsCache` for `ttl` seconds (unless `ttl` is None)
+    and return `verified, ttl`
+    """
+
+    if ttl is not None:
+        credentialsCache.set(cacheKey, verified, ttl=ttl)
+
+    return verified, ttl
+
+
+def invalidateUserCredentials(anonymousTypeWorldUserID=None, anonymousAppID=None, subscriptionURL=None):
+    """
+    Remove cached results of verifyUserCredentials(), for instance when a user’s access has been revoked.
+    All given parameters need to match, so calling it with only `anonymousTypeWorldUserID`
+    removes all cached verifications of that user across all app instances and subscriptions.
+    Returns the number of removed cache entries.
+    """
+
+    def matches(key):
+        cachedAnonymousAppID, cachedAnonymousTypeWorldUserID, cachedSubscriptionURL = key
+        return (
+            (anonymousTypeWorldUserID is None or cachedAnonymousTypeWorldUserID == anonymousTypeWorldUserID)
+            and (anonymousAppID is None or cachedAnonymousAppID == anonymousAppID)
+            and (subscriptionURL is None or cachedSubscriptionURL == subscriptionURL)
+        )
+
+    return credentialsCache.invalidateWhere(matches)
 
 
-def handleAbort(code):
+def admitClient(client):
+    """
+    Return True if `client` may send another request, see RATE_LIMIT.
+    `client` is a key such as `("address", remoteAddress)` or `("app", anonymousAppID)`.
+    """
+
+    if not RATE_LIMIT:
+        return True
+
+    rate, burst = clientRateLimit(client)
+    return rateLimiter.allow(client, rate, burst)
+
+
+def clientRateLimit(client):
+    """
+    Return `(requests per second, burst)` that apply to `client`, see RATE_LIMIT
+    """
+
+    return RATE_LIMIT_APP if client[0] == "app" else RATE_LIMIT_ADDRESS
+
+
+def handleAbort(code, clients=()):
     """
     You can use this method to handle all malformed requests.
     Depending on what kind of security shields you have in place, you could keep informing them
     about malformed requests so that eventually a DOS attack shield could kick in, for instance.
+
+    `clients` holds the keys of the client that sent the request, see admitClient().
     """
 
     # Handle malformed request here
-    # ...
+    # Clients that keep sending malformed requests are blocked for a while, see RATE_LIMIT.
+    # Only by their IP address: the `anonymousAppID` is whatever the request says it is, so counting strikes
+    # against it would let anyone get another user’s app blocked.
+    if RATE_LIMIT and code in BLOCK_CODES:
+        for client in clients:
+            if client[0] == "address":
+                rateLimiter.strike(client, clientRateLimit(client)[1])
+
+    # Count for metrics
+    aborts.inc(code)
 
     # Return flask’s abort() method with HTTP status code
     return abort(code)
 
 
+# Use the reference data source instead of your own, see SQLITE_DATABASE
+if database:
+    __userBySubscriptionID__ = database.user
+    __allFontDataSources__ = database.allFonts
+    __catalogDataSource__ = database.catalog
+
+
+def warmUp():
+    """
+    Prepare everything that is the same for all requests, so that the first requests don’t have to.
+    Called when app.py is loaded, which server.py does before forking its worker processes,
+    so that they all share the prepared data instead of each preparing their own.
+    """
+
+    # Build responses that are the same for every request
+    endpointFragment()
+
+    # Prepare the fast serializer for all object classes
+    serializer.prepare()
+
+    # Save changes to installation records left behind in the journal by the last run
+    if installationJournal:
+        installationJournal.recover()
+
+    # Map the shared catalog, so that the worker processes inherit it
+    if sharedCatalog:
+        sharedCatalog.current()
+
+    # Load the compact catalog, so that the worker processes inherit it
+    if catalogLoader:
+        catalogLoader.refresh()
+
+
+warmUp()
+
+
 # Run this web server locally under https://0.0.0.0:8080/
+# This is Flask’s development server. For production, use server.py
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8080, debug=False)
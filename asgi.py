@@ -0,0 +1,247 @@
+"""
+ASGI variant of the API Endpoint
+
+Serves the same `/api` endpoint as the Flask view api() in app.py, but under an ASGI server
+such as uvicorn or hypercorn, where a single process can hold thousands of concurrent requests:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8080
+
+Finding the user, verifying the user with the central type.world server and processing the commands
+are blocking calls (your database driver and `typeworld.client` are not asynchronous), so they run in a
+thread pool and are awaited here, while the event loop stays free to accept other requests.
+The Flask WSGI application `app.app` remains available unchanged.
+"""
+
+# Import third party modules
+import asyncio
+import concurrent.futures
+from urllib.parse import parse_qsl
+
+# Import werkzeug, which comes with Flask
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException, InternalServerError
+from werkzeug.http import parse_etags
+
+# Import own modules
+from app import (
+    app,
+    RequestContext,
+    processCommands,
+    handleAbort,
+    admitClient,
+    fontDownload,
+    metricsEndpoint,
+    requestDuration,
+    httpResponses,
+)
+
+# Number of threads for blocking calls
+# This limits how many requests can wait for the data source or the central type.world server at the same time
+THREADS = 64
+
+# Maximum size of an incoming request body in bytes
+MAX_BODY_SIZE = 1024 * 1024
+
+executor = concurrent.futures.ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix="api")
+
+# Commands that deal with a subscription and need the user
+SUBSCRIPTION_COMMANDS = {"installableFonts", "installFonts", "uninstallFonts"}
+
+
+async def application(scope, receive, send):
+    """
+    ASGI application
+    """
+
+    # Server startup and shutdown
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    try:
+        # Metrics, see app.metricsRegistry
+        if scope["path"] == "/metrics" and scope["method"] == "GET":
+            await sendResponse(send, metricsEndpoint())
+            return
+
+        # Font downloads, see app.FONT_DOWNLOAD_URL
+        if scope["path"].startswith("/download/") and scope["method"] in ("GET", "HEAD"):
+            await sendResponse(send, await runBlocking(fontDownload, scope["path"][len("/download/") :], environ(scope)))
+            return
+
+        if scope["path"] != "/api":
+            handleAbort(404)
+
+        # As with the Flask view, only POST requests are allowed
+        if scope["method"] != "POST":
+            handleAbort(405)
+
+        with requestDuration.time():
+            response = await api(scope, receive)
+        httpResponses.inc(response.status_code)
+
+    # Malformed request, see handleAbort()
+    except HTTPException as e:
+        response = e.get_response()
+
+    except Exception:
+        app.logger.exception("Exception on %s [%s]", scope["path"], scope["method"])
+        response = InternalServerError().get_response()
+
+    await sendResponse(send, response)
+
+
+async def api(scope, receive):
+    """
+    Asynchronous variant of app.api()
+    """
+
+    # Admission Control, see app.api()
+    clients = [("address", (scope.get("client") or (None,))[0])]
+    if not admitClient(clients[0]):
+        handleAbort(429, clients)
+
+    # Read incoming data
+    body = await readBody(receive)
+    headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+
+    # Parameters may come in the URL’s query string and in the form-encoded body, just like Flask’s `request.values`
+    values = MultiDict(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+    if headers.get("content-type", "").startswith("application/x-www-form-urlencoded"):
+        for key, value in parse_qsl(body.decode("utf-8"), keep_blank_values=True):
+            values.add(key, value)
+
+    if values.get("anonymousAppID"):
+        clients.append(("app", values.get("anonymousAppID")))
+        if not admitClient(clients[1]):
+            handleAbort(429, clients)
+
+    # API Commands (required), see app.api()
+    commands = values.get("commands")
+    if not commands:
+        handleAbort(404, clients)
+    commandsList = commands.split(",")
+
+    # Request Context
+    context = RequestContext(values, clients)
+
+    # Resolve the user and the user verification without blocking the event loop
+    await resolveContext(context, commandsList)
+
+    # Process the commands in the thread pool, as they may still need to load the data source
+    return await runBlocking(
+        processCommands, commandsList, context, parse_etags(headers.get("if-none-match")), headers.get("accept-encoding")
+    )
+
+
+async def resolveContext(context, commandsList):
+    """
+    Look up everything in `context` that the commands will need, in the same order as the commands would
+    """
+
+    # Only commands that deal with a subscription need the user
+    if not context.subscriptionID or not SUBSCRIPTION_COMMANDS.intersection(commandsList):
+        return
+
+    # Find user
+    # For metrics, the time spent here is attributed to the first command that needs it
+    context.command = next(command for command in commandsList if command in SUBSCRIPTION_COMMANDS)
+    __user__ = await runBlocking(context.user)
+
+    # User doesn't exist, or secret key doesn't match with user. The commands will respond accordingly.
+    if __user__ == None or context.secretKey != __user__.__secretKey__:
+        return
+
+    # A request with a valid access token may not need the verification, see app.installableFonts()
+    if commandsList == ["installableFonts"] and await runBlocking(context.validAccessToken):
+        pass
+
+    # Verify user with central type.world server
+    elif await runBlocking(context.verifiedTypeWorldUserCredentials) != True:
+        return
+
+    # The data source is not loaded here: processCommands() runs in the thread pool anyway and
+    # loads it only if the response can't be served from the caches, the catalog or the entitlement index
+
+
+async def runBlocking(function, *arguments):
+    """
+    Run blocking `function` in the thread pool and wait for its result
+    """
+
+    return await asyncio.get_running_loop().run_in_executor(executor, function, *arguments)
+
+
+def environ(scope):
+    """
+    Return a minimal WSGI environment of the request in `scope`, as far as werkzeug needs it to answer
+    partial and conditional requests. There is no `wsgi.file_wrapper` here, so files are sent in chunks.
+    """
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "REMOTE_ADDR": (scope.get("client") or (None,))[0],
+    }
+    for key, value in scope["headers"]:
+        environ["HTTP_" + key.decode("latin-1").upper().replace("-", "_")] = value.decode("latin-1")
+
+    return environ
+
+
+async def readBody(receive):
+    """
+    Return the complete request body
+    """
+
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_SIZE:
+            handleAbort(413)
+        if not message.get("more_body"):
+            return body
+
+
+async def sendResponse(send, response):
+    """
+    Send out a `werkzeug` response object
+    """
+
+    await send(
+        {
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [
+                (key.lower().encode("latin-1"), value.encode("latin-1"))
+                for key, value in response.headers.to_wsgi_list()
+            ],
+        }
+    )
+
+    # Streamed responses read font data while they are being sent, so read each chunk in the thread pool
+    if response.is_streamed:
+        iterator = response.iter_encoded()
+        try:
+            while True:
+                chunk = await runBlocking(next, iterator, None)
+                if chunk is None:
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            # Closes files being sent, see app.fontDownload()
+            response.close()
+        await send({"type": "http.response.body", "body": b""})
+
+    else:
+        await send({"type": "http.response.body", "body": response.get_data()})
+
@@ -0,0 +1,609 @@
+"""
+Load benchmark of the API Endpoint
+
+Starts `app` in a separate process with an in-memory fixture data source in place of your own data source,
+and a local stand-in for the central server’s verifyCredentials call with a configurable latency,
+then sends it realistic mixes of requests from a number of concurrent clients:
+
+- refresh:   `installableFonts` alone, the app’s periodic refresh of a subscription
+- install:   `installableFonts,installFonts` with `--fonts` fonts
+- uninstall: `uninstallFonts` with `--fonts` fonts
+- mixed:     80% refresh, 15% install, 5% uninstall
+
+Each scenario runs against a freshly started server process, which reports its own peak RSS.
+The results can be saved as JSON and compared to the results of an earlier run:
+
+    python benchmark.py --output before.json
+    (make your changes)
+    python benchmark.py --output after.json --compare before.json
+
+Module-level settings of app.py can be changed with `--set`, for instance `--set INSTALLFONTS_STREAMING=True`.
+This only works for settings that are read while processing a request, not for those that objects
+are created from at import time (such as INSTALLABLEFONTS_CACHE_SIZE).
+"""
+
+# Import third party modules
+import argparse
+import ast
+import datetime
+import http.server
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Import requests, which comes with typeworld
+import requests
+
+SCENARIOS = ("refresh", "install", "uninstall", "mixed")
+
+# Share of each request type in the `mixed` scenario
+MIX = (("refresh", 0.80), ("install", 0.15), ("uninstall", 0.05))
+
+SECRET_KEY = "secretKey"
+
+
+##################################################################
+# Fixture data source
+# An in-memory catalog with the same interface as __ownDataSource__ in app.py.
+# All subscriptions see the same catalog, and installation records are kept in a dictionary.
+
+
+class FixtureLicense(object):
+    def __init__(self, keyword, allowedSeats):
+        self.__keyword__ = keyword
+        self.__allowedSeats__ = allowedSeats
+
+
+class FixtureVersion(object):
+    def __init__(self, versionNumber):
+        self.__versionNumber__ = versionNumber
+
+
+class FixtureFont(object):
+    def __init__(self, uniqueID, version, binaryFontData, license):
+        self.__uniqueID__ = uniqueID
+        self.__version__ = version
+        self.__protected__ = True
+        self.__isTrialFont__ = False
+        self.__binaryFontData__ = binaryFontData
+        self.__licenseDataSource__ = license
+
+
+class FixtureFamily(object):
+    def __init__(self, uniqueID, versions, fonts):
+        self.__uniqueID__ = uniqueID
+        self._versions = versions
+        self._fonts = fonts
+
+    def __versions__(self):
+        return self._versions
+
+    def __fonts__(self):
+        return self._fonts
+
+
+class FixtureDesigner(object):
+    def __init__(self, keyword, name):
+        self.__keyword__ = keyword
+        self.__name__ = name
+
+
+class FixtureFoundry(object):
+    def __init__(self, uniqueID, name, licenses, families):
+        self.__uniqueID__ = uniqueID
+        self.__name__ = name
+        self._licenses = licenses
+        self._families = families
+
+    def licenses(self):
+        return self._licenses
+
+    def families(self):
+        return self._families
+
+
+class FixtureDataSource(object):
+    def __init__(self, designers, foundries):
+        self._designers = designers
+        self._foundries = foundries
+        self.fonts = {
+            font.__uniqueID__: font
+            for foundry in foundries
+            for family in foundry.families()
+            for font in family.__fonts__()
+        }
+
+        # Installation records as `(subscriptionID, anonymousAppID): {fontID: seats}`
+        self.installations = {}
+        self._lock = threading.Lock()
+
+    def __designers__(self):
+        return self._designers
+
+    def __foundries__(self):
+        return self._foundries
+
+    def __fontDataSource__(self, fontID):
+        return self.fonts.get(fontID)
+
+    def __fontDataSources__(self, fontIDs):
+        return {fontID: self.fonts[fontID] for fontID in fontIDs if fontID in self.fonts}
+
+    def __recordedFontInstallationsForApp__(self, subscriptionID, anonymousAppID):
+        with self._lock:
+            return dict(self.installations.get((subscriptionID, anonymousAppID), {}))
+
+    def __commitFontInstallationChanges__(self, changes):
+        with self._lock:
+            seats = self.installations.setdefault((changes.subscriptionID, changes.anonymousAppID), {})
+            for action, fontID, details in changes:
+                if action == "record":
+                    seats[fontID] = 1
+                elif action == "delete":
+                    seats.pop(fontID, None)
+
+
+class FixtureUser(object):
+    def __init__(self, dataSource):
+        self.__secretKey__ = SECRET_KEY
+        self.__accessToken__ = None
+        self.__catalogVersion__ = 1
+        self._dataSource = dataSource
+
+    def __assignNewAccessToken__(self):
+        pass
+
+    def __subscriptionDataSource__(self):
+        return self._dataSource
+
+
+def buildFixtures(config):
+    """
+    Return `users` as `subscriptionID: FixtureUser` and the shared FixtureDataSource
+    """
+
+    rng = random.Random(config["seed"])
+
+    license = FixtureLicense("desktop", allowedSeats=5)
+    designers = [FixtureDesigner(f"designer{i}", f"Designer {i}") for i in range(10)]
+
+    families = []
+    for i in range(config["families"]):
+        fonts = [
+            FixtureFont(f"family{i}-font{j}", "1.0", rng.randbytes(config["fontSize"]), license)
+            for j in range(config["fontsPerFamily"])
+        ]
+        families.append(FixtureFamily(f"family{i}", [FixtureVersion("1.0")], fonts))
+
+    foundries = [FixtureFoundry("awesomefonts", "Awesome Fonts", [license], families)]
+    dataSource = FixtureDataSource(designers, foundries)
+
+    # All fonts are installed on all clients, so that `uninstallFonts` finds installation records
+    for subscriptionID in subscriptionIDs(config):
+        for anonymousAppID, anonymousTypeWorldUserID in clients(config):
+            dataSource.installations[(subscriptionID, anonymousAppID)] = dict.fromkeys(dataSource.fonts, 1)
+
+    users = {subscriptionID: FixtureUser(dataSource) for subscriptionID in subscriptionIDs(config)}
+
+    return users, dataSource
+
+
+def buildDatabase(config, path):
+    """
+    Return an SQLiteDatabase at `path`, holding the same data as buildFixtures()
+    """
+
+    # Import here, so that the database is set up in the server process only
+    from sqlitedatasource import SQLiteDatabase
+
+    users, dataSource = buildFixtures(config)
+    database = SQLiteDatabase(path)
+
+    with database.transaction():
+        for designer in dataSource.__designers__():
+            database.addDesigner(designer.__keyword__, designer.__name__)
+
+        for foundry in dataSource.__foundries__():
+            database.addFoundry(foundry.__uniqueID__, foundry.__name__)
+
+            for license in foundry.licenses():
+                database.addLicense(
+                    license.__keyword__,
+                    foundry.__uniqueID__,
+                    license.__keyword__,
+                    "https://awesomefonts.com/eula",
+                    license.__allowedSeats__,
+                )
+
+            for family in foundry.families():
+                versions = [version.__versionNumber__ for version in family.__versions__()]
+                database.addFamily(family.__uniqueID__, foundry.__uniqueID__, family.__uniqueID__, versions)
+
+                for font in family.__fonts__():
+                    database.addFont(
+                        font.__uniqueID__,
+                        family.__uniqueID__,
+                        font.__licenseDataSource__.__keyword__,
+                        font.__uniqueID__,
+                        font.__uniqueID__,
+                        font.__version__,
+                        font.__binaryFontData__,
+                    )
+
+        for subscriptionID, user in users.items():
+            database.addUser(subscriptionID, user.__secretKey__, [family.__uniqueID__ for family in families(dataSource)])
+
+        # Same installation records as in the fixture
+        for (subscriptionID, anonymousAppID), seats in dataSource.installations.items():
+            subscriptionDataSource = database.user(subscriptionID).__subscriptionDataSource__()
+            for fontID in seats:
+                subscriptionDataSource.__recordFontInstallation__(subscriptionID, anonymousAppID, fontID, "1.0", None, None)
+
+    return database
+
+
+def families(dataSource):
+    return [family for foundry in dataSource.__foundries__() for family in foundry.families()]
+
+
+def subscriptionIDs(config):
+    return [f"subscription{i}" for i in range(config["subscriptions"])]
+
+
+def clients(config):
+    return [(f"app{i}", f"user{i}") for i in range(config["clients"])]
+
+
+def fontIDs(config):
+    return [f"family{i}-font{j}" for i in range(config["families"]) for j in range(config["fontsPerFamily"])]
+
+
+##################################################################
+# Stand-in for the central server’s verifyCredentials call
+
+
+class VerifyCredentialsHandler(http.server.BaseHTTPRequestHandler):
+
+    # Set on the handler class by startVerifyCredentialsServer()
+    latency = 0
+    calls = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        with self.lock:
+            VerifyCredentialsHandler.calls += 1
+
+        time.sleep(self.latency)
+
+        body = json.dumps({"response": "success"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def startVerifyCredentialsServer(latency):
+    """
+    Start stand-in server in a background thread, return it together with its URL
+    """
+
+    VerifyCredentialsHandler.latency = latency
+    VerifyCredentialsHandler.protocol_version = "HTTP/1.1"
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), VerifyCredentialsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1/verifyCredentials"
+
+
+##################################################################
+# Server process
+
+
+def serve(config, verifyCredentialsURL, connection):
+    """
+    Run `app` with the fixture data source (or the same data in an SQLite database) until told to stop, then report peak RSS.
+    Runs in its own process, so that each scenario starts out with empty caches and its own RSS.
+    """
+
+    # Import here, so that the app is set up in the server process only
+    import app
+    import logging
+    from werkzeug.serving import make_server
+
+    # No access log for each request
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    if config["dataSource"] == "sqlite":
+        directory = tempfile.mkdtemp()
+        database = buildDatabase(config, os.path.join(directory, "benchmark.sqlite"))
+        app.__userBySubscriptionID__ = database.user
+    else:
+        users, dataSource = buildFixtures(config)
+        app.__userBySubscriptionID__ = users.get
+    app.VERIFY_CREDENTIALS_URL = verifyCredentialsURL
+
+    # All requests come from the same address
+    app.RATE_LIMIT = False
+
+    for name, value in config["settings"].items():
+        setattr(app, name, value)
+
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    connection.send(server.server_port)
+
+    # Wait for the end of the scenario
+    connection.recv()
+    server.shutdown()
+    connection.send(peakRSS())
+
+    if config["dataSource"] == "sqlite":
+        database.close()
+        shutil.rmtree(directory)
+
+
+def peakRSS():
+    """
+    Return peak resident set size of this process in bytes
+    """
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Reported in bytes on macOS, in kilobytes elsewhere
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+##################################################################
+# Load generator
+
+
+def requestParameters(kind, config, rng):
+    """
+    Return parameters for one request of `kind`
+    """
+
+    anonymousAppID, anonymousTypeWorldUserID = rng.choice(clients(config))
+    parameters = {
+        "subscriptionID": rng.choice(subscriptionIDs(config)),
+        "secretKey": SECRET_KEY,
+        "anonymousAppID": anonymousAppID,
+        "anonymousTypeWorldUserID": anonymousTypeWorldUserID,
+        "appVersion": "0.2.9",
+    }
+
+    if kind == "refresh":
+        parameters["commands"] = "installableFonts"
+
+    elif kind == "install":
+        parameters["commands"] = "installableFonts,installFonts"
+        fonts = rng.sample(fontIDs(config), min(config["fonts"], len(fontIDs(config))))
+        parameters["fonts"] = ",".join(f"{fontID}/1.0" for fontID in fonts)
+
+    elif kind == "uninstall":
+        parameters["commands"] = "uninstallFonts"
+        parameters["fonts"] = ",".join(rng.sample(fontIDs(config), min(config["fonts"], len(fontIDs(config)))))
+
+    return parameters
+
+
+def requestKinds(scenario, count, rng):
+    if scenario != "mixed":
+        return [scenario] * count
+    kinds, weights = zip(*MIX)
+    return rng.choices(kinds, weights, k=count)
+
+
+def runScenario(scenario, config, verifyCredentialsURL):
+    """
+    Start a server process, send it the requests of `scenario`, and return the results as a dictionary
+    """
+
+    rng = random.Random(config["seed"])
+    requestsList = [
+        requestParameters(kind, config, rng) for kind in requestKinds(scenario, config["requests"], rng)
+    ]
+
+    parentConnection, childConnection = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=serve, args=(config, verifyCredentialsURL, childConnection))
+    process.start()
+
+    try:
+        url = f"http://127.0.0.1:{parentConnection.recv()}/api"
+        sessions = threading.local()
+
+        def send(parameters):
+            if not hasattr(sessions, "session"):
+                sessions.session = requests.Session()
+            start = time.perf_counter()
+            try:
+                response = sessions.session.post(url, data=parameters)
+                response.content
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            return time.perf_counter() - start, ok
+
+        # Warm-up requests are not measured
+        with ThreadPoolExecutor(max_workers=config["concurrency"]) as executor:
+            list(executor.map(send, requestsList[: config["warmup"]]))
+
+        callsBefore = VerifyCredentialsHandler.calls
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=config["concurrency"]) as executor:
+            results = list(executor.map(send, requestsList))
+        seconds = time.perf_counter() - start
+
+        parentConnection.send("stop")
+        rss = parentConnection.recv()
+
+    finally:
+        process.join(timeout=10)
+        if process.is_alive():
+            process.terminate()
+
+    latencies = [latency for latency, ok in results]
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+
+    return {
+        "requests": len(results),
+        "errors": sum(1 for latency, ok in results if not ok),
+        "seconds": seconds,
+        "throughput": len(results) / seconds,
+        "latency": {
+            "mean": statistics.mean(latencies),
+            "p50": percentiles[49],
+            "p95": percentiles[94],
+            "p99": percentiles[98],
+            "max": max(latencies),
+        },
+        "peakRSS": rss,
+        "verifyCredentialsCalls": VerifyCredentialsHandler.calls - callsBefore,
+    }
+
+
+##################################################################
+# Reporting
+
+
+def gitCommit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def printResults(results, previous=None):
+    print(
+        f"{'scenario':<10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'peak RSS MiB':>13}"
+    )
+
+    for scenario, result in results["scenarios"].items():
+        latency = result["latency"]
+        print(
+            f"{scenario:<10} {result['throughput']:>9.1f} {latency['p50'] * 1000:>9.2f} {latency['p95'] * 1000:>9.2f}"
+            f" {latency['p99'] * 1000:>9.2f} {result['errors']:>7} {result['peakRSS'] / 1024 / 1024:>13.1f}"
+        )
+
+        if previous and scenario in previous["scenarios"]:
+            before = previous["scenarios"][scenario]
+            print(
+                f"{'':<10} {change(before['throughput'], result['throughput']):>9}"
+                f" {change(before['latency']['p50'], latency['p50']):>9}"
+                f" {change(before['latency']['p95'], latency['p95']):>9}"
+                f" {change(before['latency']['p99'], latency['p99']):>9}"
+                f" {'':>7} {change(before['peakRSS'], result['peakRSS']):>13}"
+            )
+
+
+def change(before, after):
+    if not before:
+        return ""
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def parseSetting(setting):
+    """
+    Parse `NAME=VALUE` of `--set` into `(name, value)`, with VALUE as a Python literal
+    """
+
+    name, _, value = setting.partition("=")
+    try:
+        return name, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        raise argparse.ArgumentTypeError(f"Value of {name} needs to be a Python literal: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark of the API Endpoint")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"Scenarios to run, out of: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--requests", type=int, default=2000, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=200, help="Unmeasured requests before each scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--subscriptions", type=int, default=100, help="Number of subscriptions")
+    parser.add_argument("--clients", type=int, default=50, help="Number of app instances")
+    parser.add_argument("--families", type=int, default=50, help="Families in the catalog")
+    parser.add_argument("--fonts-per-family", type=int, default=10, help="Fonts per family")
+    parser.add_argument("--font-size", type=int, default=100 * 1024, help="Size of each font in bytes")
+    parser.add_argument("--fonts", type=int, default=10, help="Fonts per installFonts and uninstallFonts request")
+    parser.add_argument("--verify-latency", type=float, default=0.05, help="Latency of verifyCredentials in seconds")
+    parser.add_argument("--data-source", choices=["fixture", "sqlite"], default="fixture",
+                        help="In-memory fixture data source, or the same data in sqlitedatasource.py")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for fixtures and requests")
+    parser.add_argument("--set", type=parseSetting, action="append", default=[], metavar="NAME=VALUE",
+                        help="Change a module-level setting of app.py")
+    parser.add_argument("--output", help="Save results as JSON to this file")
+    parser.add_argument("--compare", help="Compare results to those saved earlier in this file")
+    arguments = parser.parse_args()
+
+    for scenario in arguments.scenarios:
+        if scenario not in SCENARIOS:
+            parser.error(f"Unknown scenario: {scenario}")
+    scenarios = arguments.scenarios or SCENARIOS
+
+    config = {
+        "requests": arguments.requests,
+        "warmup": arguments.warmup,
+        "concurrency": arguments.concurrency,
+        "subscriptions": arguments.subscriptions,
+        "clients": arguments.clients,
+        "families": arguments.families,
+        "fontsPerFamily": arguments.fonts_per_family,
+        "fontSize": arguments.font_size,
+        "fonts": arguments.fonts,
+        "verifyLatency": arguments.verify_latency,
+        "dataSource": arguments.data_source,
+        "seed": arguments.seed,
+        "settings": dict(arguments.set),
+    }
+
+    verifyCredentialsServer, verifyCredentialsURL = startVerifyCredentialsServer(arguments.verify_latency)
+
+    results = {
+        "commit": gitCommit(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "scenarios": {},
+    }
+
+    try:
+        for scenario in scenarios:
+            results["scenarios"][scenario] = runScenario(scenario, config, verifyCredentialsURL)
+    finally:
+        verifyCredentialsServer.shutdown()
+
+    previous = None
+    if arguments.compare:
+        with open(arguments.compare) as f:
+            previous = json.load(f)
+        if previous["config"] != config:
+            print(f"Warning: Configuration differs from {arguments.compare}, results may not be comparable")
+
+    printResults(results, previous)
+
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+# Import third party modules
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# File locks for SingleFlight across processes are only available on Unix
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class TTLCache(object):
+    """
+    Small thread-safe cache with a least-recently-used eviction policy
+    and an individual time-to-live for each entry.
+
+    Used throughout this sample server to keep results of expensive operations
+    (such as the user verification with the central type.world server) around for a while.
+    """
+
+    def __init__(self, maxSize=10000, ttl=300):
+
+        # Maximum number of entries before the least recently used ones get evicted
+        self.maxSize = maxSize
+
+        # Default time-to-live in seconds, used when set() isn’t given an explicit `ttl`
+        self.ttl = ttl
+
+        # Entries are stored as `key: (expires, value)`, ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Return value for `key`, or `default` if it doesn’t exist or has expired
+        """
+
+        with self._lock:
+
+            entry = self._entries.get(key)
+
+            # Entry exists and is still fresh, so mark as most recently used and return it
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            # Entry has expired, remove it
+            if entry is not None:
+                del self._entries[key]
+
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """
+        Save `value` under `key`, optionally with its own time-to-live in seconds
+        """
+
+        if ttl is None:
+            ttl = self.ttl
+
+        with self._lock:
+
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+
+            # Evict least recently used entries
+            while len(self._entries) > self.maxSize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        Remove `key` from cache. Returns True if an entry was removed.
+        """
+
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def invalidateWhere(self, condition):
+        """
+        Remove all entries for whose key `condition(key)` returns True.
+        Returns the number of removed entries.
+        """
+
+        with self._lock:
+            keys = [key for key in self._entries if condition(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self):
+        """
+        Remove all entries
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return statistics as a dictionary
+        """
+
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxSize": self.maxSize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls with identical keys, so that only the first caller actually does the work
+    and all others that arrive while it is still running wait for its result instead.
+
+    Works across the threads of one process. If `lockDirectory` is given, it also works across processes
+    on the same machine: the first process holds a lock file while doing the work and leaves the result
+    behind for `resultTTL` seconds, where the other processes pick it up once the lock is released.
+    Results then need to be JSON-serializable. Exceptions are handed on to waiting threads, but not to other processes.
+    Every `resultTTL` seconds, lock files and results of keys that are no longer in flight are removed again.
+    """
+
+    def __init__(self, lockDirectory=None, resultTTL=5):
+
+        self.lockDirectory = lockDirectory
+        self.resultTTL = resultTTL
+
+        # Calls currently in flight in this process, as `key: _Flight`
+        self._flights = {}
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.calls = 0
+        self.coalesced = 0
+
+        # Next time to remove old lock files and results, see _prune()
+        self._nextPrune = 0
+
+        if self.lockDirectory:
+            if fcntl is None:
+                raise RuntimeError("SingleFlight across processes requires fcntl, which isn’t available on this system")
+            os.makedirs(self.lockDirectory, exist_ok=True)
+
+    def do(self, key, function, adopt=None):
+        """
+        Return result of `function()`, calling it only if no other call with the same `key` is already in flight.
+        `adopt(result)` is called with a result picked up from another process, if given, so that this process
+        can keep it the way the other process has, for instance in its own cache.
+        """
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        # Another thread is already at it, so wait for its result
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            if self.lockDirectory:
+                flight.result = self._doAcrossProcesses(key, function, adopt)
+            else:
+                flight.result = function()
+            return flight.result
+
+        except Exception as e:
+            flight.error = e
+            raise
+
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _doAcrossProcesses(self, key, function, adopt):
+
+        path = os.path.join(self.lockDirectory, hashlib.sha256(repr(key).encode()).hexdigest())
+
+        self._prune()
+
+        while True:
+            lockFile = open(path + ".lock", "a")
+
+            # Wait here while another process is at it
+            fcntl.flock(lockFile, fcntl.LOCK_EX)
+
+            # The lock file was removed by _prune() in the meantime, so start over with a new one
+            if os.fstat(lockFile.fileno()).st_nlink == 0:
+                lockFile.close()
+                continue
+            break
+
+        with lockFile:
+            try:
+                # Another process has just finished, so use its result
+                found, result = self._readResult(path)
+                if found:
+                    with self._lock:
+                        self.coalesced += 1
+                    if adopt:
+                        adopt(result)
+                    return result
+
+                result = function()
+
+                # Leave result behind for the other processes
+                with open(path + ".tmp", "w") as f:
+                    json.dump(result, f)
+                os.replace(path + ".tmp", path + ".result")
+
+                return result
+
+            finally:
+                fcntl.flock(lockFile, fcntl.LOCK_UN)
+
+    def _readResult(self, path):
+        """
+        Return `found, result` of the result left behind at `path` by another process, unless it has expired
+        """
+
+        try:
+            if time.time() - os.path.getmtime(path + ".result") < self.resultTTL:
+                with open(path + ".result") as f:
+                    return True, json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        return False, None
+
+    def _prune(self):
+        """
+        Remove lock files and results of keys that are no longer in flight in any process,
+        and whose results have expired, at most once every `resultTTL` seconds
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            if now < self._nextPrune:
+                return
+            self._nextPrune = now + self.resultTTL
+
+        for entry in os.scandir(self.lockDirectory):
+            if not entry.name.endswith(".lock"):
+                continue
+
+            path = entry.path[: -len(".lock")]
+            try:
+                if time.time() - os.path.getmtime(path + ".result") < self.resultTTL:
+                    continue
+            except OSError:
+                pass
+
+            try:
+                lockFile = open(entry.path, "a")
+            except OSError:
+                continue
+
+            with lockFile:
+                # In flight right now
+                try:
+                    fcntl.flock(lockFile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+
+                # Removed while holding the lock, so that processes waiting for it notice and start over
+                for suffix in (".result", ".tmp", ".lock"):
+                    try:
+                        os.remove(path + suffix)
+                    except FileNotFoundError:
+                        pass
+
+    def stats(self):
+        """
+        Return statistics as a dictionary
+        """
+
+        with self._lock:
+            return {"inFlight": len(self._flights), "calls": self.calls, "coalesced": self.coalesced}
+
+
+class _Flight(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
@@ -0,0 +1,770 @@
+# Import typeworld module
+import typeworld.api
+
+# Import third party modules
+import argparse
+import bisect
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+
+# Import own modules
+import serializer
+
+logger = logging.getLogger(__name__)
+
+# Catalog file format
+#
+# The file starts with a header: MAGIC, the catalog version, and the position (offset in bytes) and length
+# (number of records, or bytes for `strings`) of each of TABLES. Each table is an array of fixed-size records
+# as defined in RECORDS, which refer to strings and to records of other tables by their index.
+# All strings are stored once, UTF-8 encoded, in `strings`, and found through their `(offset, length)` in `stringOffsets`.
+# `familyIndex` holds the indexes of all families sorted by their `uniqueID`, so that families can be looked up by ID.
+MAGIC = b"TWCAT001"
+TABLES = (
+    "stringOffsets",
+    "strings",
+    "designers",
+    "foundries",
+    "licenses",
+    "families",
+    "familyIndex",
+    "versions",
+    "fonts",
+)
+RECORDS = {
+    # offset, length
+    "stringOffsets": struct.Struct("<II"),
+    # keyword, name
+    "designers": struct.Struct("<II"),
+    # uniqueID, name, first license, number of licenses, first family, number of families
+    "foundries": struct.Struct("<IIIIII"),
+    # keyword, name, URL, allowedSeats
+    "licenses": struct.Struct("<IIII"),
+    # uniqueID, name, foundry, first version, number of versions, first font, number of fonts
+    "families": struct.Struct("<IIIIIII"),
+    # family
+    "familyIndex": struct.Struct("<I"),
+    # number
+    "versions": struct.Struct("<I"),
+    # uniqueID, name, postScriptName, version, family, license, flags
+    "fonts": struct.Struct("<IIIIIII"),
+}
+HEADER = struct.Struct("<8sQ" + "QQ" * len(TABLES))
+
+# Stands for None, in place of a string or a number
+NONE = 0xFFFFFFFF
+
+# Flags of fonts
+PROTECTED = 1
+TRIAL = 2
+
+
+def writeCatalog(path, __catalogDataSource__, version):
+    """
+    Serialize the whole catalog of `__catalogDataSource__` (all designers and foundries, with all of their licenses,
+    families, versions, and fonts) into a catalog file at `path` with `version`.
+
+    The file is written next to `path` first and then moved into place, so that readers (see SharedCatalog)
+    only ever see either the complete old or the complete new file.
+    """
+
+    strings = _StringTable()
+    tables = {name: [] for name in RECORDS if name != "stringOffsets"}
+    licensesByKeyword = {}
+
+    for __designerDataSource__ in __catalogDataSource__.__designers__():
+        tables["designers"].append(
+            (strings.add(__designerDataSource__.__keyword__), strings.add(__designerDataSource__.__name__))
+        )
+
+    for __foundryDataSource__ in __catalogDataSource__.__foundries__():
+        foundry = len(tables["foundries"])
+        firstLicense, firstFamily = len(tables["licenses"]), len(tables["families"])
+
+        for __licenseDataSource__ in __foundryDataSource__.licenses():
+            licensesByKeyword[__licenseDataSource__.__keyword__] = len(tables["licenses"])
+            allowedSeats = getattr(__licenseDataSource__, "__allowedSeats__", None)
+            tables["licenses"].append(
+                (
+                    strings.add(__licenseDataSource__.__keyword__),
+                    strings.add(getattr(__licenseDataSource__, "__name__", None)),
+                    strings.add(getattr(__licenseDataSource__, "__URL__", None)),
+                    NONE if allowedSeats is None else allowedSeats,
+                )
+            )
+
+        for __familyDataSource__ in __foundryDataSource__.families():
+            family = len(tables["families"])
+            firstVersion, firstFont = len(tables["versions"]), len(tables["fonts"])
+
+            for __versionDataSource__ in __familyDataSource__.__versions__():
+                tables["versions"].append((strings.add(__versionDataSource__.__versionNumber__),))
+
+            for __fontDataSource__ in __familyDataSource__.__fonts__():
+                flags = 0
+                if getattr(__fontDataSource__, "__protected__", False):
+                    flags |= PROTECTED
+                if getattr(__fontDataSource__, "__isTrialFont__", False):
+                    flags |= TRIAL
+                license = getattr(__fontDataSource__, "__licenseDataSource__", None)
+                tables["fonts"].append(
+                    (
+                        strings.add(__fontDataSource__.__uniqueID__),
+                        strings.add(getattr(__fontDataSource__, "__name__", None)),
+                        strings.add(getattr(__fontDataSource__, "__postScriptName__", None)),
+                        strings.add(__fontDataSource__.__version__),
+                        family,
+                        licensesByKeyword.get(license.__keyword__, NONE) if license else NONE,
+                        flags,
+                    )
+                )
+
+            tables["families"].append(
+                (
+                    strings.add(__familyDataSource__.__uniqueID__),
+                    strings.add(getattr(__familyDataSource__, "__name__", None)),
+                    foundry,
+                    firstVersion,
+                    len(tables["versions"]) - firstVersion,
+                    firstFont,
+                    len(tables["fonts"]) - firstFont,
+                )
+            )
+
+        tables["foundries"].append(
+            (
+                strings.add(__foundryDataSource__.__uniqueID__),
+                strings.add(__foundryDataSource__.__name__),
+                firstLicense,
+                len(tables["licenses"]) - firstLicense,
+                firstFamily,
+                len(tables["families"]) - firstFamily,
+            )
+        )
+
+    familyIDs = [strings.get(family[0]) for family in tables["families"]]
+    tables["familyIndex"] = [(family,) for family in sorted(range(len(familyIDs)), key=familyIDs.__getitem__)]
+    tables["stringOffsets"] = strings.offsets
+
+    # Lay out the tables one after the other behind the header
+    sections = {}
+    position = HEADER.size
+    for name in TABLES:
+        if name == "strings":
+            sections[name] = (position, len(strings.data))
+            position += len(strings.data)
+        else:
+            sections[name] = (position, len(tables[name]))
+            position += len(tables[name]) * RECORDS[name].size
+
+    data = bytearray(position)
+    HEADER.pack_into(data, 0, MAGIC, version, *[value for name in TABLES for value in sections[name]])
+    for name in TABLES:
+        offset, length = sections[name]
+        if name == "strings":
+            data[offset : offset + length] = strings.data
+        else:
+            record = RECORDS[name]
+            for i, values in enumerate(tables[name]):
+                record.pack_into(data, offset + i * record.size, *values)
+
+    # Write to temporary file first and then move it into place
+    directory = os.path.dirname(os.path.abspath(path))
+    fileDescriptor, temporaryPath = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fileDescriptor, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporaryPath, path)
+    except BaseException:
+        os.remove(temporaryPath)
+        raise
+
+
+class _StringTable(object):
+    """
+    Strings of a catalog file being written, each stored only once
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = []
+        self._indexes = {}
+        self._strings = []
+
+    def add(self, string):
+        """
+        Return index of `string`, adding it first if necessary
+        """
+
+        if string is None:
+            return NONE
+
+        string = str(string)
+        index = self._indexes.get(string)
+        if index is None:
+            encoded = string.encode()
+            index = self._indexes[string] = len(self.offsets)
+            self.offsets.append((len(self.data), len(encoded)))
+            self._strings.append(string)
+            self.data += encoded
+        return index
+
+    def get(self, index):
+        return self._strings[index]
+
+
+class Catalog(object):
+    """
+    Read-only catalog file at `path`, memory-mapped.
+
+    Nothing is read into memory when the file is opened. Records are only decoded when they are asked for,
+    straight from the operating system’s page cache, which is shared by all processes reading the same file.
+    """
+
+    def __init__(self, path):
+
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.version, *sections = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a catalog file: {path}")
+
+        self._sections = {name: (sections[2 * i], sections[2 * i + 1]) for i, name in enumerate(TABLES)}
+
+        # Cached here as they are read for every string
+        self._stringOffsetsPosition = self._sections["stringOffsets"][0]
+        self._stringsPosition = self._sections["strings"][0]
+
+    def __len__(self):
+        return len(self._map)
+
+    def _record(self, table, index):
+        """
+        Return values of record number `index` of `table`
+        """
+
+        record = RECORDS[table]
+        return record.unpack_from(self._map, self._sections[table][0] + index * record.size)
+
+    def _count(self, table):
+        return self._sections[table][1]
+
+    def string(self, index):
+        """
+        Return string number `index`, or None for NONE
+        """
+
+        if index == NONE:
+            return None
+
+        offset, length = RECORDS["stringOffsets"].unpack_from(self._map, self._stringOffsetsPosition + index * 8)
+        position = self._stringsPosition + offset
+        return self._map[position : position + length].decode()
+
+    def designers(self):
+        """
+        Return all designers
+        """
+
+        return [CatalogDesigner(self, i) for i in range(self._count("designers"))]
+
+    def foundries(self, familyIDs=None):
+        """
+        Return all foundries, or only the ones of the families in `familyIDs`,
+        holding only these families then
+        """
+
+        if familyIDs is None:
+            return [CatalogFoundry(self, i) for i in range(self._count("foundries"))]
+
+        # Look up the families, and keep them in catalog order
+        familiesByFoundry = {}
+        families = (self.family(familyID) for familyID in familyIDs)
+        for family in sorted(family for family in families if family is not None):
+            foundry = self._record("families", family)[2]
+            familiesByFoundry.setdefault(foundry, []).append(family)
+
+        return [CatalogFoundry(self, foundry, families) for foundry, families in sorted(familiesByFoundry.items())]
+
+    def family(self, familyID):
+        """
+        Return index of the family with `uniqueID` `familyID`, or None if it doesn’t exist
+        """
+
+        familyIndex = _FamilyIndex(self)
+        position = bisect.bisect_left(familyIndex, familyID)
+        if position < len(familyIndex) and familyIndex[position] == familyID:
+            return self._record("familyIndex", position)[0]
+        return None
+
+    def subscription(self, familyIDs):
+        """
+        Return `__ownDataSource__` for createInstallableFontsObjectTree() holding the families in `familyIDs`
+        """
+
+        return CatalogSubscription(self, familyIDs)
+
+
+class _FamilyIndex(object):
+    """
+    `uniqueID`s of all families of a catalog in sorted order, as a sequence for bisect
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def __len__(self):
+        return self.catalog._count("familyIndex")
+
+    def __getitem__(self, position):
+        family = self.catalog._record("familyIndex", position)[0]
+        return self.catalog.string(self.catalog._record("families", family)[0])
+
+
+class CatalogSubscription(object):
+    """
+    `__ownDataSource__` of one subscription read from a catalog file,
+    holding the families that the subscription has access to
+    """
+
+    def __init__(self, catalog, familyIDs):
+        self.catalog = catalog
+        self.familyIDs = familyIDs
+
+    def __designers__(self):
+        return self.catalog.designers()
+
+    def __foundries__(self):
+        return self.catalog.foundries(self.familyIDs)
+
+
+class CatalogDesigner(object):
+    def __init__(self, catalog, index):
+        keyword, name = catalog._record("designers", index)
+        self.__keyword__ = catalog.string(keyword)
+        self.__name__ = catalog.string(name)
+
+
+class CatalogFoundry(object):
+    def __init__(self, catalog, index, families=None):
+        self.catalog = catalog
+        uniqueID, name, self._firstLicense, self._licenseCount, firstFamily, familyCount = catalog._record(
+            "foundries", index
+        )
+        self.__uniqueID__ = catalog.string(uniqueID)
+        self.__name__ = catalog.string(name)
+
+        # Indexes of the families to hold, or all of the foundry’s families
+        self._families = families if families is not None else range(firstFamily, firstFamily + familyCount)
+
+    def licenses(self):
+        return [CatalogLicense(self.catalog, self._firstLicense + i) for i in range(self._licenseCount)]
+
+    def families(self):
+        return [CatalogFamily(self.catalog, family) for family in self._families]
+
+
+class CatalogLicense(object):
+    def __init__(self, catalog, index):
+        keyword, name, URL, allowedSeats = catalog._record("licenses", index)
+        self.__keyword__ = catalog.string(keyword)
+        self.__name__ = catalog.string(name)
+        self.__URL__ = catalog.string(URL)
+        self.__allowedSeats__ = None if allowedSeats == NONE else allowedSeats
+
+
+class CatalogFamily(object):
+    def __init__(self, catalog, index):
+        self.catalog = catalog
+        uniqueID, name, foundry, self._firstVersion, self._versionCount, self._firstFont, self._fontCount = catalog._record(
+            "families", index
+        )
+        self.__uniqueID__ = catalog.string(uniqueID)
+        self.__name__ = catalog.string(name)
+
+    def __versions__(self):
+        return [CatalogVersion(self.catalog, self._firstVersion + i) for i in range(self._versionCount)]
+
+    def __fonts__(self):
+        return [CatalogFont(self.catalog, self._firstFont + i) for i in range(self._fontCount)]
+
+
+class CatalogVersion(object):
+    def __init__(self, catalog, index):
+        self.__versionNumber__ = catalog.string(catalog._record("versions", index)[0])
+
+
+class CatalogFont(object):
+    """
+    Font metadata of the catalog. The binary font data isn’t part of the catalog file,
+    `installFonts` reads it from your own data source.
+    """
+
+    def __init__(self, catalog, index):
+        uniqueID, name, postScriptName, version, family, license, flags = catalog._record("fonts", index)
+        self.__uniqueID__ = catalog.string(uniqueID)
+        self.__name__ = catalog.string(name)
+        self.__postScriptName__ = catalog.string(postScriptName)
+        self.__version__ = catalog.string(version)
+        self.__protected__ = bool(flags & PROTECTED)
+        self.__isTrialFont__ = bool(flags & TRIAL)
+        self.__licenseDataSource__ = CatalogLicense(catalog, license) if license != NONE else None
+
+
+class CompactCatalog(object):
+    """
+    The whole catalog, kept as serialized JSON per designer and per family, from which the `installableFonts` response
+    of any subscription is put together by picking its families, without building any `typeworld.api` objects.
+
+    `installableFonts` is an `InstallableFontsResponse` holding the whole catalog, built only once (see app.COMPACT_CATALOG).
+    """
+
+    # Depth of designers and families in the output of serializer.fragment(),
+    # within `installableFonts.designers` and `installableFonts.foundries[].families`
+    DESIGNER_DEPTH = 3
+    FAMILY_DEPTH = 5
+
+    __slots__ = (
+        "version",
+        "entitlements",
+        "_response",
+        "_designers",
+        "_foundries",
+        "_families",
+        "_familyFoundries",
+        "_familyIndex",
+    )
+
+    def __init__(self, installableFonts, version):
+
+        self.version = version
+
+        # Families of each subscription, see loadEntitlements()
+        self.entitlements = None
+
+        d = serializer.dumpDict(installableFonts)
+        designers = d.pop("designers", [])
+        foundries = d.pop("foundries", [])
+
+        # Everything else of the response, as plain data
+        self._response = d
+
+        self._designers = tuple(serializer.encodeAt(designer, self.DESIGNER_DEPTH) for designer in designers)
+
+        # Foundries as plain data without their families, families as serialized JSON,
+        # the foundry of each family by index, and the index of each family by `uniqueID`
+        self._foundries = []
+        self._families = []
+        self._familyFoundries = array("I")
+        self._familyIndex = {}
+
+        for foundry, foundryData in enumerate(foundries):
+            for family in foundryData.pop("families", []):
+                self._familyIndex[family["uniqueID"]] = len(self._families)
+                self._families.append(serializer.encodeAt(family, self.FAMILY_DEPTH))
+                self._familyFoundries.append(foundry)
+            self._foundries.append(foundryData)
+
+        self._foundries = tuple(self._foundries)
+        self._families = tuple(self._families)
+
+    def __len__(self):
+        return len(self._families)
+
+    def families(self, familyIDs):
+        """
+        Return indices of the families in `familyIDs` in catalog order, as used by fragment().
+        Families missing from the catalog are left out.
+        """
+
+        return array("I", sorted(self._familyIndex[familyID] for familyID in familyIDs if familyID in self._familyIndex))
+
+    def loadEntitlements(self, entitlements):
+        """
+        Load the families of all subscriptions out of `entitlements`, as `subscriptionID: (catalogVersion, familyIDs)`
+        """
+
+        self.entitlements = Entitlements(self, entitlements)
+
+    def fragment(self, families=None):
+        """
+        Return `installableFonts` response serialized into JSON (see serializer.fragment()), holding the families
+        with the indices `families` (see families(), or all of them), and only the foundries of these families
+        """
+
+        if families is None:
+            families = range(len(self._families))
+
+        # Families are in catalog order, so each foundry’s families come in one piece
+        foundries = []
+        for family in families:
+            foundry = self._familyFoundries[family]
+            if not foundries or foundries[-1][0] != foundry:
+                foundries.append((foundry, []))
+            foundries[-1][1].append(self._families[family])
+
+        d = dict(self._response)
+        required = serializer.required(typeworld.api.InstallableFontsResponse)
+        if self._designers or "designers" in required:
+            d["designers"] = list(self._designers)
+        if foundries or "foundries" in required:
+            d["foundries"] = [dict(self._foundries[foundry], families=families) for foundry, families in foundries]
+
+        return serializer.encodeFragment(d)
+
+
+class Entitlements(object):
+    """
+    Index of the families that each subscription has access to, over the families of a CompactCatalog,
+    so that a subscription’s families don’t need to be looked up in your data source on each request.
+
+    The families of a subscription are kept as a sorted array of family indices, together with the subscription’s
+    catalog version at the time. Subscriptions with the same families share one array.
+    """
+
+    __slots__ = ("catalog", "_subscriptions", "_shared")
+
+    def __init__(self, catalog, entitlements):
+
+        self.catalog = catalog
+        self._subscriptions = {}
+        self._shared = {}
+
+        for subscriptionID, (catalogVersion, familyIDs) in entitlements.items():
+            self.update(subscriptionID, catalogVersion, catalog.families(familyIDs))
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def families(self, subscriptionID, catalogVersion):
+        """
+        Return indices of the families of `subscriptionID` (see CompactCatalog.families()),
+        or None if they are unknown or were loaded for another catalog version than `catalogVersion`
+        """
+
+        entry = self._subscriptions.get(subscriptionID)
+        if entry is None or entry[0] != catalogVersion:
+            return None
+        return entry[1]
+
+    def update(self, subscriptionID, catalogVersion, families):
+        """
+        Set indices of the families of `subscriptionID` as of `catalogVersion`
+        """
+
+        families = self._shared.setdefault(families.tobytes(), families)
+        self._subscriptions[subscriptionID] = (catalogVersion, families)
+
+
+class CatalogLoader(object):
+    """
+    Keeps the current version of an in-memory catalog, and loads a new version in a background thread
+    whenever the catalog in the data source has changed.
+
+    `load(version)` returns a new catalog with the version number `version`, which increases with every load.
+    `sourceVersion()` returns anything that changes whenever the catalog in the data source changes,
+    and is checked every `interval` seconds.
+
+    A new catalog is only swapped in once it has been loaded completely. Requests that hold on to the catalog
+    returned by current() finish with that version, while new requests get the new one.
+    """
+
+    def __init__(self, load, sourceVersion, interval=10):
+
+        self.load = load
+        self.sourceVersion = sourceVersion
+        self.interval = interval
+
+        # Version number of the current catalog, 0 before the first one has been loaded
+        self.version = 0
+        self._current = None
+        self._currentSourceVersion = None
+
+        # Only one load at a time
+        self._lock = threading.Lock()
+
+        # Background thread of this process, started with the first call to current() after a fork
+        self._pid = None
+        self._threadLock = threading.Lock()
+
+        # Statistics
+        self.reloads = 0
+        self.failures = 0
+
+    def current(self):
+        """
+        Return the current catalog, loading the first version if needed
+        """
+
+        self._start()
+
+        catalog = self._current
+        if catalog is None:
+            self.refresh()
+            catalog = self._current
+
+        return catalog
+
+    def refresh(self, force=False):
+        """
+        Load a new version of the catalog if the data source’s version has changed (or always, if `force` is set),
+        and swap it in. Returns True if a new version was swapped in.
+        """
+
+        with self._lock:
+
+            # Read before loading, so that changes made while loading are picked up with the next check
+            sourceVersion = self.sourceVersion()
+            if not force and self._current is not None and sourceVersion == self._currentSourceVersion:
+                return False
+
+            catalog = self.load(self.version + 1)
+
+            # Swap in the new version at once
+            self._current, self._currentSourceVersion = catalog, sourceVersion
+            self.version += 1
+            self.reloads += 1
+
+        return True
+
+    def _start(self):
+        """
+        Start the background thread, unless already done in this process
+        """
+
+        if self._pid == os.getpid():
+            return
+
+        with self._threadLock:
+            if self._pid == os.getpid():
+                return
+
+            # The lock may have been held by a thread of the parent process at the time of the fork
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+
+    def _run(self):
+
+        # Check right away rather than after the first interval, as a process forked long after the catalog
+        # was loaded by its parent (for instance a replaced worker process) may have inherited an old version
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                # Keep serving the current version, and try again next time
+                logger.exception("Reloading the catalog failed")
+                self.failures += 1
+            time.sleep(self.interval)
+
+
+class SharedCatalog(object):
+    """
+    The current version of the catalog file at `path`, shared by all worker processes.
+
+    A new version is published by replacing the file (see writeCatalog()), and current() switches over to it
+    within `checkInterval` seconds. Requests that are under way keep the Catalog they started out with,
+    which stays readable until they are done, even though its file has been replaced.
+    """
+
+    def __init__(self, path, checkInterval=1):
+
+        self.path = path
+        self.checkInterval = checkInterval
+
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._identity = None
+        self._nextCheck = 0
+
+    def current(self):
+        """
+        Return the current Catalog, or None if no catalog has been published yet
+        """
+
+        now = time.monotonic()
+        if now < self._nextCheck:
+            return self._catalog
+
+        with self._lock:
+            if now >= self._nextCheck:
+                self._nextCheck = now + self.checkInterval
+
+                try:
+                    stat = os.stat(self.path)
+                except FileNotFoundError:
+                    self._catalog, self._identity = None, None
+                    return None
+
+                # The file was replaced
+                identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                if identity != self._identity:
+                    self._catalog = Catalog(self.path)
+                    self._identity = identity
+
+        return self._catalog
+
+    @property
+    def version(self):
+        catalog = self.current()
+        return catalog.version if catalog else None
+
+
+def main():
+    """
+    Command line interface to publish a new version of the catalog, for instance after changing it in your database:
+
+        python catalog.py publish
+    """
+
+    # Import here so that importing this module from app.py doesn’t import app.py again
+    import app
+
+    parser = argparse.ArgumentParser(description="Manage the shared catalog file")
+    parser.add_argument("action", choices=["publish", "info"])
+    parser.add_argument("--path", default=app.CATALOG_FILE)
+    parser.add_argument("--version", type=int, help="Version of the new catalog (default: the current version plus one)")
+    arguments = parser.parse_args()
+
+    if not arguments.path:
+        parser.error("No path given and CATALOG_FILE isn’t set in app.py")
+
+    current = Catalog(arguments.path) if os.path.exists(arguments.path) else None
+
+    if arguments.action == "publish":
+
+        # Versions only ever increase, so that cached responses of older versions are never used again
+        version = arguments.version if arguments.version is not None else (current.version + 1 if current else 1)
+        if current and version <= current.version:
+            parser.error(f"Version needs to be higher than the current version {current.version}")
+
+        # Note: __catalogDataSource__() doesn’t exist in this sample code
+        writeCatalog(arguments.path, app.__catalogDataSource__(), version)
+        current = Catalog(arguments.path)
+
+    if current:
+        print(
+            {
+                "version": current.version,
+                "size": len(current),
+                **{name: current._count(name) for name in ("designers", "foundries", "licenses", "families", "fonts")},
+            }
+        )
+    else:
+        print("No catalog published yet")
+
+
+if __name__ == "__main__":
+    main()
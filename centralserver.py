@@ -0,0 +1,161 @@
+# Import third party modules
+import os
+import threading
+import time
+
+# Import requests, which comes with typeworld
+import requests
+import requests.adapters
+
+
+class CentralServerUnavailable(Exception):
+    """
+    Raised when the central type.world server can’t be reached, or when the circuit breaker
+    is open because it couldn’t be reached repeatedly just before.
+    """
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker for calls to a remote server.
+
+    After `failureThreshold` consecutive failures the breaker opens, and all calls fail immediately
+    instead of waiting for a server that is slow or down. After `resetTimeout` seconds, one trial call
+    is let through (half-open); if it succeeds, the breaker closes again, otherwise it stays open
+    for another `resetTimeout` seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALFOPEN = "halfOpen"
+
+    def __init__(self, failureThreshold=5, resetTimeout=30):
+        self.failureThreshold = failureThreshold
+        self.resetTimeout = resetTimeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.openedAt = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Return True if a call may be made now
+        """
+
+        with self._lock:
+
+            if self.state == self.CLOSED:
+                return True
+
+            # Let one trial call through once the timeout has passed
+            if self.state == self.OPEN and time.monotonic() - self.openedAt >= self.resetTimeout:
+                self.state = self.HALFOPEN
+                return True
+
+            return False
+
+    def recordSuccess(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def recordFailure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALFOPEN or self.failures >= self.failureThreshold:
+                self.state = self.OPEN
+                self.openedAt = time.monotonic()
+
+
+class CentralServerClient(object):
+    """
+    HTTP client for calls to the central type.world server, shared by all requests of one process.
+
+    Keeps a pool of keep-alive connections, so that not every call has to go through a new TCP and TLS handshake,
+    and protects the API Endpoint with a CircuitBreaker while the central server is slow or down.
+    """
+
+    def __init__(
+        self,
+        poolSize=20,
+        connectTimeout=3,
+        readTimeout=10,
+        tries=3,
+        failureThreshold=5,
+        resetTimeout=30,
+    ):
+
+        self.poolSize = poolSize
+        self.timeout = (connectTimeout, readTimeout)
+        self.tries = tries
+        self.breaker = CircuitBreaker(failureThreshold, resetTimeout)
+
+        self._session = None
+        self._sessionPID = None
+        self._lock = threading.Lock()
+
+    def session(self):
+        """
+        Return the process’s `requests.Session`.
+        A new one is created after a fork, so that worker processes never share connections.
+        """
+
+        with self._lock:
+            if self._session is None or self._sessionPID != os.getpid():
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.poolSize, max_retries=0
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+                self._sessionPID = os.getpid()
+
+            return self._session
+
+    def request(self, url, parameters):
+        """
+        POST `parameters` to `url`.
+
+        Returns `success, content, responseObject` like `typeworld.client.request()`, with `success` being True
+        for a response with HTTP status 200. Raises CentralServerUnavailable if the server can’t be reached.
+        """
+
+        if not self.breaker.allow():
+            raise CentralServerUnavailable(f"Circuit breaker for {url} is open")
+
+        # Like typeworld’s built-in request() method, we try the request several times
+        # in case an instance of the central server disappears during the request.
+        # See the WARNING at https://type.world/developer#typeworld-api
+        message = None
+        try:
+            for i in range(self.tries):
+
+                try:
+                    response = self.session().post(url, data=parameters, timeout=self.timeout)
+                except requests.RequestException as e:
+                    message = f"Request to {url} failed: {e.__class__.__name__}"
+                    continue
+
+                # Server error, try again
+                if response.status_code >= 500:
+                    message = f"HTTP Error {response.status_code}"
+                    continue
+
+                self.breaker.recordSuccess()
+
+                if response.status_code == 200:
+                    return True, response.content, response
+
+                return False, f"HTTP Error {response.status_code}", response
+
+        # Anything else going wrong counts as a failure, too.
+        # Otherwise a trial call of a half-open breaker would leave it half-open, and closed to all calls, for good.
+        except BaseException:
+            self.breaker.recordFailure()
+            raise
+
+        # All tries failed
+        self.breaker.recordFailure()
+        raise CentralServerUnavailable(message)
@@ -0,0 +1,150 @@
+# Import third party modules
+import gzip
+import logging
+import threading
+import zlib
+
+# Import werkzeug, which comes with Flask
+from werkzeug.http import parse_accept_header
+
+# Brotli compresses JSON data better than gzip, but needs the `brotli` module to be installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Supported content codings, in order of preference
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+def negotiate(acceptEncoding):
+    """
+    Return the best content coding out of ENCODINGS for the value of an `Accept-Encoding` HTTP header,
+    or None if the response is to be sent uncompressed
+    """
+
+    if not acceptEncoding:
+        return None
+
+    return parse_accept_header(acceptEncoding).best_match(ENCODINGS)
+
+
+def compress(data, encoding, level):
+    """
+    Return `data` compressed with `encoding` at `level`
+    """
+
+    if encoding == "gzip":
+        # Without a timestamp, so that the same data is always compressed into the same bytes
+        return gzip.compress(data, compresslevel=level, mtime=0)
+
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compressStream(chunks, encoding, level):
+    """
+    Generator compressing the strings or bytes of `chunks` with `encoding` at `level` as they come
+    """
+
+    if encoding == "gzip":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, finish = compressor.compress, compressor.flush
+    elif encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        process, finish = compressor.process, compressor.finish
+    else:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        compressed = process(chunk)
+        if compressed:
+            yield compressed
+
+    yield finish()
+
+
+def setVariantETag(response, etag, encoding):
+    """
+    Set ETag of `response`, which is the response with ETag `etag` compressed with `encoding`.
+    Each compressed variant of a response needs to have its own ETag. It is a weak one, because the same variant
+    may come compressed at different levels (see PrecompressedBody), and so as different bytes.
+    """
+
+    if encoding:
+        response.set_etag(f"{etag}-{encoding}", weak=True)
+    else:
+        response.set_etag(etag)
+
+
+def matchesETag(ifNoneMatch, etag):
+    """
+    Return True if the `werkzeug.datastructures.ETags` of an `If-None-Match` HTTP header
+    contain `etag` of any compressed variant of a response
+    """
+
+    return ifNoneMatch.contains(etag) or any(ifNoneMatch.contains_weak(f"{etag}-{encoding}") for encoding in ENCODINGS)
+
+
+class PrecompressedBody(object):
+    """
+    Response body that is sent many times over, kept together with its compressed variants.
+
+    Each variant is compressed only once, with the best (and slowest) settings. That happens on `executor`
+    (a concurrent.futures.Executor shared by all bodies) when the variant is first asked for, so that no request
+    has to wait for it. Until it is done, get() returns None. Without `executor`, it happens right away in get().
+    """
+
+    def __init__(self, data, levels, executor=None):
+
+        # Uncompressed body as bytes
+        self.data = data
+
+        # Compression levels as `encoding: level`
+        self.levels = levels
+
+        self.executor = executor
+
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def get(self, encoding):
+        """
+        Return body compressed with `encoding`, or None if it isn’t ready yet
+        """
+
+        with self._lock:
+            if encoding in self._variants:
+                return self._variants[encoding]
+
+            # Mark as under way
+            self._variants[encoding] = None
+
+        if self.executor is None:
+            self._compress(encoding)
+            return self._variants[encoding]
+
+        self.executor.submit(self._compress, encoding)
+        return None
+
+    def _compress(self, encoding):
+        try:
+            variant = compress(self.data, encoding, self.levels[encoding])
+
+        # No longer under way, so that the next request tries again
+        except Exception:
+            with self._lock:
+                del self._variants[encoding]
+            if self.executor is None:
+                raise
+            logger.exception("Compressing response body with %s failed", encoding)
+            return
+
+        with self._lock:
+            self._variants[encoding] = variant
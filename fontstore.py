@@ -0,0 +1,346 @@
+# Import third party modules
+import argparse
+import base64
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Size of base64-encoded data handed out at once by chunks(). Multiple of 4, so chunks end on full base64 quadruples.
+CHUNK_SIZE = 4 * 16 * 1024
+
+# Minimum number of seconds between two scans of the store’s directory, see FontAssetStore._evict()
+RESCAN_INTERVAL = 60
+
+
+class FontAssetStore(object):
+    """
+    On-disk store of base64-encoded font data, identified by each font’s `uniqueID` and version.
+
+    Font binaries are immutable per version, so there is no need to encode them again for every
+    `installFonts` request. Each font gets encoded once, either ahead of time (see `python fontstore.py warm`)
+    or when it is first requested, and is afterwards read through memory-mapped files straight from the
+    operating system’s page cache, which is shared by all worker processes.
+
+    The store is bounded by `maxSize` bytes. When it grows larger, the least recently used fonts are removed.
+    Each process keeps a running total of the fonts it knows of, which adding and removing fonts update.
+    All processes using the same directory share the bound: when the total exceeds `maxSize`, the directory is
+    scanned again first (at most every `rescanInterval` seconds), so that fonts added by other processes are counted
+    and fonts removed by them aren’t. Fonts that this process hasn’t used itself count as least recently used,
+    in the order they were added.
+    """
+
+    # Extension of the stored files
+    EXTENSION = ".b64"
+
+    def __init__(self, directory, maxSize=2 * 1024 * 1024 * 1024, rescanInterval=RESCAN_INTERVAL):
+
+        self.directory = directory
+        self.maxSize = maxSize
+        self.rescanInterval = rescanInterval
+        os.makedirs(self.directory, exist_ok=True)
+
+        # In-memory index of `filename: size`, ordered from least to most recently used.
+        # Built from the files already present, oldest first.
+        self._lock = threading.Lock()
+        self._files = OrderedDict()
+        self._size = 0
+        self._rescanned = None
+        self._rescan()
+
+    def filename(self, uniqueID, version):
+        """
+        Return file name of a font’s encoded data within the store’s directory
+        """
+
+        return hashlib.sha256(f"{uniqueID}/{version}".encode()).hexdigest() + self.EXTENSION
+
+    def encode(self, binaryFontData):
+        """
+        Return `binaryFontData` as stored
+        """
+
+        return base64.b64encode(binaryFontData)
+
+    def get(self, __fontDataSource__):
+        """
+        Return base64-encoded data of `__fontDataSource__` as a string, encoding it first if necessary
+        """
+
+        filename = self.ensure(__fontDataSource__)
+
+        try:
+            return self._read(filename)
+
+        # File was removed in the meantime by another process, so encode again
+        except FileNotFoundError:
+            self._forget(filename)
+            return self._read(self.ensure(__fontDataSource__))
+
+    def _read(self, filename):
+        with open(os.path.join(self.directory, filename), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            # Decoded straight from the mapped file, without copying it into bytes first
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return str(data, "ascii")
+
+    def chunks(self, __fontDataSource__, chunkSize=CHUNK_SIZE):
+        """
+        Generator yielding base64-encoded data of `__fontDataSource__` in chunks,
+        for use with streaming.StreamedAssets
+        """
+
+        filename = self.ensure(__fontDataSource__)
+
+        try:
+            f = open(os.path.join(self.directory, filename), "rb")
+
+        # File was removed in the meantime by another process, so encode again
+        except FileNotFoundError:
+            self._forget(filename)
+            f = open(os.path.join(self.directory, self.ensure(__fontDataSource__)), "rb")
+
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data, memoryview(data) as view:
+                for position in range(0, len(data), chunkSize):
+                    yield str(view[position : position + chunkSize], "ascii")
+
+    def put(self, __fontDataSource__):
+        """
+        Encode and save font data of `__fontDataSource__`, replacing an existing file
+        """
+
+        filename = self.filename(__fontDataSource__.__uniqueID__, __fontDataSource__.__version__)
+        encoded = self.encode(__fontDataSource__.__binaryFontData__)
+
+        # Write to temporary file first and then move it into place,
+        # so that other processes never read a half-written file
+        fileDescriptor, temporaryPath = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fileDescriptor, "wb") as f:
+                f.write(encoded)
+            os.replace(temporaryPath, os.path.join(self.directory, filename))
+        except BaseException:
+            os.remove(temporaryPath)
+            raise
+
+        with self._lock:
+            self._size -= self._files.pop(filename, 0)
+            self._files[filename] = len(encoded)
+            self._size += len(encoded)
+        self._evict()
+
+        return filename
+
+    def ensure(self, __fontDataSource__):
+        """
+        Make sure that the font is in the store, return its file name
+        """
+
+        filename = self.filename(__fontDataSource__.__uniqueID__, __fontDataSource__.__version__)
+
+        with self._lock:
+            if filename in self._files:
+                self._files.move_to_end(filename)
+                return filename
+
+        # Another process may have created it already
+        if self._adopt(filename):
+            return filename
+
+        return self.put(__fontDataSource__)
+
+    def _adopt(self, filename):
+        """
+        Add file stored by another process to the index, and make room for it.
+        Returns False if there is no such file.
+        """
+
+        try:
+            size = os.path.getsize(os.path.join(self.directory, filename))
+        except FileNotFoundError:
+            return False
+
+        with self._lock:
+            self._size -= self._files.pop(filename, 0)
+            self._files[filename] = size
+            self._size += size
+        self._evict()
+
+        return True
+
+    def _forget(self, filename):
+        with self._lock:
+            self._size -= self._files.pop(filename, 0)
+
+    def _rescan(self):
+        """
+        Bring the index up to date with the files in the directory, which other processes add to and remove from
+        """
+
+        entries = {}
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.EXTENSION):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries[entry.name] = (stat.st_mtime, stat.st_size)
+
+        with self._lock:
+
+            # Files unknown to this process come first, as least recently used, oldest first
+            files = OrderedDict(
+                (filename, entries[filename][1])
+                for filename in sorted(entries, key=lambda filename: entries[filename][0])
+                if filename not in self._files
+            )
+
+            # Then the files of the index in their order, unless they have been removed
+            for filename in self._files:
+                if filename in entries:
+                    files[filename] = entries[filename][1]
+
+            self._files = files
+            self._size = sum(files.values())
+            self._rescanned = time.monotonic()
+
+    def _evict(self):
+        """
+        Remove least recently used files until the store fits into `maxSize` again
+        """
+
+        # Before removing anything, count what other processes have added and removed since the last scan
+        with self._lock:
+            rescan = self._size > self.maxSize and time.monotonic() - self._rescanned >= self.rescanInterval
+        if rescan:
+            self._rescan()
+
+        while True:
+            with self._lock:
+                if self._size <= self.maxSize or len(self._files) <= 1:
+                    return
+                filename, size = self._files.popitem(last=False)
+                self._size -= size
+
+            # Files still memory-mapped by other requests stay readable until they are closed
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """
+        Remove all files from the store
+        """
+
+        with self._lock:
+            filenames = list(self._files)
+            self._files.clear()
+            self._size = 0
+
+        for filename in filenames:
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """
+        Return statistics as a dictionary, of all processes using the store
+        """
+
+        self._rescan()
+        with self._lock:
+            return {"fonts": len(self._files), "size": self._size, "maxSize": self.maxSize}
+
+
+class FontFileStore(FontAssetStore):
+    """
+    On-disk store of raw font files, identified by each font’s `uniqueID` and version,
+    to be sent out as they are by the download route of app.py (see app.FONT_DOWNLOAD_URL)
+    """
+
+    EXTENSION = ".font"
+
+    def encode(self, binaryFontData):
+        return binaryFontData
+
+    def path(self, __fontDataSource__, again=False):
+        """
+        Return path of the font file of `__fontDataSource__`, storing it first if necessary,
+        or in any case with `again`, for instance when the file has been found missing
+        """
+
+        filename = self.put(__fontDataSource__) if again else self.ensure(__fontDataSource__)
+        return os.path.join(self.directory, filename)
+
+    def find(self, uniqueID, version):
+        """
+        Return path of a stored font file, or None if it isn’t stored
+        """
+
+        filename = self.filename(uniqueID, version)
+        path = os.path.join(self.directory, filename)
+
+        with self._lock:
+            if filename in self._files:
+                self._files.move_to_end(filename)
+                return path
+
+        # Another process may have stored it
+        if self._adopt(filename):
+            return path
+
+        return None
+
+
+def main():
+    """
+    Command line interface to prepare the store ahead of time, for instance when deploying a new catalog:
+
+        python fontstore.py warm
+    """
+
+    # Import here so that importing this module from app.py doesn’t import app.py again
+    import app
+
+    parser = argparse.ArgumentParser(description="Manage the store of pre-encoded font data")
+    parser.add_argument("action", choices=["warm", "stats", "clear"])
+    parser.add_argument("--directory", default=app.FONT_ASSET_STORE_DIRECTORY)
+    parser.add_argument("--max-size", type=int, default=app.FONT_ASSET_STORE_MAX_SIZE)
+    parser.add_argument("--force", action="store_true", help="Encode fonts again even if they are already stored")
+    arguments = parser.parse_args()
+
+    if not arguments.directory:
+        parser.error("No directory given and FONT_ASSET_STORE_DIRECTORY isn’t set in app.py")
+
+    store = FontAssetStore(arguments.directory, arguments.max_size)
+
+    if arguments.action == "warm":
+
+        # Encode all fonts of the whole catalog
+        # Note: __allFontDataSources__() doesn’t exist in this sample code
+        count = 0
+        for __fontDataSource__ in app.__allFontDataSources__():
+            if arguments.force:
+                store.put(__fontDataSource__)
+            else:
+                store.ensure(__fontDataSource__)
+            count += 1
+        print(f"Stored {count} fonts")
+
+    elif arguments.action == "clear":
+        store.clear()
+
+    print(store.stats())
+
+
+if __name__ == "__main__":
+    main()
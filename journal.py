@@ -0,0 +1,414 @@
+# Import third party modules
+import atexit
+import itertools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# File locks are only available on Unix
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Journal files are rewritten without the already flushed entries once they grow larger than this
+COMPACT_SIZE = 16 * 1024 * 1024
+
+
+class JournalFull(Exception):
+    """
+    Raised when the journal’s backlog stays full for longer than the backpressure timeout,
+    usually because the data source can’t keep up or is down
+    """
+
+
+class InstallationJournal(object):
+    """
+    Write-behind journal for changes to font installation records.
+
+    Changes are appended to a local journal file (and synced to disk) with append(), which is all that
+    a request has to wait for. Appends that come in while the file is being synced are written right away
+    and then synced together with the next sync (group commit), so that they don’t wait for one sync each. A background thread then hands them over to the data source in batches
+    with `commit(subscriptionID, anonymousAppID, changes)`, merging all changes of the same subscription and app instance
+    in a batch, in their original order.
+
+    Each process writes its own file in `directory` and holds a lock on it. Files without a lock belong to
+    processes that have ended before all of their changes were flushed. recover() flushes them (call it on startup),
+    and the background thread of each running process adopts them as it comes across them.
+
+    Changes are saved at least once: if a process ends just between handing a batch to the data source and
+    marking it as flushed in its journal, that batch is handed over again.
+
+    At most `maxBacklog` entries (one for each request that changed installation records) wait to be flushed. Beyond that, append() waits for the background thread
+    to catch up for up to `backpressureTimeout` seconds, and then raises JournalFull.
+    """
+
+    def __init__(
+        self, directory, commit, maxBacklog=10000, batchSize=500, flushInterval=1, backpressureTimeout=5, fsync=True
+    ):
+
+        if fcntl is None:
+            raise RuntimeError("InstallationJournal requires fcntl, which isn’t available on this system")
+
+        self.directory = directory
+        self.commit = commit
+        self.maxBacklog = maxBacklog
+        self.batchSize = batchSize
+        self.flushInterval = flushInterval
+        self.backpressureTimeout = backpressureTimeout
+        self.fsync = fsync
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Entries not flushed yet, as `sequence: (subscriptionID, anonymousAppID, changes)`, oldest first,
+        # and their sequence numbers by `(subscriptionID, anonymousAppID)`
+        self._pending = OrderedDict()
+        self._pendingByApp = {}
+        self._sequence = 0
+        self._condition = threading.Condition()
+
+        # Number of records written to the journal file, and how many of them have been synced to disk.
+        # Only one thread syncs at a time, and the others wait for it and then find their records synced, too.
+        self._written = 0
+        self._synced = 0
+        self._syncLock = threading.Lock()
+
+        # Journal file and background thread of this process, started with the first change after a fork
+        self._pid = None
+        self._fileDescriptor = None
+        self._path = None
+        self._stopped = False
+
+        # Statistics
+        self.flushed = 0
+        self.failures = 0
+
+    def append(self, subscriptionID, anonymousAppID, changes):
+        """
+        Save `changes` (as a list of `(action, fontID, details)`, see app.FontInstallationChanges)
+        to the journal, to be flushed to the data source later
+        """
+
+        self._start()
+
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self._pending) < self.maxBacklog, self.backpressureTimeout):
+                raise JournalFull(f"{len(self._pending)} entries are waiting to be flushed")
+            written = self._add(subscriptionID, anonymousAppID, [list(change) for change in changes])
+
+            if len(self._pending) >= self.batchSize:
+                self._condition.notify_all()
+
+        # Synced outside of the lock, so that other requests can append (and look up pending changes) meanwhile
+        self._sync(written)
+
+    def pending(self, subscriptionID, anonymousAppID):
+        """
+        Return changes of this subscription on this app instance that haven’t been flushed yet, oldest first.
+
+        Changes that are being flushed right now are included until they are done, so for a moment they may be
+        found both here and in the data source. Changes waiting in other processes are not included.
+        """
+
+        with self._condition:
+            if self._pid != os.getpid():
+                return []
+            return [
+                change
+                for sequence in self._pendingByApp.get((subscriptionID, anonymousAppID), ())
+                for change in self._pending[sequence][2]
+            ]
+
+    def backlog(self):
+        """
+        Return number of entries waiting to be flushed in this process
+        """
+
+        with self._condition:
+            return len(self._pending) if self._pid == os.getpid() else 0
+
+    def recover(self):
+        """
+        Flush the journals of processes that have ended, for instance after a restart.
+        Journals that can’t be flushed completely are left for the background thread to adopt.
+        """
+
+        for fileDescriptor, path, entries in self._orphans():
+            try:
+                if not self._commitBatch(list(entries.items())):
+                    os.remove(path)
+            finally:
+                os.close(fileDescriptor)
+
+    def close(self):
+        """
+        Flush all remaining changes of this process and stop its background thread
+        """
+
+        with self._condition:
+            if self._pid != os.getpid() or self._stopped:
+                return
+            self._stopped = True
+            self._condition.notify_all()
+
+        self._thread.join()
+        with self._condition:
+            batch = list(self._pending.items())
+        self._flush(batch)
+
+    ##################################################################
+    # Journal file
+
+    def _start(self):
+        """
+        Open this process’s journal file and start the background thread, unless already done
+        """
+
+        with self._condition:
+            if self._pid == os.getpid():
+                return
+
+            # Entries and the file of the parent process stay with the parent after a fork
+            self._pending = OrderedDict()
+            self._pendingByApp = {}
+            self._sequence = 0
+            self._written = 0
+            self._synced = 0
+            self._syncLock = threading.Lock()
+            self._stopped = False
+
+            self._path = os.path.join(self.directory, f"{os.getpid()}-{time.time_ns()}.journal")
+            self._fileDescriptor = os.open(self._path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            fcntl.flock(self._fileDescriptor, fcntl.LOCK_EX)
+            self._pid = os.getpid()
+
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+        # Flush what’s left when the process ends
+        atexit.register(self.close)
+
+    def _write(self, record):
+        """
+        Append `record` to the journal file, without syncing it to disk yet (see _sync()).
+        Needs to be called with the lock held. Returns the number of records written so far.
+        """
+
+        os.write(self._fileDescriptor, (json.dumps(record, separators=(",", ":")) + "\n").encode())
+        self._written += 1
+        return self._written
+
+    def _sync(self, written):
+        """
+        Make sure that the first `written` records are synced to disk. Needs to be called without the lock held.
+        """
+
+        if not self.fsync:
+            return
+
+        with self._syncLock:
+
+            # Synced by another thread in the meantime
+            if self._synced >= written:
+                return
+
+            # Everything written until now is covered by this sync. The file descriptor is duplicated,
+            # as _compact() may close it meanwhile (after syncing everything still pending into a new file).
+            with self._condition:
+                target = self._written
+                fileDescriptor = os.dup(self._fileDescriptor)
+
+            try:
+                os.fsync(fileDescriptor)
+            finally:
+                os.close(fileDescriptor)
+
+            self._synced = max(self._synced, target)
+
+    def _add(self, subscriptionID, anonymousAppID, changes):
+        """
+        Write entry to the journal and add it to the pending entries. Needs to be called with the lock held.
+        Returns the number of records written so far, see _sync().
+        """
+
+        self._sequence += 1
+        written = self._write(
+            {"sequence": self._sequence, "subscriptionID": subscriptionID, "anonymousAppID": anonymousAppID, "changes": changes}
+        )
+        self._pending[self._sequence] = (subscriptionID, anonymousAppID, changes)
+        self._pendingByApp.setdefault((subscriptionID, anonymousAppID), []).append(self._sequence)
+        return written
+
+    def _compact(self):
+        """
+        Rewrite the journal file with only the pending entries. Needs to be called with the lock held.
+        """
+
+        # Nothing left, so start over
+        if not self._pending:
+            os.ftruncate(self._fileDescriptor, 0)
+            return
+
+        if os.fstat(self._fileDescriptor).st_size < COMPACT_SIZE:
+            return
+
+        # The new file is locked before it is moved into place, so that no other process takes it for an orphan
+        fileDescriptor, temporaryPath = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        fcntl.flock(fileDescriptor, fcntl.LOCK_EX)
+        oldFileDescriptor, self._fileDescriptor = self._fileDescriptor, fileDescriptor
+        for sequence, (subscriptionID, anonymousAppID, changes) in self._pending.items():
+            self._write(
+                {"sequence": sequence, "subscriptionID": subscriptionID, "anonymousAppID": anonymousAppID, "changes": changes}
+            )
+        os.fsync(fileDescriptor)
+        os.replace(temporaryPath, self._path)
+        os.close(oldFileDescriptor)
+
+    ##################################################################
+    # Background thread
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopped or len(self._pending) >= self.batchSize, self.flushInterval)
+                if self._stopped:
+                    return
+                batch = list(itertools.islice(self._pending.items(), self.batchSize))
+
+            self._adoptOrphans()
+
+            # Wait a bit before trying again when the data source fails
+            if batch and self._flush(batch):
+                time.sleep(self.flushInterval)
+
+    def _flush(self, batch):
+        """
+        Hand `batch` of pending entries over to the data source, and remove the ones that were saved.
+        Returns True if any of them failed.
+        """
+
+        remaining = self._commitBatch(batch)
+        done = [sequence for sequence, entry in batch if sequence not in remaining]
+
+        written = None
+        with self._condition:
+            if done:
+                written = self._write({"flushed": done})
+            for sequence in done:
+                subscriptionID, anonymousAppID, changes = self._pending.pop(sequence)
+                sequences = self._pendingByApp[(subscriptionID, anonymousAppID)]
+                sequences.remove(sequence)
+                if not sequences:
+                    del self._pendingByApp[(subscriptionID, anonymousAppID)]
+            self._compact()
+            self.flushed += len(done)
+            self._condition.notify_all()
+
+        if written:
+            self._sync(written)
+
+        return bool(remaining)
+
+    def _commitBatch(self, batch):
+        """
+        Commit `batch` of `(sequence, (subscriptionID, anonymousAppID, changes))`, merging the changes of each
+        subscription and app instance. Returns the sequence numbers of the entries that failed.
+        """
+
+        groups = OrderedDict()
+        for sequence, (subscriptionID, anonymousAppID, changes) in batch:
+            sequences, groupChanges = groups.setdefault((subscriptionID, anonymousAppID), ([], []))
+            sequences.append(sequence)
+            groupChanges.extend(changes)
+
+        remaining = set()
+        for (subscriptionID, anonymousAppID), (sequences, changes) in groups.items():
+            try:
+                self.commit(subscriptionID, anonymousAppID, changes)
+            except Exception:
+                logger.exception("Flushing installation records of %s failed", subscriptionID)
+                self.failures += 1
+                remaining.update(sequences)
+
+        return remaining
+
+    ##################################################################
+    # Journals of ended processes
+
+    def _orphans(self):
+        """
+        Generator yielding `(fileDescriptor, path, entries)` of journal files that no running process holds a lock on,
+        locked and still open, with their entries that haven’t been flushed as `sequence: entry`
+        """
+
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".journal") or entry.path == self._path:
+                continue
+
+            try:
+                fileDescriptor = os.open(entry.path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+
+            try:
+                fcntl.flock(fileDescriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fileDescriptor)
+                continue
+
+            # Another process has dealt with it in the meantime
+            if os.fstat(fileDescriptor).st_nlink == 0:
+                os.close(fileDescriptor)
+                continue
+
+            yield fileDescriptor, entry.path, readJournal(fileDescriptor)
+
+    def _adoptOrphans(self):
+        """
+        Move the pending entries of ended processes’ journals into this one
+        """
+
+        for fileDescriptor, path, entries in self._orphans():
+            try:
+                written = 0
+                with self._condition:
+                    for subscriptionID, anonymousAppID, changes in entries.values():
+                        written = self._add(subscriptionID, anonymousAppID, changes)
+
+                # Only remove the orphan once its entries are safely in this journal
+                self._sync(written)
+                os.remove(path)
+            finally:
+                os.close(fileDescriptor)
+
+
+def readJournal(fileDescriptor):
+    """
+    Return entries of the journal file open as `fileDescriptor` that haven’t been flushed,
+    as `sequence: (subscriptionID, anonymousAppID, changes)`
+    """
+
+    with os.fdopen(os.dup(fileDescriptor), "rb") as f:
+        lines = f.read().split(b"\n")
+
+    # The last line is either empty or was cut off while being written, so it was never confirmed
+    entries = OrderedDict()
+    for line in lines[:-1]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            logger.error("Skipping damaged line in installation journal: %r", line)
+            continue
+
+        if "flushed" in record:
+            for sequence in record["flushed"]:
+                entries.pop(sequence, None)
+        else:
+            entries[record["sequence"]] = (record["subscriptionID"], record["anonymousAppID"], record["changes"])
+
+    return entries
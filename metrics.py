@@ -0,0 +1,147 @@
+# Import third party modules
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Default histogram buckets in seconds, from 1 millisecond to 10 seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Registry(object):
+    """
+    Collection of metrics, rendered together in the Prometheus text format
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.callbacks = []
+
+    def counter(self, name, help, labelNames=()):
+        metric = Counter(name, help, labelNames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelNames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labelNames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def callback(self, name, help, type, labelNames, function):
+        """
+        Add metric whose values are read from `function()` at the time of rendering,
+        returned as a dictionary of `(labelValue, ...): value`
+        """
+
+        self.callbacks.append((name, help, type, labelNames, function))
+
+    def render(self):
+        """
+        Return all metrics in the Prometheus text format
+        """
+
+        lines = []
+
+        for metric in self.metrics:
+            lines.extend(metric.render())
+
+        for name, help, type, labelNames, function in self.callbacks:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type}")
+            for labelValues, value in sorted(function().items()):
+                lines.append(f"{name}{formatLabels(labelNames, labelValues)} {formatValue(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+class Counter(object):
+    """
+    Counter with optional labels
+    """
+
+    def __init__(self, name, help, labelNames=()):
+        self.name = name
+        self.help = help
+        self.labelNames = tuple(labelNames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelValues, amount=1):
+        with self._lock:
+            self._values[labelValues] = self._values.get(labelValues, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labelValues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{formatLabels(self.labelNames, labelValues)} {formatValue(value)}")
+        return lines
+
+
+class Histogram(object):
+    """
+    Histogram with optional labels
+    """
+
+    def __init__(self, name, help, labelNames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelNames = tuple(labelNames)
+        self.buckets = tuple(sorted(buckets))
+
+        # Per label values: [count per bucket (plus one for +Inf), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelValues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelValues)
+            if entry is None:
+                entry = self._values[labelValues] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labelValues):
+        """
+        Context manager observing the time spent inside it in seconds
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelValues)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labelValues, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    labels = formatLabels(self.labelNames + ("le",), labelValues + (formatValue(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = formatLabels(self.labelNames, labelValues)
+                lines.append(f"{self.name}_sum{labels} {formatValue(total)}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def formatLabels(labelNames, labelValues):
+    if not labelNames:
+        return ""
+    labels = []
+    for name, value in zip(labelNames, labelValues):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        labels.append(f'{name}="{value}"')
+    return "{" + ",".join(labels) + "}"
+
+
+def formatValue(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
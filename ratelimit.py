@@ -0,0 +1,176 @@
+# Import third party modules
+import hashlib
+import mmap
+import multiprocessing
+import struct
+import time
+
+# One slot of the table per client:
+# hash of the client’s key (0 for empty slots), tokens, time of the last request,
+# strikes, beginning of the current strike window, end of the block
+SLOT = struct.Struct("<Qddddd")
+
+# Slots are arranged in groups, and each client can only be found in the group that its key hash points to.
+# This keeps lookups short, and each group is protected by one of LOCKS locks.
+GROUP_SIZE = 8
+LOCKS = 64
+
+
+class RateLimiter(object):
+    """
+    Token-bucket rate limiter with a temporary block list, kept in memory that is shared by all worker processes.
+
+    Each client (identified by a key such as its IP address) has a bucket of `burst` tokens that is refilled
+    at `rate` tokens per second. Each request takes one token, and once there are none left, requests are rejected.
+    Clients that collect `blockThreshold` strikes (see strike()) within `blockWindow` seconds
+    are blocked entirely for `blockDuration` seconds.
+
+    The table lives in an anonymous shared memory map, so all worker processes that are forked after
+    the limiter has been created (such as the workers of server.py, which loads app.py before forking) share it.
+    It holds up to `slots` clients. When full, the client that was seen the longest time ago is forgotten.
+    """
+
+    def __init__(self, slots=65536, blockThreshold=20, blockWindow=60, blockDuration=600):
+
+        self.groups = max(1, slots // GROUP_SIZE)
+        self.blockThreshold = blockThreshold
+        self.blockWindow = blockWindow
+        self.blockDuration = blockDuration
+
+        self._table = mmap.mmap(-1, self.groups * GROUP_SIZE * SLOT.size)
+        self._locks = [multiprocessing.Lock() for i in range(LOCKS)]
+
+    def allow(self, key, rate, burst):
+        """
+        Take one token from the bucket of `key`, refilled at `rate` tokens per second up to `burst` tokens.
+        Returns False if there is no token left, or if `key` is blocked.
+        """
+
+        now = time.monotonic()
+
+        with self._lock(key) as (offset, keyHash):
+            found, tokens, updated, strikes, windowStart, blockedUntil = self._read(offset, keyHash, now)
+
+            # New clients start out with a full bucket
+            if not found:
+                tokens = burst
+            else:
+                tokens = min(burst, tokens + (now - updated) * rate)
+
+            allowed = blockedUntil <= now and tokens >= 1
+            if allowed:
+                tokens -= 1
+
+            SLOT.pack_into(self._table, offset, keyHash, tokens, now, strikes, windowStart, blockedUntil)
+
+        return allowed
+
+    def strike(self, key, burst):
+        """
+        Count a strike against `key`, for instance for a malformed request,
+        and block it once it has collected too many. Returns True if `key` is blocked now.
+        `burst` is the size of the bucket of `key` as given to allow().
+        """
+
+        now = time.monotonic()
+
+        with self._lock(key) as (offset, keyHash):
+            found, tokens, updated, strikes, windowStart, blockedUntil = self._read(offset, keyHash, now)
+
+            # New clients start out with a full bucket, as in allow()
+            if not found:
+                tokens, updated = burst, now
+
+            # Start a new strike window
+            if now - windowStart > self.blockWindow:
+                strikes, windowStart = 0, now
+
+            strikes += 1
+            if strikes >= self.blockThreshold:
+                blockedUntil = now + self.blockDuration
+                strikes, windowStart = 0, now
+
+            SLOT.pack_into(self._table, offset, keyHash, tokens, updated, strikes, windowStart, blockedUntil)
+
+        return blockedUntil > now
+
+    def blocked(self, key):
+        """
+        Return True if `key` is blocked
+        """
+
+        now = time.monotonic()
+        with self._lock(key) as (offset, keyHash):
+            found, tokens, updated, strikes, windowStart, blockedUntil = self._read(offset, keyHash, now)
+        return found and blockedUntil > now
+
+    def clear(self):
+        """
+        Forget all clients
+        """
+
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            self._table[:] = bytes(len(self._table))
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def _lock(self, key):
+        return _GroupLock(self, key)
+
+    def _read(self, offset, keyHash, now):
+        """
+        Return `found, tokens, updated, strikes, windowStart, blockedUntil` of the slot at `offset`
+        """
+
+        storedHash, tokens, updated, strikes, windowStart, blockedUntil = SLOT.unpack_from(self._table, offset)
+        if storedHash != keyHash:
+            return False, 0.0, now, 0.0, 0.0, 0.0
+        return True, tokens, updated, strikes, windowStart, blockedUntil
+
+    def _slot(self, group, keyHash):
+        """
+        Return offset of the slot for `keyHash` in `group`: the client’s own slot, an empty one,
+        or the one of the client that was seen the longest time ago. Needs to be called with the group’s lock held.
+        """
+
+        oldest, oldestUpdated = None, None
+
+        for i in range(GROUP_SIZE):
+            offset = (group * GROUP_SIZE + i) * SLOT.size
+            storedHash, tokens, updated, strikes, windowStart, blockedUntil = SLOT.unpack_from(self._table, offset)
+
+            if storedHash == keyHash or storedHash == 0:
+                return offset
+
+            # Blocked clients are only replaced once all others have been
+            if blockedUntil > time.monotonic():
+                updated += self.blockDuration
+
+            if oldest is None or updated < oldestUpdated:
+                oldest, oldestUpdated = offset, updated
+
+        return oldest
+
+
+class _GroupLock(object):
+    """
+    Holds the lock of the group of `key` while looking up and updating its slot
+    """
+
+    def __init__(self, limiter, key):
+        self.limiter = limiter
+
+        # 0 marks empty slots
+        self.keyHash = int.from_bytes(hashlib.blake2b(repr(key).encode(), digest_size=8).digest(), "little") or 1
+        self.group = self.keyHash % limiter.groups
+        self.lock = limiter._locks[self.group % LOCKS]
+
+    def __enter__(self):
+        self.lock.acquire()
+        return self.limiter._slot(self.group, self.keyHash), self.keyHash
+
+    def __exit__(self, *exc):
+        self.lock.release()
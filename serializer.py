@@ -0,0 +1,326 @@
+# Import typeworld module
+import typeworld.api
+
+# Import third party modules
+import json
+from json.encoder import encode_basestring_ascii
+
+
+def dumpJSON(root, fragments=None, original=False):
+    """
+    Fast replacement for `root.dumpJSON()`.
+
+    Returns the identical JSON string, but walks the object tree directly instead of going through
+    the generic attribute access of `typeworld.api`, using a field layout that is prepared once per class.
+    The object tree is not validated again. If you want to validate it, do so while you build it,
+    or use `root.dumpJSON(validate=True)` during development.
+
+    `fragments` may hold already serialized attributes of `root` as `key: fragment` (see fragment()),
+    which are spliced into the output as they are, instead of the respective attributes of `root`.
+
+    With `original`, the attributes of `root` are put out with `root.dumpDict()` and the json module instead,
+    just like `root.dumpJSON()` does, which is slower but independent of this module (see verify()).
+    """
+
+    if not fragments:
+        if original:
+            return root.dumpJSON()
+
+        d = dumpDict(root)
+
+        try:
+            return encodeJSON(d)
+
+        # Data that the fast encoder doesn’t handle, so leave it to the json module
+        except _Unsupported:
+            return json.dumps(d, indent=4, sort_keys=True)
+
+    if original:
+        d = {key: value for key, value in root.dumpDict(validate=False).items() if key not in fragments}
+    else:
+        d = dumpDict(root, skipKeys=fragments)
+
+    parts = []
+    separator = "{\n    "
+    for key in sorted(set(d) | set(fragments)):
+        parts.append(separator)
+        parts.append(encode_basestring_ascii(key))
+        parts.append(": ")
+        if key in fragments:
+            parts.append(fragments[key])
+        elif original:
+            parts.append(_dumpsNested(d[key]))
+        else:
+            parts.append(_encodeNested(d[key]))
+        separator = ",\n    "
+    parts.append("\n}")
+
+    return "".join(parts)
+
+
+def fragment(o, original=False):
+    """
+    Return JSON string of `o` to be spliced into the root object’s output by dumpJSON().
+    `o` needs to be one of the root object’s direct attributes, such as an `InstallableFontsResponse`.
+    With `original`, `o` is put out with `o.dumpDict()` and the json module instead, see dumpJSON().
+    """
+
+    if original:
+        return _dumpsNested(o.dumpDict(validate=False))
+
+    return _encodeNested(dumpDict(o))
+
+
+def _encodeNested(d):
+    """
+    Encode `d` indented by one level, as a direct attribute of the root object
+    """
+
+    parts = []
+
+    try:
+        _encode(d, "\n    ", parts)
+        return "".join(parts)
+
+    except _Unsupported:
+        return _dumpsNested(d)
+
+
+def _dumpsNested(d):
+    """
+    Encode `d` indented by one level with the json module, just like `root.dumpJSON()` does
+    """
+
+    return json.dumps(d, indent=4, sort_keys=True).replace("\n", "\n    ")
+
+
+def dumpDict(o, skipKeys=()):
+    """
+    Fast replacement for `o.dumpDict(validate=False)` for any `typeworld.api.DictBasedObject`.
+    Attributes in `skipKeys` are left out.
+    """
+
+    layout = _layouts.get(o.__class__)
+    if layout is None:
+        layout = _layouts[o.__class__] = Layout(o.__class__)
+
+    d = {}
+
+    # Make a copy of the attributes, as discardThisKey() may add new ones while we’re looping over them
+    for key, data in list(object.__getattribute__(o, "_content").items()):
+
+        if key in skipKeys:
+            continue
+
+        if layout.discardThisKey is not None and layout.discardThisKey(o, key) is not False:
+            continue
+
+        # Same as `getattr(o, key)`: a ListProxy stands for itself, all other data types for their value
+        if isinstance(data, typeworld.api.ListProxy):
+            attr = data
+        else:
+            attr = data.value
+
+        # Leave out attributes that are neither required nor set
+        if not (key in layout.required or attr or (hasattr(attr, "isSet") and attr.isSet())):
+            continue
+
+        # Nested object
+        if isinstance(attr, typeworld.api.DictBasedObject):
+            d[key] = dumpDict(attr)
+
+        # List
+        elif isinstance(attr, typeworld.api.ListProxy):
+            values = [item.value for item in attr.value]
+            if values and isinstance(values[0], typeworld.api.DictBasedObject):
+                values = [dumpDict(value) for value in values]
+            d[key] = values
+
+        else:
+            d[key] = attr
+
+    return d
+
+
+def encodeJSON(o):
+    """
+    Return the same string as `json.dumps(o, indent=4, sort_keys=True)` for the plain data that dumpDict() returns.
+
+    The json module encodes indented JSON in pure Python with a lot of generic overhead,
+    which makes up most of the time of dumping a large catalog, so this is a specialized version of it.
+    """
+
+    parts = []
+    _encode(o, "\n", parts)
+    return "".join(parts)
+
+
+def _encode(o, newline, parts):
+
+    if isinstance(o, str):
+        if type(o) is Raw:
+            parts.append(o)
+        else:
+            parts.append(encode_basestring_ascii(o))
+
+    elif o is None:
+        parts.append("null")
+    elif o is True:
+        parts.append("true")
+    elif o is False:
+        parts.append("false")
+
+    elif isinstance(o, int):
+        parts.append(int.__repr__(o))
+
+    elif isinstance(o, float):
+        if o != o:
+            parts.append("NaN")
+        elif o == float("inf"):
+            parts.append("Infinity")
+        elif o == -float("inf"):
+            parts.append("-Infinity")
+        else:
+            parts.append(float.__repr__(o))
+
+    elif isinstance(o, dict):
+        if not o:
+            parts.append("{}")
+            return
+
+        inner = newline + "    "
+        separator = "{" + inner
+        for key in sorted(o):
+            if not isinstance(key, str):
+                raise _Unsupported(key)
+            parts.append(separator)
+            parts.append(encode_basestring_ascii(key))
+            parts.append(": ")
+            _encode(o[key], inner, parts)
+            separator = "," + inner
+        parts.append(newline + "}")
+
+    elif isinstance(o, (list, tuple)):
+        if not o:
+            parts.append("[]")
+            return
+
+        inner = newline + "    "
+        separator = "[" + inner
+        for item in o:
+            parts.append(separator)
+            _encode(item, inner, parts)
+            separator = "," + inner
+        parts.append(newline + "]")
+
+    else:
+        raise _Unsupported(o)
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class Raw(str):
+    """
+    JSON that has already been encoded (see encodeAt()), put out as it is in place of a value
+    """
+
+
+def encodeAt(o, depth):
+    """
+    Return plain data `o` (as returned by dumpDict()) encoded as `Raw` JSON for use as a value `depth` levels deep
+    in the output of fragment() and encodeFragment(), where the direct attributes of the root object are at depth 1
+    """
+
+    parts = []
+    _encode(o, "\n" + "    " * depth, parts)
+    return Raw("".join(parts))
+
+
+def encodeFragment(d):
+    """
+    Return JSON string of plain data `d` (as returned by dumpDict(), possibly holding `Raw` values)
+    to be spliced into the root object’s output by dumpJSON(), just like fragment() does for objects
+    """
+
+    return _encodeNested(d)
+
+
+def required(objectClass):
+    """
+    Return keys of `objectClass` that are always included in the output, even when empty
+    """
+
+    layout = _layouts.get(objectClass)
+    if layout is None:
+        layout = _layouts[objectClass] = Layout(objectClass)
+    return layout.required
+
+
+class Layout(object):
+    """
+    Field layout of a `typeworld.api.DictBasedObject` subclass, prepared once per class
+    """
+
+    def __init__(self, objectClass):
+
+        # Keys that are always included in the output, even when empty
+        self.required = frozenset(key for key, structure in objectClass._structure.items() if structure[1])
+
+        # Only a few classes leave out keys depending on their content, so skip the call for all others
+        if objectClass.discardThisKey is typeworld.api.DictBasedObject.discardThisKey:
+            self.discardThisKey = None
+        else:
+            self.discardThisKey = objectClass.discardThisKey
+
+
+# Prepared layouts, as `class: Layout`
+_layouts = {}
+
+
+def prepare():
+    """
+    Prepare layouts of all classes of `typeworld.api` ahead of time
+    """
+
+    for objectClass in vars(typeworld.api).values():
+        if (
+            isinstance(objectClass, type)
+            and issubclass(objectClass, typeworld.api.DictBasedObject)
+            and objectClass is not typeworld.api.DictBasedObject
+            and objectClass not in _layouts
+        ):
+            _layouts[objectClass] = Layout(objectClass)
+
+
+def verify(root, fragments=None):
+    """
+    Compare output of dumpJSON() with that of `root.dumpJSON()`, or with `fragments`, with that of
+    `dumpJSON(root, fragments, original=True)`. Fragments themselves are not compared, see verifyFragment() for those.
+    Returns `True, None` if they are identical, or `False, message` describing the first difference.
+    """
+
+    return _compare(dumpJSON(root, fragments), dumpJSON(root, fragments, original=True))
+
+
+def verifyFragment(o):
+    """
+    Compare output of fragment() with that of `fragment(o, original=True)`, see verify()
+    """
+
+    return _compare(fragment(o), fragment(o, original=True))
+
+
+def _compare(fast, original):
+
+    if fast == original:
+        return True, None
+
+    for position, (a, b) in enumerate(zip(fast, original)):
+        if a != b:
+            break
+    else:
+        position = min(len(fast), len(original))
+
+    return False, f"Output differs at character {position}: {fast[position:position + 60]!r} != {original[position:position + 60]!r}"
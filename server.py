@@ -0,0 +1,100 @@
+"""
+Production server for the API Endpoint
+
+Runs `app.app` under gunicorn, a pre-forking WSGI server, instead of Flask’s development server:
+
+    python server.py --bind 0.0.0.0:8080 --workers 4 --threads 16
+
+app.py is loaded and warmed up once in the master process (see app.warmUp()) before the worker processes
+are forked, so that all workers share its memory pages copy-on-write, as well as the memory shared between them
+on purpose (such as the rate limiter’s table, see app.RATE_LIMIT).
+
+Each worker is replaced by a fresh one after about MAX_REQUESTS requests, to keep memory growth in check.
+
+Signals to the master process:
+- HUP: Graceful reload. New workers are forked from the master, and the old ones finish their requests first.
+  As app.py is loaded in the master, this does not pick up changes to the code.
+- USR2, then TERM to the old master: Graceful upgrade to new code. A new master loads the code and starts its
+  own workers next to the old ones, and the old master then stops once its workers have finished their requests.
+- TERM: Graceful shutdown.
+"""
+
+# Import third party modules
+import argparse
+import gc
+import os
+
+# Import gunicorn
+import gunicorn.app.base
+
+# Defaults, see main() for their command line options
+BIND = "0.0.0.0:8080"
+WORKERS = os.cpu_count() or 1
+THREADS = 16
+MAX_REQUESTS = 10000
+MAX_REQUESTS_JITTER = 1000
+TIMEOUT = 60  # seconds
+GRACEFUL_TIMEOUT = 30  # seconds
+
+
+class Server(gunicorn.app.base.BaseApplication):
+    """
+    gunicorn application loading app.py in the master process
+    """
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+
+        # Importing app.py also warms it up, see app.warmUp()
+        import app
+
+        # Move everything loaded so far out of the reach of the garbage collector,
+        # which would otherwise touch (and so copy) the shared memory pages in each worker
+        gc.collect()
+        gc.freeze()
+
+        return app.app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Production server for the API Endpoint")
+    parser.add_argument("--bind", default=BIND, help=f"Address to listen on (default: {BIND})")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Worker processes (default: {WORKERS})")
+    parser.add_argument("--threads", type=int, default=THREADS, help=f"Threads per worker (default: {THREADS})")
+    parser.add_argument("--max-requests", type=int, default=MAX_REQUESTS,
+                        help=f"Replace each worker after this many requests, 0 to never replace (default: {MAX_REQUESTS})")
+    parser.add_argument("--max-requests-jitter", type=int, default=MAX_REQUESTS_JITTER,
+                        help="Random number of requests up to this added to --max-requests for each worker, "
+                        f"so that not all workers are replaced at the same time (default: {MAX_REQUESTS_JITTER})")
+    parser.add_argument("--timeout", type=int, default=TIMEOUT,
+                        help=f"Seconds after which a silent worker is killed and replaced (default: {TIMEOUT})")
+    parser.add_argument("--graceful-timeout", type=int, default=GRACEFUL_TIMEOUT,
+                        help=f"Seconds that workers may take to finish their requests on reload (default: {GRACEFUL_TIMEOUT})")
+    parser.add_argument("--access-log", help="File to write access log to, `-` for stdout (default: none)")
+    arguments = parser.parse_args()
+
+    options = {
+        "bind": arguments.bind,
+        "workers": arguments.workers,
+        "threads": arguments.threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "max_requests": arguments.max_requests,
+        "max_requests_jitter": arguments.max_requests_jitter,
+        "timeout": arguments.timeout,
+        "graceful_timeout": arguments.graceful_timeout,
+        "accesslog": arguments.access_log,
+    }
+
+    Server(options).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,683 @@
+# Import third party modules
+import io
+import json
+import os
+import secrets
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Database schema
+# Text primary keys come with a unique index, so users are found by `subscriptionID`, fonts by their `uniqueID`,
+# and installation records by `(subscriptionID, anonymousAppID, fontID)` without scanning any table.
+# Font binaries are kept in a table of their own, so that loading the catalog never touches them.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog (
+    version INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    subscriptionID TEXT PRIMARY KEY,
+    secretKey TEXT NOT NULL,
+    accessToken TEXT,
+    catalogVersion INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS designers (
+    keyword TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS foundries (
+    uniqueID TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS licenses (
+    keyword TEXT PRIMARY KEY,
+    foundryID TEXT NOT NULL REFERENCES foundries (uniqueID),
+    name TEXT NOT NULL,
+    URL TEXT NOT NULL,
+    allowedSeats INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS licensesByFoundry ON licenses (foundryID);
+
+CREATE TABLE IF NOT EXISTS families (
+    uniqueID TEXT PRIMARY KEY,
+    foundryID TEXT NOT NULL REFERENCES foundries (uniqueID),
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS familiesByFoundry ON families (foundryID);
+
+CREATE TABLE IF NOT EXISTS versions (
+    familyID TEXT NOT NULL REFERENCES families (uniqueID),
+    number TEXT NOT NULL,
+    PRIMARY KEY (familyID, number)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fonts (
+    uniqueID TEXT PRIMARY KEY,
+    familyID TEXT NOT NULL REFERENCES families (uniqueID),
+    licenseKeyword TEXT NOT NULL REFERENCES licenses (keyword),
+    name TEXT NOT NULL,
+    postScriptName TEXT NOT NULL,
+    version TEXT NOT NULL,
+    protected INTEGER NOT NULL DEFAULT 1,
+    isTrialFont INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS fontsByFamily ON fonts (familyID);
+
+CREATE TABLE IF NOT EXISTS fontData (
+    fontID TEXT PRIMARY KEY REFERENCES fonts (uniqueID),
+    data BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS subscriptionFamilies (
+    subscriptionID TEXT NOT NULL REFERENCES users (subscriptionID),
+    familyID TEXT NOT NULL REFERENCES families (uniqueID),
+    PRIMARY KEY (subscriptionID, familyID)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS installations (
+    subscriptionID TEXT NOT NULL,
+    anonymousAppID TEXT NOT NULL,
+    fontID TEXT NOT NULL,
+    seats INTEGER NOT NULL DEFAULT 1,
+    trialInstalledStatus INTEGER,
+    fontVersion TEXT,
+    userName TEXT,
+    userEmail TEXT,
+    PRIMARY KEY (subscriptionID, anonymousAppID, fontID)
+) WITHOUT ROWID;
+
+INSERT INTO catalog (version) SELECT 1 WHERE NOT EXISTS (SELECT * FROM catalog);
+"""
+
+# Queries
+# The sqlite3 module keeps the prepared statements of each connection, identified by their SQL text,
+# so all queries are constant strings. Lists of IDs are handed over as a JSON array to keep the SQL text constant.
+
+# The catalog version of a user is the sum of the user’s own version and the global version,
+# both of which only ever increase, so it changes whenever either of them does.
+USER = """
+SELECT secretKey, accessToken, catalogVersion + (SELECT version FROM catalog)
+FROM users WHERE subscriptionID = ?
+"""
+ASSIGN_ACCESS_TOKEN = "UPDATE users SET accessToken = ? WHERE subscriptionID = ?"
+
+DESIGNERS = "SELECT keyword, name FROM designers ORDER BY keyword"
+
+FOUNDRIES_OF_SUBSCRIPTION = """
+SELECT DISTINCT foundries.uniqueID, foundries.name
+FROM subscriptionFamilies
+JOIN families ON families.uniqueID = subscriptionFamilies.familyID
+JOIN foundries ON foundries.uniqueID = families.foundryID
+WHERE subscriptionFamilies.subscriptionID = ?
+ORDER BY foundries.uniqueID
+"""
+LICENSES_OF_SUBSCRIPTION = """
+SELECT keyword, foundryID, name, URL, allowedSeats
+FROM licenses
+WHERE foundryID IN (
+    SELECT families.foundryID
+    FROM subscriptionFamilies
+    JOIN families ON families.uniqueID = subscriptionFamilies.familyID
+    WHERE subscriptionFamilies.subscriptionID = ?
+)
+ORDER BY keyword
+"""
+FAMILIES_OF_SUBSCRIPTION = """
+SELECT families.uniqueID, families.foundryID, families.name
+FROM subscriptionFamilies
+JOIN families ON families.uniqueID = subscriptionFamilies.familyID
+WHERE subscriptionFamilies.subscriptionID = ?
+ORDER BY families.uniqueID
+"""
+VERSIONS_OF_SUBSCRIPTION = """
+SELECT versions.familyID, versions.number
+FROM subscriptionFamilies
+JOIN versions ON versions.familyID = subscriptionFamilies.familyID
+WHERE subscriptionFamilies.subscriptionID = ?
+ORDER BY versions.familyID, versions.number
+"""
+
+FAMILY_IDS_OF_SUBSCRIPTION = "SELECT familyID FROM subscriptionFamilies WHERE subscriptionID = ? ORDER BY familyID"
+
+# The whole catalog, see catalog.py
+ALL_FOUNDRIES = "SELECT uniqueID, name FROM foundries ORDER BY uniqueID"
+ALL_LICENSES = "SELECT keyword, foundryID, name, URL, allowedSeats FROM licenses ORDER BY keyword"
+ALL_FAMILIES = "SELECT uniqueID, foundryID, name FROM families ORDER BY uniqueID"
+ALL_VERSIONS = "SELECT familyID, number FROM versions ORDER BY familyID, number"
+CATALOG_VERSION = "SELECT version FROM catalog"
+
+# The families of all subscriptions, see catalog.Entitlements
+ALL_USER_CATALOG_VERSIONS = "SELECT subscriptionID, catalogVersion + (SELECT version FROM catalog) FROM users"
+ALL_SUBSCRIPTION_FAMILIES = "SELECT subscriptionID, familyID FROM subscriptionFamilies"
+
+FONT_COLUMNS = """
+fonts.uniqueID, fonts.familyID, fonts.name, fonts.postScriptName, fonts.version, fonts.protected, fonts.isTrialFont,
+licenses.keyword, licenses.foundryID, licenses.name, licenses.URL, licenses.allowedSeats
+"""
+FONTS_OF_SUBSCRIPTION = f"""
+SELECT {FONT_COLUMNS}
+FROM subscriptionFamilies
+JOIN fonts ON fonts.familyID = subscriptionFamilies.familyID
+JOIN licenses ON licenses.keyword = fonts.licenseKeyword
+WHERE subscriptionFamilies.subscriptionID = ?
+ORDER BY fonts.familyID, fonts.uniqueID
+"""
+FONTS_OF_SUBSCRIPTION_BY_ID = f"""
+SELECT {FONT_COLUMNS}
+FROM fonts
+JOIN subscriptionFamilies ON subscriptionFamilies.familyID = fonts.familyID AND subscriptionFamilies.subscriptionID = ?
+JOIN licenses ON licenses.keyword = fonts.licenseKeyword
+WHERE fonts.uniqueID IN (SELECT value FROM json_each(?))
+"""
+ALL_FONTS = f"""
+SELECT {FONT_COLUMNS}
+FROM fonts
+JOIN licenses ON licenses.keyword = fonts.licenseKeyword
+ORDER BY fonts.uniqueID
+"""
+
+FONT_DATA = "SELECT data FROM fontData WHERE fontID = ?"
+FONT_DATA_ROWID = "SELECT rowid FROM fontData WHERE fontID = ?"
+
+INSTALLATION = "SELECT seats FROM installations WHERE subscriptionID = ? AND anonymousAppID = ? AND fontID = ?"
+INSTALLATIONS_FOR_APP = "SELECT fontID, seats FROM installations WHERE subscriptionID = ? AND anonymousAppID = ?"
+RECORD_INSTALLATION = """
+INSERT INTO installations (subscriptionID, anonymousAppID, fontID, seats, trialInstalledStatus, fontVersion, userName, userEmail)
+VALUES (?, ?, ?, 1, 1, ?, ?, ?)
+ON CONFLICT (subscriptionID, anonymousAppID, fontID) DO UPDATE SET
+    seats = seats + 1,
+    trialInstalledStatus = 1,
+    fontVersion = excluded.fontVersion,
+    userName = excluded.userName,
+    userEmail = excluded.userEmail
+"""
+UPDATE_INSTALLATION = """
+UPDATE installations SET trialInstalledStatus = ?
+WHERE subscriptionID = ? AND anonymousAppID = ? AND fontID = ?
+"""
+DELETE_INSTALLATION = "DELETE FROM installations WHERE subscriptionID = ? AND anonymousAppID = ? AND fontID = ?"
+
+INCREASE_CATALOG_VERSION = "UPDATE catalog SET version = version + 1"
+INCREASE_USER_CATALOG_VERSION = "UPDATE users SET catalogVersion = catalogVersion + 1 WHERE subscriptionID = ?"
+
+
+class SQLiteDatabase(object):
+    """
+    Reference implementation of your own data source on an SQLite database.
+
+    Implements all placeholders of this sample code: __userBySubscriptionID__() as user(),
+    __allFontDataSources__() as allFonts(), __catalogDataSource__() as catalog(), and the user’s __subscriptionDataSource__() with all
+    the methods that app.py expects from `__ownDataSource__`.
+
+    The database runs in WAL mode, so that requests reading the catalog never wait for requests
+    recording installations. Each thread keeps its own connection (and with it its prepared statements),
+    and new connections are opened after a fork, so that worker processes never share one.
+    """
+
+    def __init__(self, path, busyTimeout=5, cachedStatements=128):
+
+        self.path = path
+        self.busyTimeout = busyTimeout
+        self.cachedStatements = cachedStatements
+
+        self._local = threading.local()
+        self._connections = []
+        self._connectionsPID = os.getpid()
+        self._lock = threading.Lock()
+
+        connection = self.connection()
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.executescript(SCHEMA)
+
+    def connection(self):
+        """
+        Return this thread’s connection
+        """
+
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = self._connect()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+            with self._lock:
+                # Connections of the parent process are left alone after a fork
+                if self._connectionsPID != os.getpid():
+                    self._connections = []
+                    self._connectionsPID = os.getpid()
+                self._connections.append(connection)
+
+        return connection
+
+    def _connect(self):
+
+        # Autocommit mode, transactions are started explicitly in transaction().
+        # Connections are only ever used by one thread at a time, but may be closed by another one in close().
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.busyTimeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cachedStatements,
+        )
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
+    @contextmanager
+    def transaction(self, write=True):
+        """
+        Run the enclosed statements in one transaction on this thread’s connection.
+        Write transactions take the write lock right away, so that they never fail halfway for a concurrent writer.
+        Nested transactions become part of the outer one.
+        """
+
+        connection = self.connection()
+
+        if connection.in_transaction:
+            yield connection
+            return
+
+        connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        else:
+            connection.execute("COMMIT")
+
+    def close(self):
+        """
+        Close all connections of this process
+        """
+
+        with self._lock:
+            if self._connectionsPID == os.getpid():
+                for connection in self._connections:
+                    connection.close()
+            self._connections = []
+        self._local = threading.local()
+
+    ##################################################################
+    # Placeholders of app.py
+
+    def user(self, subscriptionID):
+        """
+        __userBySubscriptionID__(): Return User for `subscriptionID`, or None
+        """
+
+        row = self.connection().execute(USER, (subscriptionID,)).fetchone()
+        if row is None:
+            return None
+        return User(self, subscriptionID, *row)
+
+    def allFonts(self):
+        """
+        __allFontDataSources__(): Return all fonts of the catalog
+        """
+
+        return [Font(self, row) for row in self.connection().execute(ALL_FONTS)]
+
+    def catalog(self):
+        """
+        __catalogDataSource__(): Return the whole catalog, see catalog.py
+        """
+
+        return CatalogDataSource(self)
+
+    ##################################################################
+    # Catalog management
+
+    def addDesigner(self, keyword, name):
+        with self.transaction() as connection:
+            connection.execute("INSERT INTO designers (keyword, name) VALUES (?, ?)", (keyword, name))
+            connection.execute(INCREASE_CATALOG_VERSION)
+
+    def addFoundry(self, uniqueID, name):
+        with self.transaction() as connection:
+            connection.execute("INSERT INTO foundries (uniqueID, name) VALUES (?, ?)", (uniqueID, name))
+            connection.execute(INCREASE_CATALOG_VERSION)
+
+    def addLicense(self, keyword, foundryID, name, URL, allowedSeats):
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT INTO licenses (keyword, foundryID, name, URL, allowedSeats) VALUES (?, ?, ?, ?, ?)",
+                (keyword, foundryID, name, URL, allowedSeats),
+            )
+            connection.execute(INCREASE_CATALOG_VERSION)
+
+    def addFamily(self, uniqueID, foundryID, name, versions=()):
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT INTO families (uniqueID, foundryID, name) VALUES (?, ?, ?)", (uniqueID, foundryID, name)
+            )
+            connection.executemany(
+                "INSERT INTO versions (familyID, number) VALUES (?, ?)", [(uniqueID, number) for number in versions]
+            )
+            connection.execute(INCREASE_CATALOG_VERSION)
+
+    def addFont(
+        self,
+        uniqueID,
+        familyID,
+        licenseKeyword,
+        name,
+        postScriptName,
+        version,
+        binaryFontData,
+        protected=True,
+        isTrialFont=False,
+    ):
+        with self.transaction() as connection:
+            connection.execute(
+                """
+                INSERT INTO fonts (uniqueID, familyID, licenseKeyword, name, postScriptName, version, protected, isTrialFont)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (uniqueID, familyID, licenseKeyword, name, postScriptName, version, protected, isTrialFont),
+            )
+            connection.execute("INSERT INTO fontData (fontID, data) VALUES (?, ?)", (uniqueID, binaryFontData))
+            connection.execute(INCREASE_CATALOG_VERSION)
+
+    def addUser(self, subscriptionID, secretKey, familyIDs=(), accessToken=None):
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT INTO users (subscriptionID, secretKey, accessToken) VALUES (?, ?, ?)",
+                (subscriptionID, secretKey, accessToken),
+            )
+            self.addSubscriptionFamilies(subscriptionID, familyIDs)
+
+    def addSubscriptionFamilies(self, subscriptionID, familyIDs):
+        """
+        Give subscription access to the families `familyIDs`
+        """
+
+        with self.transaction() as connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO subscriptionFamilies (subscriptionID, familyID) VALUES (?, ?)",
+                [(subscriptionID, familyID) for familyID in familyIDs],
+            )
+            connection.execute(INCREASE_USER_CATALOG_VERSION, (subscriptionID,))
+
+    def removeSubscriptionFamilies(self, subscriptionID, familyIDs):
+        """
+        Take access to the families `familyIDs` away from subscription
+        """
+
+        with self.transaction() as connection:
+            connection.executemany(
+                "DELETE FROM subscriptionFamilies WHERE subscriptionID = ? AND familyID = ?",
+                [(subscriptionID, familyID) for familyID in familyIDs],
+            )
+            connection.execute(INCREASE_USER_CATALOG_VERSION, (subscriptionID,))
+
+
+class User(object):
+    """
+    User as returned by __userBySubscriptionID__()
+    """
+
+    def __init__(self, database, subscriptionID, secretKey, accessToken, catalogVersion):
+        self.database = database
+        self.subscriptionID = subscriptionID
+        self.__secretKey__ = secretKey
+        self.__accessToken__ = accessToken
+        self.__catalogVersion__ = catalogVersion
+
+    def __assignNewAccessToken__(self):
+        self.__accessToken__ = secrets.token_urlsafe(32)
+        with self.database.transaction() as connection:
+            connection.execute(ASSIGN_ACCESS_TOKEN, (self.__accessToken__, self.subscriptionID))
+
+    def __subscriptionDataSource__(self):
+        return SubscriptionDataSource(self.database, self.subscriptionID)
+
+
+class SubscriptionDataSource(object):
+    """
+    `__ownDataSource__` of one subscription, holding the families that the subscription has access to
+    """
+
+    def __init__(self, database, subscriptionID):
+        self.database = database
+        self.subscriptionID = subscriptionID
+
+    def __designers__(self):
+        return [Designer(*row) for row in self.database.connection().execute(DESIGNERS)]
+
+    def __foundries__(self):
+        return _loadFoundries(
+            self.database,
+            (
+                FOUNDRIES_OF_SUBSCRIPTION,
+                LICENSES_OF_SUBSCRIPTION,
+                FAMILIES_OF_SUBSCRIPTION,
+                VERSIONS_OF_SUBSCRIPTION,
+                FONTS_OF_SUBSCRIPTION,
+            ),
+            (self.subscriptionID,),
+        )
+
+    def __familyIDs__(self):
+        return [row[0] for row in self.database.connection().execute(FAMILY_IDS_OF_SUBSCRIPTION, (self.subscriptionID,))]
+
+    def __fontDataSource__(self, fontID):
+        return self.__fontDataSources__([fontID]).get(fontID)
+
+    def __fontDataSources__(self, fontIDs):
+        rows = self.database.connection().execute(FONTS_OF_SUBSCRIPTION_BY_ID, (self.subscriptionID, json.dumps(fontIDs)))
+        return {font.__uniqueID__: font for font in (Font(self.database, row) for row in rows)}
+
+    def __recordedFontInstallations__(self, subscriptionID, anonymousAppID, fontID):
+        row = self.database.connection().execute(INSTALLATION, (subscriptionID, anonymousAppID, fontID)).fetchone()
+        return row[0] if row else None
+
+    def __recordedFontInstallationsForApp__(self, subscriptionID, anonymousAppID):
+        return dict(self.database.connection().execute(INSTALLATIONS_FOR_APP, (subscriptionID, anonymousAppID)))
+
+    def __commitFontInstallationChanges__(self, changes):
+        with self.database.transaction():
+            for action, fontID, details in changes:
+                if action == "record":
+                    self.__recordFontInstallation__(
+                        changes.subscriptionID, changes.anonymousAppID, fontID, **details
+                    )
+                elif action == "update":
+                    self.__updateFontInstallation__(
+                        changes.subscriptionID, changes.anonymousAppID, fontID, **details
+                    )
+                elif action == "delete":
+                    self.__deleteFontInstallationRecord__(changes.subscriptionID, changes.anonymousAppID, fontID)
+
+    def __recordFontInstallation__(self, subscriptionID, anonymousAppID, fontID, fontVersion, userName, userEmail):
+        self.database.connection().execute(
+            RECORD_INSTALLATION, (subscriptionID, anonymousAppID, fontID, fontVersion, userName, userEmail)
+        )
+
+    def __updateFontInstallation__(self, subscriptionID, anonymousAppID, fontID, trialInstalledStatus):
+        self.database.connection().execute(
+            UPDATE_INSTALLATION, (trialInstalledStatus, subscriptionID, anonymousAppID, fontID)
+        )
+
+    def __deleteFontInstallationRecord__(self, subscriptionID, anonymousAppID, fontID):
+        self.database.connection().execute(DELETE_INSTALLATION, (subscriptionID, anonymousAppID, fontID))
+
+
+class CatalogDataSource(object):
+    """
+    The whole catalog, holding all families, and the families that each subscription has access to
+    """
+
+    def __init__(self, database):
+        self.database = database
+
+    def __designers__(self):
+        return [Designer(*row) for row in self.database.connection().execute(DESIGNERS)]
+
+    def __foundries__(self):
+        return _loadFoundries(self.database, (ALL_FOUNDRIES, ALL_LICENSES, ALL_FAMILIES, ALL_VERSIONS, ALL_FONTS), ())
+
+    def __version__(self):
+        return self.database.connection().execute(CATALOG_VERSION).fetchone()[0]
+
+    def __entitlements__(self):
+        with self.database.transaction(write=False) as connection:
+            entitlements = {
+                subscriptionID: (catalogVersion, [])
+                for subscriptionID, catalogVersion in connection.execute(ALL_USER_CATALOG_VERSIONS)
+            }
+            for subscriptionID, familyID in connection.execute(ALL_SUBSCRIPTION_FAMILIES):
+                entitlements[subscriptionID][1].append(familyID)
+        return entitlements
+
+
+def _loadFoundries(database, queries, parameters):
+    """
+    Return foundries with their licenses, families, versions, and fonts,
+    loaded with one query per table out of `queries`, all in one snapshot
+    """
+
+    foundriesQuery, licensesQuery, familiesQuery, versionsQuery, fontsQuery = queries
+    with database.transaction(write=False) as connection:
+        foundries = [Foundry(*row) for row in connection.execute(foundriesQuery, parameters)]
+        licenses = [License(*row) for row in connection.execute(licensesQuery, parameters)]
+        families = [Family(*row) for row in connection.execute(familiesQuery, parameters)]
+        versions = connection.execute(versionsQuery, parameters).fetchall()
+        fonts = connection.execute(fontsQuery, parameters).fetchall()
+
+    foundriesByID = {foundry.__uniqueID__: foundry for foundry in foundries}
+    for license in licenses:
+        foundriesByID[license.foundryID]._licenses.append(license)
+
+    familiesByID = {}
+    for family in families:
+        familiesByID[family.__uniqueID__] = family
+        foundriesByID[family.foundryID]._families.append(family)
+
+    for familyID, number in versions:
+        familiesByID[familyID]._versions.append(Version(number))
+
+    for row in fonts:
+        font = Font(database, row)
+        familiesByID[font.familyID]._fonts.append(font)
+
+    return foundries
+
+
+class Designer(object):
+    def __init__(self, keyword, name):
+        self.__keyword__ = keyword
+        self.__name__ = name
+
+
+class Foundry(object):
+    def __init__(self, uniqueID, name):
+        self.__uniqueID__ = uniqueID
+        self.__name__ = name
+        self._licenses = []
+        self._families = []
+
+    def licenses(self):
+        return self._licenses
+
+    def families(self):
+        return self._families
+
+
+class License(object):
+    def __init__(self, keyword, foundryID, name, URL, allowedSeats):
+        self.__keyword__ = keyword
+        self.foundryID = foundryID
+        self.__name__ = name
+        self.__URL__ = URL
+        self.__allowedSeats__ = allowedSeats
+
+
+class Family(object):
+    def __init__(self, uniqueID, foundryID, name):
+        self.__uniqueID__ = uniqueID
+        self.foundryID = foundryID
+        self.__name__ = name
+        self._versions = []
+        self._fonts = []
+
+    def __versions__(self):
+        return self._versions
+
+    def __fonts__(self):
+        return self._fonts
+
+
+class Version(object):
+    def __init__(self, number):
+        self.__versionNumber__ = number
+
+
+class Font(object):
+    """
+    Font of the catalog. The binary font data is only loaded when it is needed.
+    """
+
+    def __init__(self, database, row):
+        self.database = database
+        (
+            self.__uniqueID__,
+            self.familyID,
+            self.__name__,
+            self.__postScriptName__,
+            self.__version__,
+            protected,
+            isTrialFont,
+        ) = row[:7]
+        self.__protected__ = bool(protected)
+        self.__isTrialFont__ = bool(isTrialFont)
+        self.__licenseDataSource__ = License(*row[7:])
+
+    @property
+    def __binaryFontData__(self):
+        return self.database.connection().execute(FONT_DATA, (self.__uniqueID__,)).fetchone()[0]
+
+    def __openBinaryFontData__(self):
+        """
+        Return file-like object to read the binary font data in parts, see streaming.py
+        """
+
+        # Streamed responses may be read from another thread than this one, so the blob gets its own connection
+        connection = self.database._connect()
+        row = connection.execute(FONT_DATA_ROWID, (self.__uniqueID__,)).fetchone()
+
+        # Blobs can be read in parts from Python 3.11 on
+        if not hasattr(connection, "blobopen"):
+            data = connection.execute(FONT_DATA, (self.__uniqueID__,)).fetchone()[0]
+            connection.close()
+            return io.BytesIO(data)
+
+        return _BlobReader(connection, connection.blobopen("fontData", "data", row[0], readonly=True))
+
+
+class _BlobReader(object):
+    """
+    File-like object reading a blob, closing its connection when closed
+    """
+
+    def __init__(self, connection, blob):
+        self.connection = connection
+        self.blob = blob
+
+    def read(self, size=-1):
+        return self.blob.read(size)
+
+    def close(self):
+        self.blob.close()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,113 @@
+# Import third party modules
+import base64
+import io
+import secrets
+
+# Size of binary font data read at once when streaming.
+# Needs to be a multiple of 3 so that the base64-encoded chunks can simply be concatenated without padding in between.
+CHUNK_SIZE = 3 * 16 * 1024
+
+
+class StreamedAssets(object):
+    """
+    Font data of `installFonts` assets to be sent out in chunks while the response is being streamed,
+    instead of holding the base64-encoded data of all fonts in memory at once.
+
+    While building the object tree, each asset receives a unique placeholder in place of its data
+    (see add()). The root object is then serialized as usual, and stream() sends out the resulting
+    JSON data with each placeholder replaced by the asset’s font data, base64-encoded chunk by chunk.
+    """
+
+    def __init__(self, store=None):
+
+        # Optional fontstore.FontAssetStore to read already encoded font data from
+        self.store = store
+
+        # Random token per request, so that placeholders can’t collide with any other data in the response
+        self.token = secrets.token_hex(8)
+
+        # List of (placeholder, __fontDataSource__) in the order they were added
+        self.assets = []
+
+    def add(self, __fontDataSource__):
+        """
+        Register font data source, return placeholder to use as the asset’s data
+        """
+
+        placeholder = f"__streamedAsset{len(self.assets)}_{self.token}__"
+        self.assets.append((placeholder, __fontDataSource__))
+        return placeholder
+
+    def stream(self, jsonData):
+        """
+        Generator yielding `jsonData` in chunks, with all placeholders replaced by base64-encoded font data
+        """
+
+        position = 0
+
+        for placeholder, __fontDataSource__ in self.assets:
+
+            # Assets appear in the JSON data in the same order they were added
+            index = jsonData.find(placeholder, position)
+            if index == -1:
+                continue
+
+            # JSON data up to the placeholder
+            yield jsonData[position:index]
+
+            # Font data
+            if self.store:
+                chunks = self.store.chunks(__fontDataSource__)
+            else:
+                chunks = base64Chunks(openBinaryFontData(__fontDataSource__))
+            for chunk in chunks:
+                yield chunk
+
+            position = index + len(placeholder)
+
+        # Remaining JSON data
+        yield jsonData[position:]
+
+    def __len__(self):
+        return len(self.assets)
+
+
+def openBinaryFontData(__fontDataSource__):
+    """
+    Return file-like object to read a font’s binary data from.
+
+    If your data source can read the font data from a file or database blob in parts,
+    implement __openBinaryFontData__() so that only one chunk of each font is ever held in memory.
+    Otherwise the complete `__binaryFontData__` is used.
+    """
+
+    # Note: __openBinaryFontData__() doesn’t exist in this sample code
+    if hasattr(__fontDataSource__, "__openBinaryFontData__"):
+        return __fontDataSource__.__openBinaryFontData__()
+
+    return io.BytesIO(__fontDataSource__.__binaryFontData__)
+
+
+def base64Chunks(fileObject, chunkSize=CHUNK_SIZE):
+    """
+    Generator reading `fileObject` in chunks, yielding them base64-encoded as strings
+    """
+
+    # Bytes left over from the previous chunk.
+    # Files may return less data than requested, so we only ever encode multiples of 3 bytes until the end.
+    rest = b""
+
+    with fileObject:
+        while True:
+            chunk = fileObject.read(chunkSize)
+            if not chunk:
+                break
+
+            chunk = rest + chunk
+            cut = len(chunk) - len(chunk) % 3
+            rest = chunk[cut:]
+            if cut:
+                yield base64.b64encode(chunk[:cut]).decode()
+
+    if rest:
+        yield base64.b64encode(rest).decode()
@@ -0,0 +1,176 @@
+# Import typeworld module
+import typeworld.api
+
+# Import third party modules
+import pytest
+
+# Import own modules
+import serializer
+from catalog import CompactCatalog
+
+# All classes of `typeworld.api` that come with sample data
+SAMPLE_CLASSES = sorted(
+    (
+        objectClass
+        for objectClass in vars(typeworld.api).values()
+        if isinstance(objectClass, type)
+        and issubclass(objectClass, typeworld.api.DictBasedObject)
+        and "sample" in vars(objectClass)
+    ),
+    key=lambda objectClass: objectClass.__name__,
+)
+
+# Strings that the JSON encoder needs to escape
+NAMES = [
+    "Plain",
+    "Schriftgießerei Müller",
+    "Ελληνικά",
+    "日本語フォント",
+    "Emoji 😀 Font",
+    'Quotes " and \\ backslashes',
+    "Tabs\tand\nnewlines",
+    "  \x00\x1f",
+]
+
+
+def buildCatalog(foundries=2, families=3, fonts=2, names=NAMES):
+    """
+    Return `InstallableFontsResponse` holding a synthetic catalog
+    """
+
+    installableFonts = typeworld.api.InstallableFontsResponse()
+    installableFonts.response = "success"
+
+    for i, name in enumerate(names):
+        designer = typeworld.api.Designer()
+        designer.keyword = f"designer{i}"
+        designer.name.en = name
+        installableFonts.designers.append(designer)
+
+    for i in range(foundries):
+        foundry = typeworld.api.Foundry()
+        foundry.uniqueID = f"foundry{i}"
+        foundry.name.en = names[i % len(names)]
+        foundry.name.de = names[(i + 1) % len(names)]
+        installableFonts.foundries.append(foundry)
+
+        license = typeworld.api.LicenseDefinition()
+        license.keyword = f"license{i}"
+        license.name.en = names[i % len(names)]
+        license.URL = "https://awesomefonts.com/eula"
+        foundry.licenses.append(license)
+
+        for j in range(families):
+            family = typeworld.api.Family()
+            family.uniqueID = f"foundry{i}-family{j}"
+            family.name.en = names[j % len(names)]
+            foundry.families.append(family)
+
+            version = typeworld.api.Version()
+            version.number = "1.0"
+            family.versions.append(version)
+
+            for k in range(fonts):
+                font = typeworld.api.Font()
+                font.uniqueID = f"foundry{i}-family{j}-font{k}"
+                font.name.en = names[k % len(names)]
+                font.postScriptName = f"Font{i}{j}{k}-Regular"
+                font.format = "otf"
+                font.usedLicenses.append(typeworld.api.LicenseUsage())
+                font.usedLicenses[0].keyword = license.keyword
+                family.fonts.append(font)
+
+    return installableFonts
+
+
+def rootWith(installableFonts):
+    root = typeworld.api.RootResponse()
+    root.installableFonts = installableFonts
+    return root
+
+
+@pytest.mark.parametrize("objectClass", SAMPLE_CLASSES, ids=lambda objectClass: objectClass.__name__)
+def test_dumpJSONOfSamples(objectClass):
+    o = objectClass().sample()
+    assert serializer.dumpJSON(o) == o.dumpJSON()
+
+
+@pytest.mark.parametrize("foundries, families, fonts", [(0, 0, 0), (1, 1, 1), (2, 3, 2), (5, 10, 4)])
+def test_dumpJSONOfCatalogs(foundries, families, fonts):
+    root = rootWith(buildCatalog(foundries, families, fonts))
+    assert serializer.dumpJSON(root) == root.dumpJSON()
+    assert serializer.verify(root) == (True, None)
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_dumpJSONOfNonASCIIStrings(name):
+    root = rootWith(buildCatalog(1, 1, 1, names=[name]))
+    assert serializer.dumpJSON(root) == root.dumpJSON()
+
+
+def test_dumpJSONWithFragments():
+    installableFonts = buildCatalog()
+    expected = rootWith(installableFonts).dumpJSON()
+
+    root = typeworld.api.RootResponse()
+    root.installableFonts = typeworld.api.InstallableFontsResponse()
+    fragments = {"installableFonts": serializer.fragment(installableFonts)}
+    assert serializer.dumpJSON(root, fragments) == expected
+    assert serializer.dumpJSON(root, fragments, original=True) == expected
+    assert serializer.verify(root, fragments) == (True, None)
+
+
+def test_fragmentOriginal():
+    installableFonts = buildCatalog()
+    assert serializer.fragment(installableFonts) == serializer.fragment(installableFonts, original=True)
+    assert serializer.verifyFragment(installableFonts) == (True, None)
+
+
+@pytest.mark.parametrize("depth", [1, 2, 3, 5])
+def test_encodeAt(depth):
+    family = serializer.dumpDict(buildCatalog(1, 1, 2).foundries[0].families[0])
+
+    # Nest `family` so that it ends up `depth` levels deep in the output of encodeFragment()
+    plain, raw = family, serializer.encodeAt(family, depth)
+    for level in range(depth - 1):
+        plain, raw = {"nested": plain}, {"nested": raw}
+
+    assert serializer.encodeFragment(raw) == serializer.encodeFragment(plain)
+
+
+def test_compactCatalogOfWholeCatalog():
+    installableFonts = buildCatalog()
+    compact = CompactCatalog(installableFonts, 1)
+    assert compact.fragment() == serializer.fragment(installableFonts)
+
+
+@pytest.mark.parametrize(
+    "familyIDs",
+    [
+        [],
+        ["foundry0-family1"],
+        ["foundry1-family2", "foundry0-family0"],
+        ["foundry0-family0", "foundry0-family1", "foundry0-family2"],
+        ["foundry1-family0", "unknownFamily"],
+    ],
+)
+def test_compactCatalogOfSubscription(familyIDs):
+    compact = CompactCatalog(buildCatalog(), 1)
+
+    # The same catalog, built with only the families in `familyIDs`, and only their foundries
+    expected = buildCatalog()
+    foundries = list(expected.foundries)
+    expected.foundries = []
+    for foundry in foundries:
+        families = [family for family in foundry.families if family.uniqueID in familyIDs]
+        if families:
+            foundry.families = families
+            expected.foundries.append(foundry)
+
+    fragment = compact.fragment(compact.families(familyIDs))
+    assert fragment == serializer.fragment(expected)
+
+    # And spliced into the root object
+    root = typeworld.api.RootResponse()
+    root.installableFonts = typeworld.api.InstallableFontsResponse()
+    assert serializer.dumpJSON(root, {"installableFonts": fragment}) == rootWith(expected).dumpJSON()
@@ -0,0 +1,55 @@
+# Import third party modules
+import pytest
+
+# Import own modules
+from tokens import AccessTokens, DownloadLinks
+
+
+@pytest.fixture
+def accessTokens():
+    return AccessTokens({"key1": "secret1"}, lifetime=60)
+
+
+def test_verifyAcceptsIssuedToken(accessTokens):
+    token = accessTokens.issue("subscription1")
+    assert accessTokens.verify(token, "subscription1")
+    assert not accessTokens.verify(token, "subscription2")
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "",
+        "garbage",
+        "key1.1.2.token",
+        "key1.².9999999999.token.signature",
+        "key1.1700000000.²³.token.signature",
+        "key1.١٧٠٠٠٠٠٠٠٠.9999999999.token.signature",
+        "key1.1700000000.9999999999.token.signatüre",
+        "key1.1700000000.9999999999.token.😀",
+        "unknownKey.1700000000.9999999999.token.signature",
+    ],
+)
+def test_verifyRejectsMalformedTokens(accessTokens, token):
+    assert accessTokens.verify(token, "subscription1") is False
+
+
+def test_verifyRejectsTamperedSignature(accessTokens):
+    token = accessTokens.issue("subscription1")
+    assert not accessTokens.verify(token[:-1] + "é", "subscription1")
+
+
+def test_revokeRejectsMalformedTokens(accessTokens):
+    assert accessTokens.revoke("key1.².9999999999.token.signature") is False
+
+
+@pytest.mark.parametrize("token", ["abc.é", "é.é", "abc", "", "abc.def"])
+def test_downloadLinksRejectMalformedTokens(token):
+    links = DownloadLinks("secret", "https://example.com/download")
+    assert links.verify(token) is None
+
+
+def test_downloadLinksAcceptIssuedLink():
+    links = DownloadLinks("secret", "https://example.com/download")
+    token = links.url("subscription1", "font1", "1.0").rsplit("/", 1)[1]
+    assert links.verify(token)[:3] == ("subscription1", "font1", "1.0")
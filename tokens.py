@@ -0,0 +1,314 @@
+# Import third party modules
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+
+# File locks for revoking tokens from several processes at once are only available on Unix
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Length of the signature in bytes
+SIGNATURE_SIZE = 16
+
+
+class AccessTokens(object):
+    """
+    Signed, time-limited access tokens for subscription URLs, verified without looking anything up in the data source.
+
+    A token names the key it was signed with, when it was issued, when it expires, and a random token ID,
+    and is signed with HMAC-SHA256 over all of that and the `subscriptionID` it was issued for:
+
+        keyID.issued.expires.tokenID.signature
+
+    `keys` holds the secret keys as `keyID: secret`. New tokens are signed with the first one, and tokens signed
+    with any of them are accepted. To rotate keys, put a new key first, and remove the old one once all tokens signed
+    with it have expired (after `lifetime` seconds).
+
+    Unlike the single-use tokens stored with each user, these tokens can be used again until they expire,
+    so keep `lifetime` short. Tokens that need to become invalid early can be revoked, one by one or all tokens of
+    a subscription at once, in a small revocation list kept in `revocationFile`, which all processes read.
+    """
+
+    def __init__(self, keys, lifetime=3600, revocationFile=None, checkInterval=1):
+
+        if not keys:
+            raise ValueError("At least one key is needed to sign access tokens")
+        for keyID in keys:
+            if "." in keyID:
+                raise ValueError(f"Key IDs must not contain dots: {keyID}")
+
+        self.keys = {keyID: secret.encode() if isinstance(secret, str) else secret for keyID, secret in keys.items()}
+        self.signingKeyID = next(iter(self.keys))
+        self.lifetime = lifetime
+        self.revocationFile = revocationFile
+        self.checkInterval = checkInterval
+
+        # Revocation list as last read from `revocationFile`
+        self._lock = threading.Lock()
+        self._revocations = {"tokens": {}, "subscriptions": {}}
+        self._revocationsIdentity = None
+        self._nextCheck = 0
+
+    def issue(self, subscriptionID, lifetime=None):
+        """
+        Return new access token for `subscriptionID`, valid for `lifetime` seconds (or the default lifetime)
+        """
+
+        issued = int(time.time())
+        expires = issued + (lifetime or self.lifetime)
+        payload = f"{self.signingKeyID}.{issued}.{expires}.{secrets.token_urlsafe(9)}"
+        return f"{payload}.{self._sign(self.keys[self.signingKeyID], subscriptionID, payload)}"
+
+    def verify(self, token, subscriptionID):
+        """
+        Return True if `token` was issued for `subscriptionID` with one of the keys, and hasn’t expired or been revoked
+        """
+
+        parsed = self._parse(token)
+        if not parsed:
+            return False
+
+        # Compared as bytes, as compare_digest() refuses strings with other than ASCII characters
+        keyID, issued, expires, tokenID, payload, signature = parsed
+        key = self.keys.get(keyID)
+        if key is None or not hmac.compare_digest(signature.encode(), self._sign(key, subscriptionID, payload).encode()):
+            return False
+
+        if expires <= time.time():
+            return False
+
+        revocations = self._currentRevocations()
+        if tokenID in revocations["tokens"]:
+            return False
+        revokedSubscription = revocations["subscriptions"].get(subscriptionID)
+        if revokedSubscription and issued <= revokedSubscription[0]:
+            return False
+
+        return True
+
+    def revoke(self, token):
+        """
+        Revoke a single token until it expires. Returns False if `token` isn’t a token at all.
+        """
+
+        parsed = self._parse(token)
+        if not parsed:
+            return False
+
+        keyID, issued, expires, tokenID, payload, signature = parsed
+
+        def change(revocations):
+            revocations["tokens"][tokenID] = expires
+
+        self._changeRevocations(change)
+        return True
+
+    def revokeSubscription(self, subscriptionID):
+        """
+        Revoke all tokens of `subscriptionID` issued until now, for instance when a subscription has been passed on
+        """
+
+        now = int(time.time())
+
+        def change(revocations):
+            # Kept until all tokens issued until now have expired
+            revocations["subscriptions"][subscriptionID] = [now, now + self.lifetime]
+
+        self._changeRevocations(change)
+
+    def _sign(self, key, subscriptionID, payload):
+        digest = hmac.new(key, f"{subscriptionID}.{payload}".encode(), hashlib.sha256).digest()[:SIGNATURE_SIZE]
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+    def _parse(self, token):
+        """
+        Return `keyID, issued, expires, tokenID, payload, signature` of `token`, or None if it isn’t well-formed
+        """
+
+        parts = token.split(".")
+        if len(parts) != 5:
+            return None
+
+        # isdigit() alone also accepts digits such as "²" that int() doesn’t
+        keyID, issued, expires, tokenID, signature = parts
+        if not (issued.isascii() and issued.isdigit() and expires.isascii() and expires.isdigit()):
+            return None
+
+        return keyID, int(issued), int(expires), tokenID, token[: -len(signature) - 1], signature
+
+    ##################################################################
+    # Revocation list
+
+    def _currentRevocations(self):
+        """
+        Return the revocation list, read again from `revocationFile` when it has changed
+        """
+
+        if not self.revocationFile:
+            return self._revocations
+
+        now = time.monotonic()
+        if now < self._nextCheck:
+            return self._revocations
+
+        with self._lock:
+            if now >= self._nextCheck:
+                self._nextCheck = now + self.checkInterval
+                try:
+                    stat = os.stat(self.revocationFile)
+                except FileNotFoundError:
+                    self._revocations, self._revocationsIdentity = {"tokens": {}, "subscriptions": {}}, None
+                    return self._revocations
+
+                identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                if identity != self._revocationsIdentity:
+                    self._revocations = self._readRevocations()
+                    self._revocationsIdentity = identity
+
+        return self._revocations
+
+    def _readRevocations(self):
+        try:
+            with open(self.revocationFile) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"tokens": {}, "subscriptions": {}}
+
+    def _changeRevocations(self, change):
+        """
+        Apply `change(revocations)` to the revocation list, and drop entries of tokens that have expired anyway
+        """
+
+        if not self.revocationFile:
+            with self._lock:
+                change(self._revocations)
+                self._pruneRevocations(self._revocations)
+            return
+
+        if fcntl is None:
+            raise RuntimeError("Revoking access tokens requires fcntl, which isn’t available on this system")
+
+        # Only one process at a time may change the file
+        with open(self.revocationFile + ".lock", "a") as lockFile:
+            fcntl.flock(lockFile.fileno(), fcntl.LOCK_EX)
+
+            revocations = self._readRevocations()
+            change(revocations)
+            self._pruneRevocations(revocations)
+
+            # Write to temporary file first and then move it into place,
+            # so that other processes never read a half-written file
+            directory = os.path.dirname(os.path.abspath(self.revocationFile))
+            fileDescriptor, temporaryPath = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fileDescriptor, "w") as f:
+                json.dump(revocations, f)
+            os.replace(temporaryPath, self.revocationFile)
+
+        # Read again right away in this process
+        with self._lock:
+            self._nextCheck = 0
+
+    def _pruneRevocations(self, revocations):
+        now = time.time()
+        revocations["tokens"] = {tokenID: expires for tokenID, expires in revocations["tokens"].items() if expires > now}
+        revocations["subscriptions"] = {
+            subscriptionID: entry for subscriptionID, entry in revocations["subscriptions"].items() if entry[1] > now
+        }
+
+
+class DownloadLinks(object):
+    """
+    Signed, short-lived links to download a font file, handed out in `installFonts` instead of the font data
+    (see app.FONT_DOWNLOAD_URL). A link names the subscription it was handed out for, the font and its version,
+    and when it expires, and is signed with HMAC-SHA256 over all of that with `key`:
+
+        baseURL/payload.signature
+    """
+
+    def __init__(self, key, baseURL, lifetime=300):
+
+        if not key:
+            raise ValueError("A key is needed to sign download links")
+
+        self.key = key.encode() if isinstance(key, str) else key
+        self.baseURL = baseURL.rstrip("/")
+        self.lifetime = lifetime
+
+    def url(self, subscriptionID, fontID, version):
+        """
+        Return new download link of a font
+        """
+
+        payload = json.dumps([subscriptionID, fontID, version, int(time.time()) + self.lifetime], separators=(",", ":"))
+        payload = base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+        return f"{self.baseURL}/{payload}.{self._sign(payload)}"
+
+    def verify(self, token):
+        """
+        Return `subscriptionID, fontID, version, expires` of the last part of a download link,
+        or None if it isn’t signed with `key` or has expired
+        """
+
+        # Compared as bytes, as compare_digest() refuses strings with other than ASCII characters
+        payload, _, signature = token.partition(".")
+        if not hmac.compare_digest(signature.encode(), self._sign(payload).encode()):
+            return None
+
+        try:
+            subscriptionID, fontID, version, expires = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        except ValueError:
+            return None
+
+        if expires <= time.time():
+            return None
+
+        return subscriptionID, fontID, version, expires
+
+    def _sign(self, payload):
+        digest = hmac.new(self.key, payload.encode(), hashlib.sha256).digest()[:SIGNATURE_SIZE]
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def main():
+    """
+    Command line interface to issue and revoke access tokens:
+
+        python tokens.py issue SUBSCRIPTIONID
+        python tokens.py revoke TOKEN
+        python tokens.py revoke-subscription SUBSCRIPTIONID
+    """
+
+    # Import here so that importing this module from app.py doesn’t import app.py again
+    import app
+
+    parser = argparse.ArgumentParser(description="Issue and revoke signed access tokens")
+    parser.add_argument("action", choices=["issue", "revoke", "revoke-subscription"])
+    parser.add_argument("value", help="Subscription ID, or token to revoke")
+    parser.add_argument("--lifetime", type=int, help="Lifetime of the new token in seconds")
+    arguments = parser.parse_args()
+
+    if not app.accessTokens:
+        parser.error("ACCESS_TOKEN_KEYS isn’t set in app.py")
+
+    if arguments.action == "issue":
+        print(app.accessTokens.issue(arguments.value, arguments.lifetime))
+
+    elif arguments.action == "revoke":
+        if not app.accessTokens.revoke(arguments.value):
+            parser.error("Not an access token")
+
+    elif arguments.action == "revoke-subscription":
+        app.accessTokens.revokeSubscription(arguments.value)
+
+
+if __name__ == "__main__":
+    main()